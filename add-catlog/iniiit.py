@@ -1,7 +1,16 @@
 import json
-import requests
+import os
+import sys
 
-API_URL = "http://49.205.180.247:3007/api"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from csv_source import load_records  # noqa: E402
+from strapi_client import get_client  # noqa: E402
+
+API_URL = "/api"
+LOOKUP_CHUNK_SIZE = 100  # model codes resolved per $in request
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "work-on-poduct-data - new-work-add-category.csv")
+client = get_client()
 # post_structure ={
 #   "data": {
 #     "Name": "string",
@@ -45,83 +54,96 @@ API_URL = "http://49.205.180.247:3007/api"
 # }
 
 
-def load_json(file_path):
-    """Load JSON data from a file."""
+def resolve_products(datas, chunk_size=LOOKUP_CHUNK_SIZE):
+    """
+    Resolve the model_code of every row to a product documentId up front.
+
+    Only the model codes are kept, not the rows.
+
+    Returns:
+        dict: model_code -> documentId for every product that exists
+    """
+    model_codes = [data["model_code"] for data in datas]
+    products = client.lookup(
+        f"{API_URL}/products", "model_code", model_codes, chunk_size)
+
+    missing = sorted({code for code in model_codes if code not in products})
+    print(f"Resolved {len(products)} of {len(set(model_codes))} model codes.")
+    for model_code in missing:
+        print(f"No product found for model_code: {model_code}")
+    return products
+
+
+def add_category_in_product_category(load_rows, chunk_size=LOOKUP_CHUNK_SIZE):
+    """
+    Update product categories and specifications.
+
+    Every model code in the input is resolved, and missing ones reported,
+    before the first update. load_rows returns a fresh iterator over the
+    rows; it is read once for the codes and once for the updates, so the
+    rows themselves are never all held in memory.
+    """
     try:
-        with open(file_path, "r") as file:
-            return json.load(file)
-    except FileNotFoundError:
-        print(f"File not found: {file_path}")
-        return []
+        products = resolve_products(load_rows(), chunk_size)
+    except Exception as e:
+        print(f"Failed to fetch products by model_code: {e}")
+        return
+
+    update_products(load_rows(), products)
 
 
-def add_category_in_product_category(datas):
-    """Update product categories and specifications."""
+def update_products(datas, products):
+    """PUT the categories and specification of each resolved row."""
     for data in datas:
         try:
-            # Fetch product by model_code
-            response = requests.get(
-                f"{API_URL}/products?filters[model_code][$eq]={
-                    data['model_code']}"
-            )
-            if response.status_code == 200:
-                product_data = response.json().get("data", [])
-                if product_data:
-                    product_document_id = product_data[0].get("documentId")
-                    post_url = f"{API_URL}/products/{product_document_id}"
-
-                    # Construct the payload
-                    payload = {
-                        "data": {
-                            "product_categories": {
-                                "connect": [
-                                    {
-                                        "documentId": data["child_category"],
-                                        "position": {
-                                            "after": data["parent_category"]
-                                        }
-                                    }
-                                ]
-                            },
-                            "specification": [
-                                {
-                                    "width": data["width"],
-                                    "length": data["length"],
-                                    "thickness": data["thickness"]
+            product_document_id = products.get(data["model_code"])
+            if not product_document_id:
+                continue
+            post_url = f"{API_URL}/products/{product_document_id}"
+
+            # Construct the payload
+            payload = {
+                "data": {
+                    "product_categories": {
+                        "connect": [
+                            {
+                                "documentId": data["child_category"],
+                                "position": {
+                                    "after": data["parent_category"]
                                 }
-                            ],
-                            "new": 'true' if data["new"] == "Y" else 'false',
+                            }
+                        ]
+                    },
+                    "specification": [
+                        {
+                            "width": data["width"],
+                            "length": data["length"],
+                            "thickness": data["thickness"]
                         }
-                    }
-
-                    # Log the PUT request details
-                    print("PUT URL:", post_url)
-                    print("PUT Payload:", json.dumps(payload, indent=4))
-
-                    # Send the PUT request
-                    headers = {"Content-Type": "application/json"}
-                    update_response = requests.put(
-                        post_url, data=json.dumps(payload), headers=headers
-                    )
-
-                    if update_response.status_code == 200:
-                        print(
-                            f"Successfully updated product {
-                                data['model_code']}."
-                        )
-                    else:
-                        print(
-                            f"Failed to update product {data['model_code']}. "
-                            f"Error: {update_response.text}"
-                        )
-                else:
-                    print(f"No product found for model_code: {
-                          data['model_code']}")
+                    ],
+                    "new": 'true' if data["new"] == "Y" else 'false',
+                }
+            }
+
+            # Log the PUT request details
+            print("PUT URL:", post_url)
+            print("PUT Payload:", json.dumps(payload, indent=4))
+
+            # Send the PUT request
+            headers = {"Content-Type": "application/json"}
+            update_response = client.put(
+                post_url, data=json.dumps(payload), headers=headers
+            )
+
+            if update_response.status_code == 200:
+                print(
+                    f"Successfully updated product {
+                        data['model_code']}."
+                )
             else:
                 print(
-                    f"Failed to fetch product for model_code: {
-                        data['model_code']}. "
-                    f"Status code: {response.status_code}"
+                    f"Failed to update product {data['model_code']}. "
+                    f"Error: {update_response.text}"
                 )
         except Exception as e:
             print(f"An error occurred: {e}")
@@ -129,10 +151,11 @@ def add_category_in_product_category(datas):
 
 def main():
     """Main execution function."""
-    file_url = "/Users/shubhamk/Developer/office_work/century-product-work/add-catlog/csvjson.json"  # Update this path
-    datas = load_json(file_url)
-    if datas:
-        add_category_in_product_category(datas)
+    file_url = sys.argv[1] if len(sys.argv) > 1 else DATA_FILE
+    if not os.path.exists(file_url):
+        print(f"File not found: {file_url}")
+        return
+    add_category_in_product_category(lambda: load_records(file_url))
 
 
 if __name__ == "__main__":
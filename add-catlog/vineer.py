@@ -1,48 +1,36 @@
-import json
+import os
+import sys
 import requests
 
-API_URL = "http://49.205.180.247:3007/api"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from strapi_client import get_client  # noqa: E402
+from strapi_mirror import open_mirror  # noqa: E402
 
+API_URL = "/api"
+VENEER_CATEGORY_ID = "zecun6qorwujm7ojcstf3ox2"
+client = get_client()
+mirror = open_mirror(client)
 
-def fetch_products_with_pagination():
-    """Fetch all products from the API with pagination."""
-    page = 1
-    page_size = 25  # Adjust based on your API's pagination limit
-    all_products = []
 
-    while True:
-        response = requests.get(
-            f"{API_URL}/products",
-            params={
-                # Correct filtering
-                "filters[product_categories][documentId][$in]": "zecun6qorwujm7ojcstf3ox2",
-                "pagination[page]": page,
-                "pagination[pageSize]": page_size,
-                # Ensure we get category details
-                "populate[0]": "product_categories"
-            }
-        )
-        if response.status_code == 200:
-            data = response.json()
-            products = data.get("data", [])
-            all_products.extend(products)
-            total_pages = data.get("meta", {}).get(
-                "pagination", {}).get("pageCount", 1)
+def fetch_veneer_products():
+    """
+    Veneer products with their categories, read from the local mirror.
 
-            if page >= total_pages:  # Stop when last page is reached
-                break
-
-            page += 1
-        else:
-            print(f"Failed to fetch products: {response.text}")
-            break
+    Only the products changed since the last run are fetched from Strapi;
+    if that fails the mirror's current copy is used.
+    """
+    try:
+        mirror.ensure(["products", "product-categories"])
+    except requests.RequestException as e:
+        print(f"Failed to refresh products, using the local mirror: {e}")
 
-    return all_products
+    return mirror.find("products", linked={"product_categories": VENEER_CATEGORY_ID},
+                       populate=("product_categories",))
 
 
 def update_veneer_product_specifications():
     """Update product specifications if they are missing."""
-    products = fetch_products_with_pagination()
+    products = fetch_veneer_products()
     print(f"Fetched {len(products)} products.")
 
     for product in products:
@@ -60,7 +48,7 @@ def update_veneer_product_specifications():
                 ]
             }
         }
-        response = requests.put(
+        response = client.put(
             f"{API_URL}/products/{product_document_id}", json=payload)
         if response.status_code == 200:
             print(f"Updated product {
@@ -0,0 +1,338 @@
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_strapi import FakeStrapi, ServerThread, document_id
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SCALE = 200  # Input rows generated per loader
+TAIL_LINES = 20  # Lines of a failed loader's output shown
+SEO_CATEGORY_ID = "rn2yfgzt2qu2jx6y0ja4xebt"  # Category seo-update.py selects
+# Synthetic geography: state -> cities
+GEOGRAPHY = {
+    "Odisha": ["Bhubaneswar", "Cuttack", "Puri"],
+    "West Bengal": ["Kolkata", "Siliguri"],
+    "Maharashtra": ["Mumbai", "Pune", "Nagpur"],
+    "Karnataka": ["Bangalore", "Hubli"],
+    "Delhi": ["Delhi"],
+    "Goa": [],
+}
+VENEER_CATEGORIES = ["Elite", "Mystique", "Metallic", "Natural"]
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return path
+
+
+def geography_seed(rng):
+    """States and cities collections, plus {state: (documentId, [(city, documentId)])}."""
+    states, cities, index = [], [], {}
+    for state, names in GEOGRAPHY.items():
+        state_id = document_id(rng)
+        states.append({"documentId": state_id, "name": state})
+        index[state] = (state_id, [])
+        for name in names:
+            city_id = document_id(rng)
+            cities.append({"documentId": city_id, "name": name, "state": state_id})
+            index[state][1].append((name, city_id))
+    return {"states": states, "cities": cities}, index
+
+
+# Workloads. Each writes its inputs into workdir and returns
+# (collections to seed, loader script, loader arguments).
+
+def products_workload(workdir, scale, rng):
+    ranges = ["Laminates", "Veneers", "Plywood"]
+    rows = [["Lookbook", ranges[i % 3], f"Collection {i % 12}",
+             "" if i % 4 == 0 else f"Finish {i % 5}", "Y", f"Product {i}",
+             f"BM-{i:05d}", "short description", "long description", "YES",
+             "1.00mm", "", "", "", ""] for i in range(scale)]
+    path = write_csv(os.path.join(workdir, "products.csv"), [
+        "parent_category", "ancaster_category", "child_category", "sub_child_category",
+        "new", "name", "model_code", "short_description", "description",
+        "display_on_eshop", "specs", "attributes", "alias", "created_by_id",
+        "updated_by_id"], rows)
+    return {}, "update.py", ["--file", path]
+
+
+def categories_workload(workdir, scale, rng):
+    parent_id, child_id = document_id(rng), document_id(rng)
+    seed = {
+        "product-categories": [
+            {"documentId": parent_id, "Name": "Lookbook", "level": 1},
+            {"documentId": child_id, "Name": "Stone Veneer", "level": 2,
+             "parent_category": parent_id},
+        ],
+        "products": [{"Name": f"Product {i}", "model_code": f"BM-{i:05d}"}
+                     for i in range(scale)],
+    }
+    rows = [[parent_id, child_id, "Y", f"BM-{i:05d}", "1.00mm", "1220mm", "2440mm"]
+            for i in range(scale)]
+    path = write_csv(os.path.join(workdir, "categories.csv"), [
+        "parent_category", "child_category", "new", "model_code", "thickness",
+        "width", "length"], rows)
+    return seed, "add-catlog/iniiit.py", [path]
+
+
+def dealers_workload(workdir, scale, rng):
+    seed, index = geography_seed(rng)
+    places = [(state, state_id, city, city_id)
+              for state, (state_id, cities) in index.items() for city, city_id in cities]
+    rows = []
+    for i in range(scale):
+        state, state_id, city, city_id = places[i % len(places)]
+        rows.append([60000 + i, 0, f"Dealer {i}", "", f"98{i:08d}", "", 0,
+                     f"{i} Main Road", f"Company {i}", 0, state, state_id, "", 0,
+                     city, city_id, 0, "Ply dealer", f"{rng.uniform(8, 30):.6f}",
+                     f"{rng.uniform(68, 90):.6f}", 0, 1, "NULL", "NULL"])
+    # Same layout as the real export, duplicate and blank headers included
+    path = write_csv(os.path.join(workdir, "dealers.csv"), [
+        "id", "catid", "name", "email", "mobile", "landline", "type", "address",
+        "company", "state", "state_documentid", "state_documentid", "", "city", "",
+        "city_documentid", "parent_id", "dealer_type", "latitude", "longitude",
+        "orderby", "status", "created_at", "updated_at"], rows)
+    return seed, "dealer/dealear-push.py", [
+        "--file", path, "--journal", os.path.join(workdir, "dealers.journal.jsonl")]
+
+
+def cities_workload(workdir, scale, rng):
+    seed, _ = geography_seed(rng)
+    states = list(GEOGRAPHY)
+    # Every name appears twice, so half the rows take the existing-city path
+    rows = [[states[(i // 2) % len(states)], f"Town {i // 2}"] for i in range(scale)]
+    path = write_csv(os.path.join(workdir, "state-city.csv"), ["state", "city"], rows)
+    return seed, "dealer/create-city.py", [
+        "--file", path, "--journal", os.path.join(workdir, "cities.journal.jsonl")]
+
+
+def variants_workload(workdir, scale, rng):
+    seed, _ = geography_seed(rng)
+    # City columns plus a state with no cities, like the real price sheet
+    columns = [city for cities in GEOGRAPHY.values() for city in cities] + ["Goa"]
+    product_ids = [document_id(rng) for _ in range(math.ceil(scale / len(columns)))]
+    seed["products"] = [{"documentId": product_id, "Name": f"Laminate {i}"}
+                        for i, product_id in enumerate(product_ids)]
+    rows = [[product_id] + [rng.randrange(1400, 1700) for _ in columns]
+            for product_id in product_ids]
+    path = write_csv(os.path.join(workdir, "variants.csv"), ["product_id"] + columns, rows)
+    return seed, "produc-variant-update/laminate-variant-upload.py", ["--file", path, "--sync"]
+
+
+def investors_workload(workdir, scale, rng):
+    categories, category_ids = [], []
+    next_id = 1
+    for top in range(max(1, scale // 10)):
+        top_id = next_id
+        categories.append([top_id, f"Investor Section {top}", "", 0, top, top, 1,
+                           "NULL", "NULL"])
+        category_ids.append(top_id)
+        next_id += 1
+        for child in range(3):
+            categories.append([next_id, f"Section {top} Year {2020 + child}", "",
+                               top_id, child, child, 1, "NULL", "NULL"])
+            category_ids.append(next_id)
+            next_id += 1
+    data = [[i + 1, category_ids[i % len(category_ids)], "NULL", f"Report {i}",
+             f"reports\\report-{i}.pdf",
+             f"20{10 + i % 14}-{1 + i % 12:02d}-{1 + i % 28:02d} 00:00:00",
+             i, "NULL", 1, "NULL", "NULL"] for i in range(scale)]
+    categories_path = write_csv(os.path.join(workdir, "investors.csv"), [
+        "id", "name", "icon", "parent_id", "orderby", "order_c", "status",
+        "created_at", "updated_at"], categories)
+    data_path = write_csv(os.path.join(workdir, "investordatas.csv"), [
+        "id", "catid", "subcat", "name", "file", "edate", "order_c", "ndate",
+        "status", "created_at", "updated_at"], data)
+    return {}, "invistor/invistor.py", [
+        "--categories", categories_path, "--data", data_path,
+        "--state", os.path.join(workdir, "investor_state.json"),
+        "--log-file", os.path.join(workdir, "investor_processing.log")]
+
+
+def seo_workload(workdir, scale, rng):
+    children = [document_id(rng) for _ in range(5)]
+    seed = {
+        "product-categories": [{"documentId": SEO_CATEGORY_ID, "Name": "Laminates",
+                                "level": 1}]
+        + [{"documentId": child, "Name": f"Collection {i}", "level": 2,
+            "parent_category": SEO_CATEGORY_ID} for i, child in enumerate(children)],
+        "products": [{"Name": f"Product {i}", "model_code": f"BM-{i:05d}", "seo": None,
+                      "product_categories": [SEO_CATEGORY_ID, children[i % len(children)]]}
+                     for i in range(scale)],
+    }
+    return seed, "product-page/seo-update.py", []
+
+
+def images_workload(workdir, scale, rng):
+    root_id = document_id(rng)
+    seed = {"product-categories": [{"documentId": root_id, "Name": "Veneers", "level": 1}]
+            + [{"Name": name, "level": 2, "parent_category": root_id}
+               for name in VENEER_CATEGORIES]}
+    # One row in five reuses an earlier image, as shared swatches do
+    rows = [[f"Veneer {i}", VENEER_CATEGORIES[i % len(VENEER_CATEGORIES)], f"NV-{i:04d}",
+             f"veneer-{i}", "8ft. x 4ft.",
+             f"NV-{(i - 1 if i % 5 == 4 else i):04d}.jpg"] for i in range(scale)]
+    path = write_csv(os.path.join(workdir, "veneers.csv"), [
+        "name", "category", "model_code", "alias", "specs", "image"], rows)
+    return seed, "vineer/vineer_product_imgage.py", [path]
+
+
+WORKLOADS = {
+    "products": products_workload,
+    "categories": categories_workload,
+    "dealers": dealers_workload,
+    "cities": cities_workload,
+    "variants": variants_workload,
+    "investors": investors_workload,
+    "seo": seo_workload,
+    "images": images_workload,
+}
+
+
+def peak_rss_mb(usage):
+    """ru_maxrss is in kilobytes on Linux and bytes on macOS."""
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return usage.ru_maxrss / divisor
+
+
+def run_loader(script, args, workdir, env):
+    """
+    Run one loader to completion in workdir.
+
+    Returns:
+        tuple: (exit code, wall seconds, peak RSS in MB, output log path)
+    """
+    log_path = os.path.join(workdir, "loader.log")
+    with open(log_path, "w") as log:
+        start = time.monotonic()
+        process = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, script), *args],
+                                   cwd=workdir, env=env, stdout=log,
+                                   stderr=subprocess.STDOUT)
+        # wait4 reaps the child and reports its own resource usage
+        _, status, usage = os.wait4(process.pid, 0)
+        elapsed = time.monotonic() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return process.returncode, elapsed, peak_rss_mb(usage), log_path
+
+
+def run_benchmarks(names, scale, root, server, seed=0):
+    """Run each named workload against a freshly reset server; return result rows."""
+    results = []
+    for name in names:
+        workdir = os.path.join(root, name)
+        os.makedirs(workdir, exist_ok=True)
+        collections, script, args = WORKLOADS[name](workdir, scale, random.Random(seed))
+
+        server.reset()
+        server.seed(collections)
+        server.reset_stats()
+        env = {
+            **os.environ,
+            "STRAPI_URL": server.base_url,
+            "MEDIA_CACHE_PATH": os.path.join(workdir, "media_cache.sqlite3"),
+            "STRAPI_MIRROR_PATH": os.path.join(workdir, "strapi_mirror.sqlite3"),
+            "VENEER_IMAGE_BASE_URL": f"{server.base_url}/files/veneers/",
+            "PYTHONUNBUFFERED": "1",
+        }
+        print(f"Running {name} ({script}, {scale} rows)...", flush=True)
+        code, elapsed, rss, log_path = run_loader(script, args, workdir, env)
+        stats = server.stats()
+
+        if code != 0:
+            with open(log_path, errors="replace") as f:
+                tail = f.readlines()[-TAIL_LINES:]
+            print(f"{name} exited with {code}; last output:\n{''.join(tail)}")
+        results.append({
+            "workload": name,
+            "rows": scale,
+            "exit_code": code,
+            "seconds": round(elapsed, 3),
+            "requests": stats["requests"],
+            "requests_per_second": round(stats["requests"] / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": stats["p50_ms"],
+            "p95_ms": stats["p95_ms"],
+            "errors": sum(count for status, count in stats["statuses"].items()
+                          if int(status) >= 400),
+            "peak_rss_mb": round(rss, 1),
+        })
+    return results
+
+
+def print_results(results, baseline=None):
+    """Print the results table, with req/s change against a baseline run."""
+    baseline = {row["workload"]: row for row in (baseline or [])}
+    print(f"{'workload':<12}{'rows':>7}{'exit':>6}{'seconds':>9}{'requests':>10}"
+          f"{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'errors':>8}{'rss MB':>8}"
+          + (f"{'vs base':>9}" if baseline else ""))
+    for row in results:
+        line = (f"{row['workload']:<12}{row['rows']:>7}{row['exit_code']:>6}"
+                f"{row['seconds']:>9}{row['requests']:>10}{row['requests_per_second']:>9}"
+                f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['errors']:>8}{row['peak_rss_mb']:>8}")
+        base = baseline.get(row["workload"])
+        if base and base["requests_per_second"]:
+            change = row["requests_per_second"] / base["requests_per_second"] - 1
+            line += f"{change:>+9.0%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the loaders against a local fake Strapi.")
+    parser.add_argument("workloads", nargs="*",
+                        help=f"Workloads to run: {', '.join(WORKLOADS)} (default: all)")
+    parser.add_argument("--scale", type=int, default=DEFAULT_SCALE,
+                        help="Input rows generated per workload")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds the fake server adds to every API request")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Latency varies uniformly by up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of API requests failed with a 503")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Random seed for inputs, documentIds, jitter and errors")
+    parser.add_argument("--workdir",
+                        help="Keep generated inputs and loader output here "
+                             "instead of a temporary directory")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare req/s with an earlier --json file")
+    args = parser.parse_args()
+
+    names = args.workloads or list(WORKLOADS)
+    unknown = [name for name in names if name not in WORKLOADS]
+    if unknown:
+        parser.error(f"unknown workload(s): {', '.join(unknown)}")
+    server = ServerThread(FakeStrapi(latency=args.latency, jitter=args.jitter,
+                                     error_rate=args.error_rate, seed=args.seed))
+    try:
+        if args.workdir:
+            os.makedirs(args.workdir, exist_ok=True)
+            results = run_benchmarks(names, args.scale, args.workdir, server, args.seed)
+        else:
+            with tempfile.TemporaryDirectory(prefix="loader-bench-") as root:
+                results = run_benchmarks(names, args.scale, root, server, args.seed)
+    finally:
+        server.stop()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if any(row["exit_code"] for row in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
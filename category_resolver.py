@@ -0,0 +1,296 @@
+import re
+import threading
+
+from strapi_client import UPDATE_WORKERS, get_client, run_concurrently
+
+CATEGORIES_URL = "/api/product-categories"
+PAGE_SIZE = 100
+
+
+def slug(name, parent_name=None):
+    """Generate the category/product slug used across the loaders."""
+    sanitized_name = re.sub(r"[^A-Za-z0-9-_.~]+", "", name.replace(" ", "-"))
+    if parent_name:
+        sanitized_parent = re.sub(
+            r"[^A-Za-z0-9-_.~]+", "", parent_name.replace(" ", "-"))
+        return f"{sanitized_parent}-{sanitized_name}".lower()
+    return sanitized_name.lower()
+
+
+def _name_key(name, parent_id):
+    return (name.strip().lower(), parent_id)
+
+
+class CategoryResolver:
+    """
+    In-memory index of the product-categories collection.
+
+    The whole collection is loaded once with paginated bulk fetches and
+    indexed by slug, by (name, parent documentId) and by parent link, so
+    a category's ancestors are answered without populate queries.
+    Categories created during the run are written back into the index,
+    so each distinct category costs at most one network call. With a
+    StrapiMirror the collection is read from it after a delta refresh.
+    """
+
+    def __init__(self, client=None, page_size=PAGE_SIZE, mirror=None):
+        self.client = client or get_client()
+        self.page_size = page_size
+        self.mirror = mirror
+        self.by_slug = {}
+        self.by_name = {}
+        self.parents = {}  # documentId -> parent documentId or None
+        self.names = {}  # documentId -> Name
+        self.ids_by_name = {}  # lowercased Name -> [documentId] in id order
+        self._ancestors = {}
+        self._hierarchies = {}
+        self.lock = threading.RLock()
+        self.loaded = False
+
+    def load(self):
+        """Fetch every category, in id order, and build the indexes."""
+        if self.mirror is not None:
+            self.mirror.ensure(["product-categories"])
+            rows = self.mirror.find("product-categories", populate=("parent_category",))
+        else:
+            rows = self._fetch()
+        with self.lock:
+            for category in rows:
+                parent = category.get("parent_category") or {}
+                self._index(category.get("Name"), category.get("slug"),
+                            parent.get("documentId"), category["documentId"])
+            self.loaded = True
+        return self
+
+    def _fetch(self):
+        return self.client.iter_collection(
+            CATEGORIES_URL,
+            params={
+                "sort[0]": "id:asc",
+                "fields[0]": "Name",
+                "fields[1]": "slug",
+                "fields[2]": "level",
+                "populate[parent_category][fields][0]": "Name",
+            },
+            page_size=self.page_size,
+        )
+
+    def _index(self, name, category_slug, parent_id, document_id):
+        with self.lock:
+            if category_slug:
+                self.by_slug[category_slug] = document_id
+            self.parents[document_id] = parent_id
+            if name:
+                self.names[document_id] = name
+                self.by_name.setdefault(_name_key(name, parent_id), document_id)
+                self.ids_by_name.setdefault(
+                    name.strip().lower(), []).append(document_id)
+            # A new category can make a name ambiguous
+            self._hierarchies.clear()
+
+    def _ensure_loaded(self):
+        if not self.loaded:
+            with self.lock:
+                if not self.loaded:
+                    self.load()
+
+    def find_by_slug(self, category_slug):
+        self._ensure_loaded()
+        return self.by_slug.get(category_slug)
+
+    def find_by_name(self, name, parent_id=None):
+        self._ensure_loaded()
+        return self.by_name.get(_name_key(name, parent_id))
+
+    def create(self, name, level, parent_id=None, category_slug=None):
+        """
+        Create a category and add it to the index.
+
+        Returns:
+            str: documentId of the new category or None if creation failed
+        """
+        payload = {
+            "data": {
+                "Name": name,
+                "level": level,
+                "show_on_eshop": True,
+                "parent_category": {"connect": [parent_id]} if parent_id else None
+            }
+        }
+        if category_slug:
+            payload["data"]["slug"] = category_slug
+
+        post_response = self.client.post(CATEGORIES_URL, json=payload)
+        if post_response.status_code not in [200, 201]:
+            print(f"Failed to create category {name}: {post_response.text}")
+            return None
+
+        document_id = post_response.json()["data"].get("documentId")
+        self._index(name, category_slug, parent_id, document_id)
+        return document_id
+
+    def create_once(self, name, level, parent_id=None, category_slug=None):
+        """
+        create() unless the category exists, once however many threads ask.
+
+        Concurrent callers for the same slug, or the same (name, parent)
+        without one, share a single lookup-and-create.
+        """
+        if category_slug:
+            key = (CATEGORIES_URL, "slug", category_slug)
+        else:
+            key = (CATEGORIES_URL, "name", *_name_key(name, parent_id))
+
+        def lookup_or_create():
+            # Checked again here: an earlier flight may have just created it
+            existing = (self.find_by_slug(category_slug) if category_slug
+                        else self.find_by_name(name, parent_id))
+            return existing or self.create(name, level, parent_id, category_slug)
+
+        return self.client.coalesce(key, lookup_or_create)
+
+    def get_or_create(self, name, level, parent_id=None, parent_name=None):
+        """Resolve a category by slug, creating it when it does not exist."""
+        category_slug = slug(name, parent_name)
+        document_id = self.find_by_slug(category_slug)
+        if document_id:
+            return document_id
+        return self.create_once(name, level, parent_id, category_slug)
+
+    def ancestors(self, document_id):
+        """
+        The category and its ancestors, nearest first, as documentIds.
+
+        Walks the parent links in memory; results are memoized.
+        """
+        self._ensure_loaded()
+        chain = self._ancestors.get(document_id)
+        if chain is None:
+            chain = []
+            seen = set()
+            current = document_id
+            while current and current not in seen:
+                seen.add(current)
+                chain.append(current)
+                current = self.parents.get(current)
+            self._ancestors[document_id] = chain
+        return list(chain)
+
+    def find_in_tree(self, name, within=None):
+        """
+        Resolve a category name that may exist under several parents.
+
+        Candidates are narrowed to those with an ancestor called within,
+        when given. The deepest candidate wins, then the oldest (lowest
+        id), so the same name always resolves to the same category.
+
+        Returns:
+            str: documentId, or None when no category has that name
+        """
+        self._ensure_loaded()
+        candidates = self.ids_by_name.get((name or "").strip().lower(), [])
+        if within:
+            within = within.strip().lower()
+            narrowed = [
+                candidate for candidate in candidates
+                if any(self.names.get(ancestor, "").strip().lower() == within
+                       for ancestor in self.ancestors(candidate)[1:])]
+            candidates = narrowed or candidates
+        if not candidates:
+            return None
+        # ids_by_name is in id order and max() keeps the first of equals
+        return max(candidates, key=lambda c: len(self.ancestors(c)))
+
+    def hierarchy(self, name, within=None):
+        """
+        documentIds of the category called name and all its ancestors.
+
+        Memoized per name, so repeated rows cost a dict lookup; workers
+        asking for a new name at the same time share one resolution.
+        """
+        key = ((name or "").strip().lower(), within)
+        chain = self._hierarchies.get(key)
+        if chain is None:
+            chain = self.client.coalesce(
+                (CATEGORIES_URL, "hierarchy", *key), self._resolve_hierarchy, key)
+        return list(chain)
+
+    def _resolve_hierarchy(self, key):
+        chain = self._hierarchies.get(key)
+        if chain is None:
+            name, within = key
+            document_id = self.find_in_tree(name, within)
+            chain = self.ancestors(document_id) if document_id else []
+            self._hierarchies[key] = chain
+        return chain
+
+    def get_or_create_by_name(self, name, level, parent_id=None):
+        """Resolve a category by (name, parent), creating it when missing."""
+        document_id = self.find_by_name(name, parent_id)
+        if document_id:
+            return document_id
+        return self.create_once(name, level, parent_id)
+
+    def ensure_paths(self, paths, max_workers=UPDATE_WORKERS):
+        """
+        Create every missing category on the given paths, level by level.
+
+        Each path is a sequence of (name, slug) pairs from level 1 down and
+        stops at the first empty name. A node with a slug is matched like
+        get_or_create(), one without like get_or_create_by_name(). The
+        distinct missing categories of a level are created concurrently,
+        and a level starts only once the one above it exists, so every
+        parent can be connected. Later get_or_create calls for these
+        paths are then answered from the index.
+
+        Returns:
+            dict: counts of existing, created and failed categories
+        """
+        self._ensure_loaded()
+        levels = []  # depth -> {node key: (name, slug, parent node key)}
+        for path in paths:
+            parent_key = None
+            for depth, (name, category_slug) in enumerate(path):
+                if not name:
+                    break
+                key = (parent_key, name.strip().lower(), category_slug)
+                if depth == len(levels):
+                    levels.append({})
+                levels[depth].setdefault(key, (name, category_slug, parent_key))
+                parent_key = key
+
+        counts = {"existing": 0, "created": 0, "failed": 0}
+        resolved = {}  # node key -> documentId, None when it could not be created
+        for depth, nodes in enumerate(levels):
+            missing = {}  # identity -> (name, parent documentId, slug, node keys)
+            for key, (name, category_slug, parent_key) in nodes.items():
+                parent_id = resolved.get(parent_key)
+                if parent_key is not None and parent_id is None:
+                    resolved[key] = None
+                    counts["failed"] += 1
+                    continue
+                if category_slug:
+                    document_id = self.find_by_slug(category_slug)
+                    identity = category_slug
+                else:
+                    document_id = self.find_by_name(name, parent_id)
+                    identity = _name_key(name, parent_id)
+                if document_id:
+                    resolved[key] = document_id
+                    counts["existing"] += 1
+                else:
+                    missing.setdefault(identity, (name, parent_id, category_slug, []))[3].append(key)
+
+            def create(job):
+                name, parent_id, category_slug, keys = job
+                try:
+                    return keys, self.create_once(name, depth + 1, parent_id, category_slug)
+                except Exception as e:
+                    print(f"Failed to create category {name}: {e}")
+                    return keys, None
+
+            for keys, document_id in run_concurrently(create, missing.values(), max_workers):
+                counts["created" if document_id else "failed"] += 1
+                for key in keys:
+                    resolved[key] = document_id
+        return counts
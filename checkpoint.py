@@ -0,0 +1,95 @@
+import json
+import os
+import threading
+import time
+
+FSYNC_EVERY = 50  # Records written between fsyncs
+FSYNC_INTERVAL = 1.0  # Seconds; fsync at least this often while writing
+
+
+class Journal:
+    """
+    Append-only JSONL journal of source records already sent to Strapi.
+
+    Each line holds a source record key (e.g. a dealer id, or
+    "product_id:city") and the documentId Strapi returned. Opening with
+    resume=True loads every journaled key into a dict so a restarted
+    loader can skip finished rows in O(1). Without resume a journal that
+    already has records is refused rather than overwritten, since it is
+    what protects a re-run from sending rows twice. Writes are fsynced in
+    batches, so a crash loses at most the last batch; a torn final line
+    is cut off on resume so the next record starts on a line of its own.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path, resume=False, fsync_every=FSYNC_EVERY,
+                 fsync_interval=FSYNC_INTERVAL):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.done = {}
+        self.lock = threading.Lock()
+
+        if os.path.exists(path) and os.path.getsize(path):
+            if not resume:
+                raise FileExistsError(
+                    f"Journal {path} has records from an earlier run; resume it "
+                    f"(--resume) or remove the file to start over")
+            self._load()
+
+        self.file = open(path, "a")
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def _load(self):
+        with open(self.path, "rb+") as f:
+            complete = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Partially written line from a crash
+                complete += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self.done[entry["key"]] = entry.get("documentId")
+            f.truncate(complete)
+
+    def __contains__(self, key):
+        return str(key) in self.done
+
+    def __len__(self):
+        return len(self.done)
+
+    def get(self, key):
+        return self.done.get(str(key))
+
+    def record(self, key, document_id=None):
+        """Journal a finished record, fsyncing once a batch is full."""
+        key = str(key)
+        with self.lock:
+            self.done[key] = document_id
+            self.file.write(json.dumps(
+                {"key": key, "documentId": document_id}) + "\n")
+            self.pending += 1
+            if (self.pending >= self.fsync_every
+                    or time.monotonic() - self.last_sync >= self.fsync_interval):
+                self._sync()
+
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self._sync()
+                self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
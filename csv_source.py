@@ -0,0 +1,136 @@
+import csv
+import json
+
+# Spreadsheet and database exports use these for "no value"
+MISSING = frozenset({"", "#N/A", "N/A", "NULL", "null", "#VALUE!", "#REF!"})
+
+
+def is_missing(value):
+    return value is None or (isinstance(value, str) and value.strip() in MISSING)
+
+
+def to_str(value):
+    """Stripped text; missing markers become ""."""
+    if is_missing(value):
+        return ""
+    return str(value).strip()
+
+
+def to_int(value):
+    """Integer from text such as "1,234" or "30.0"; missing markers become None."""
+    if is_missing(value):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = value.strip().replace(",", "")
+    try:
+        return int(text)
+    except ValueError:
+        return int(float(text))
+
+
+def to_float(value):
+    """Float from text such as "1,234.5"; missing markers become None."""
+    if is_missing(value):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(value.strip().replace(",", ""))
+
+
+class Column:
+    """
+    Where an output field comes from and how to coerce it.
+
+    Args:
+        source: header name, or a 0-based position for exports with
+            duplicate or blank headers
+        coerce: function applied to the raw cell text
+        default: used when the cell is missing or the header is absent
+        required: raise if the header is absent instead of using default
+    """
+
+    def __init__(self, source, coerce=to_str, default=None, required=False):
+        self.source = source
+        self.coerce = coerce
+        self.default = default
+        self.required = required
+
+    def index(self, header):
+        if isinstance(self.source, int):
+            return self.source if self.source < len(header) else None
+        try:
+            return header.index(self.source)
+        except ValueError:
+            return None
+
+
+def _plan(header, columns, rest, rename):
+    """Resolve a column mapping against a header row to (name, index, column)."""
+    header = [name.strip() for name in header]
+    plan = []
+    for name, column in (columns or {}).items():
+        if not isinstance(column, Column):
+            column = Column(column)
+        index = column.index(header)
+        if index is None and column.required:
+            raise ValueError(f"Column {column.source!r} not found in CSV header")
+        plan.append((name, index, column))
+
+    if rest is not None:
+        mapped = {index for _, index, _ in plan}
+        for index, source in enumerate(header):
+            if index in mapped or not source:
+                continue
+            plan.append(((rename or {}).get(source, source), index, Column(index, rest)))
+    return plan
+
+
+def read_csv(path, columns=None, rest=None, rename=None, encoding="utf-8-sig"):
+    """
+    Stream records from a CSV file, one row at a time.
+
+    With no mapping every named column is yielded as stripped text.
+    Otherwise columns maps output field -> header name or Column, and
+    rest (a coerce function) keeps the unmapped columns too, renamed
+    through rename. Blank rows are skipped.
+
+    Yields:
+        dict: one record per data row
+    """
+    if columns is None and rest is None:
+        rest = to_str
+
+    with open(path, newline="", encoding=encoding) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        plan = _plan(header, columns, rest, rename)
+
+        for line, row in enumerate(reader, start=2):
+            if not any(cell.strip() for cell in row):
+                continue
+            record = {}
+            for name, index, column in plan:
+                if index is None or index >= len(row):
+                    record[name] = column.default
+                    continue
+                try:
+                    value = column.coerce(row[index])
+                except ValueError as e:
+                    raise ValueError(f"{path}:{line}: column {name!r}: {e}") from None
+                record[name] = column.default if value is None else value
+            yield record
+
+
+def load_records(path, columns=None, rest=None, rename=None):
+    """
+    Records from a .csv file (streamed) or a csvjson-style .json array.
+
+    JSON files are already typed, so the mapping only applies to CSV.
+    """
+    if path.lower().endswith(".csv"):
+        return read_csv(path, columns, rest, rename)
+    with open(path, "r") as f:
+        return iter(json.load(f))
@@ -1,12 +1,22 @@
-import json
+import argparse
 import requests
 import os
+import sys
 import csv
 from datetime import datetime
 
-API_URL = "http://49.205.180.247:3007"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from checkpoint import Journal  # noqa: E402
+from csv_source import load_records  # noqa: E402
+from geography import GeographyResolver, add_geography_arguments  # noqa: E402
+from strapi_client import UPDATE_WORKERS, get_client, run_concurrently  # noqa: E402
+
+client = get_client()
+RELATIONS_FILE = os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "state-city.csv")
+JOURNAL_FILE = os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "create_city.journal.jsonl")
 CITY_URL = "/api/cities"
-STATE_URL = "/api/states"
 
 
 def create_csv(city_data_list, output_dir="exports"):
@@ -30,62 +40,72 @@ def create_csv(city_data_list, output_dir="exports"):
     return filename
 
 
-def strapi_post(states_city_relations):
+def create_city(name, state_documentid):
+    """POST a city in a state and return its documentId."""
+    city_data = {
+        "data": {
+            "name": name,
+            "state": {
+                "connect": [state_documentid]
+            }
+        }
+    }
+
+    response = client.post(
+        CITY_URL,
+        json=city_data,
+        timeout=10
+    )
+    response.raise_for_status()
+    return response.json().get("data", {}).get("documentId")
+
+
+def strapi_post(states_city_relations, journal=None, geography=None,
+                max_workers=UPDATE_WORKERS):
+    """
+    Create the cities of the relations that do not exist yet.
+
+    Rows are processed concurrently; rows repeating a city share a single
+    create, so duplicates in the sheet never create duplicate cities.
+    """
     city_data_list = []  # List to store city names and document IDs
+    geography = geography or GeographyResolver(client)
+
+    def process(relation):
+        try:
+            state_name = relation["state"]
+            key = f"{state_name}:{relation['city']}"
+            if journal is not None and key in journal:
+                # Created by an earlier run, keep it in the export
+                return [relation['city'], journal.get(key)]
+
+            # Check if state exists
+            state_documentid = geography.state(state_name)
+            if not state_documentid:
+                print(f"State {state_name} not found")
+                return None
+
+            city_documentid, created = geography.get_or_create_city(
+                relation["city"], state_documentid, create_city)
+            if not created:
+                print(f"City {relation['city']} already exists.")
+                return [relation['city'], city_documentid]
+
+            print(f"City {relation['city']} created successfully.")
+            if journal is not None:
+                journal.record(key, city_documentid)
+            return [relation['city'], city_documentid] if city_documentid else None
+
+        except requests.RequestException as e:
+            print(f"Error processing {relation}: {e}")
+        except KeyError as e:
+            print(f"Missing required field in data: {e}")
+        return None
 
     try:
-        for relation in states_city_relations:
-            try:
-                state_name = relation["state"]
-                response_search = requests.get(
-                    f"{API_URL}{STATE_URL}?filters[name][$eq]={state_name}")
-                response_search.raise_for_status()
-                search_data = response_search.json()
-
-                # Check if state exists
-                if not search_data.get("data"):
-                    print(f"State {state_name} not found")
-                    continue
-
-                state_documentid = search_data["data"][0]["documentId"]
-
-                # Create city
-                city_data = {
-                    "data": {
-                        "name": relation["city"],
-                        "state": {
-                            "connect": [state_documentid]
-                        }
-                    }
-                }
-
-                response = requests.post(
-                    f"{API_URL}{CITY_URL}",
-                    json=city_data,
-                    timeout=10
-                )
-                response.raise_for_status()
-
-                if response.status_code in [200, 201]:
-                    print(f"City {relation['city']} created successfully.")
-                    # Extract the document ID from the response
-                    city_response_data = response.json()
-                    if city_response_data.get("data", {}).get("documentId"):
-                        city_data_list.append([
-                            relation['city'],
-                            city_response_data["data"]["documentId"]
-                        ])
-                else:
-                    print(f"Failed to create city {
-                          relation['city']}. Status code: {response.status_code}")
-                    print(response.text)
-
-            except requests.RequestException as e:
-                print(f"Error processing {relation}: {e}")
-                continue
-            except KeyError as e:
-                print(f"Missing required field in data: {e}")
-                continue
+        for row in run_concurrently(process, states_city_relations, max_workers):
+            if row is not None:
+                city_data_list.append(row)
 
         # Create CSV file if we have data
         if city_data_list:
@@ -99,13 +119,26 @@ def strapi_post(states_city_relations):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Create cities in Strapi.")
+    parser.add_argument("--file", default=RELATIONS_FILE,
+                        help="State/city CSV, or the relation JSON file")
+    parser.add_argument("--journal", default=JOURNAL_FILE,
+                        help="Checkpoint journal of created cities")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip cities already recorded in the journal")
+    parser.add_argument("--workers", type=int, default=UPDATE_WORKERS,
+                        help="Rows processed at once")
+    add_geography_arguments(parser)
+    args = parser.parse_args()
+
     try:
-        state_relation = "/Users/shubhamk/Developer/office_work/century-product-work/dealer/state-city-relation.json"
+        states_city_relation = load_records(args.file)
 
-        with open(state_relation, "r") as f:
-            states_city_relation = json.load(f)
+        # Every state and city is fetched once instead of a GET per row
+        geography = GeographyResolver.from_args(args, client).load()
 
-        strapi_post(states_city_relation)
+        with Journal(args.journal, resume=args.resume) as journal:
+            strapi_post(states_city_relation, journal, geography, max(1, args.workers))
 
     except Exception as e:
         print(f"Error loading files: {e}")
@@ -1,12 +1,54 @@
+import argparse
+import asyncio
 import json
-import requests
+import os
+import random
+import sys
+import httpx
 import logging
-from typing import Dict, List, Optional
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from checkpoint import Journal  # noqa: E402
+from csv_source import Column, load_records, to_int  # noqa: E402
+from geography import GeographyResolver, add_geography_arguments  # noqa: E402
+from strapi_client import async_client, get_client  # noqa: E402
+
 # Constants
-API_URL = "http://49.205.180.247:3007"
 DEALER_URL = "/api/dealers"
+DEALERS_FILE = os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "dealer - dealerPushOnServer.csv")
+CONCURRENCY = 16  # Dealer POSTs in flight at once
+MAX_RETRIES = 4  # Attempts per dealer for connect failures, 429 and 503
+RETRY_BASE_DELAY = 1.0  # Seconds; backoff ceiling doubles per attempt
+# A dealer POST is not idempotent: it is only retried when the request
+# never reached Strapi, or Strapi said it did not process it
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+RETRY_STATUSES = (429, 503)
+JOURNAL_FILE = os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "dealer_upload.journal.jsonl")
+
+# The export repeats "state_documentid" and has blank headers, so the
+# state name/documentId and city name are taken by position
+DEALER_COLUMNS = {
+    "id": Column("id", to_int),
+    "name": "name",
+    "email": "email",
+    "mobile": "mobile",
+    "landline": "landline",
+    "address": "address",
+    "company": "company",
+    "state_name": Column(10),
+    "stateDocumentid": Column(11),
+    "city_name": Column(14),
+    "city_documentid": "city_documentid",
+    "dealer_type": "dealer_type",
+    "latitude": "latitude",
+    "longitude": "longitude",
+    "status": Column("status", to_int),
+}
 
 # Configure logging
 logging.basicConfig(
@@ -19,6 +61,8 @@ logging.basicConfig(
     ]
 )
 logger = logging.getLogger(__name__)
+# httpx logs every request at INFO, which would double the upload log
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
 
 def validate_dealer_data(dealer: Dict) -> List[str]:
@@ -41,6 +85,24 @@ def convert_to_string(value) -> str:
     return ""
 
 
+def with_locations(dealers: Iterable[Dict],
+                   geography: GeographyResolver) -> Iterator[Dict]:
+    """
+    Resolve each dealer's state and city documentIds by name.
+
+    The ids copied into the sheet go stale when cities are recreated, so
+    they are only used when the name is not found in Strapi.
+    """
+    for dealer in dealers:
+        state_id = geography.state(dealer.get("state_name"))
+        if state_id:
+            dealer["stateDocumentid"] = state_id
+        city = geography.city(dealer.get("city_name"), state_id)
+        if city:
+            dealer["city_documentid"] = city[0]
+        yield dealer
+
+
 def prepare_payload(dealer: Dict) -> Dict:
     """
     Prepare the API payload from dealer data with proper type conversions.
@@ -66,69 +128,151 @@ def prepare_payload(dealer: Dict) -> Dict:
     }
 
 
-def post_dealers_data(dealers: List[Dict]) -> Dict[str, int]:
+async def post_dealer(http: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                      dealer: Dict, stats: Dict[str, int],
+                      journal: Optional[Journal] = None) -> None:
     """
-    Post dealers data to the API and return statistics.
+    Post one dealer, retrying transient failures with jittered backoff.
+
+    Only failures where Strapi cannot have created the dealer are retried.
+    A read timeout or dropped response may come after the dealer was
+    stored, so those rows fail without a retry and should be checked
+    against Strapi before they are sent again.
+
+    stats is only touched between awaits on the event loop thread, so the
+    counters stay exact without a lock.
+    """
+    name = dealer.get('name', 'Unknown')
+    try:
+        # Validate dealer data
+        validation_errors = validate_dealer_data(dealer)
+        if validation_errors:
+            logger.warning(f"Skipping dealer {name}: {validation_errors}")
+            stats["skipped"] += 1
+            return
+
+        payload = prepare_payload(dealer)
+
+        # Determine the API endpoint based on status
+        url = DEALER_URL
+        if dealer.get("status") == 2:
+            url += "?status=draft"
+
+        async with semaphore:
+            for attempt in range(1, MAX_RETRIES + 1):
+                try:
+                    response = await http.post(url, json=payload)
+                except RETRY_ERRORS as e:
+                    error = f"{type(e).__name__}: {e}"
+                except httpx.TransportError as e:
+                    error = (f"{type(e).__name__}: {e} (the dealer may have been "
+                             f"created, check before re-sending)")
+                    break
+                else:
+                    if response.status_code in [200, 201]:
+                        logger.info(f"Successfully uploaded dealer: {name}")
+                        stats["success"] += 1
+                        if journal is not None:
+                            journal.record(dealer.get("id"), response.json().get(
+                                "data", {}).get("documentId"))
+                        return
+                    error = f"{response.status_code} - {response.text}"
+                    if response.status_code not in RETRY_STATUSES:
+                        break  # Not transient, or possibly processed
+
+                if attempt < MAX_RETRIES:
+                    # Full jitter keeps retries from arriving in lockstep
+                    await asyncio.sleep(random.uniform(
+                        0, RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+
+        logger.error(f"API error for dealer {name}: {error}")
+        stats["failed"] += 1
+
+    except Exception as e:
+        logger.error(f"Unexpected error processing dealer {name}: {str(e)}")
+        stats["failed"] += 1
+
+
+async def post_dealers_data_async(dealers: Iterable[Dict],
+                                  concurrency: int = CONCURRENCY,
+                                  journal: Optional[Journal] = None) -> Dict[str, int]:
+    """
+    Post dealers data to the API concurrently and return statistics.
+
+    dealers is consumed lazily by a fixed set of worker tasks, so only the
+    rows in flight are held in memory. Dealers whose id is already in the
+    journal are counted as resumed and not sent again; successful uploads
+    are added to it.
     """
-    stats = {"total": len(dealers), "success": 0, "failed": 0, "skipped": 0}
-
-    for dealer in dealers[0:50]:
-        try:
-            # Validate dealer data
-            validation_errors = validate_dealer_data(dealer)
-            if validation_errors:
-                logger.warning(f"Skipping dealer {dealer.get(
-                    'name', 'Unknown')}: {validation_errors}")
-                stats["skipped"] += 1
+    stats = {"total": 0, "success": 0, "failed": 0, "skipped": 0, "resumed": 0}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    def remaining():
+        for dealer in dealers:
+            stats["total"] += 1
+            if journal is not None and dealer.get("id") in journal:
+                stats["resumed"] += 1
                 continue
+            yield dealer
 
-            payload = prepare_payload(dealer)
-            print("prepare_payload", prepare_payload)
-
-            # Determine the API endpoint based on status
-            url = f"{API_URL}{DEALER_URL}"
-            if dealer.get("status") == 2:
-                url += "?status=draft"
-
-            # Make the API request
-            response = requests.post(url, json=payload, timeout=30)
-
-            if response.status_code in [200, 201]:
-                logger.info(f"Successfully uploaded dealer: {dealer['name']}")
-                stats["success"] += 1
-            else:
-                logger.error(f"API error for dealer {dealer.get('name', 'Unknown')}: {
-                             response.status_code} - {response.text}")
-                stats["failed"] += 1
-
-        except requests.exceptions.RequestException as e:
-            logger.error(f"API error for dealer {
-                         dealer.get('name', 'Unknown')}: {str(e)}")
-            if hasattr(e, 'response') and e.response is not None:
-                logger.error(f"API Response: {e.response.text}")
-            stats["failed"] += 1
-        except Exception as e:
-            logger.error(f"Unexpected error processing dealer {
-                         dealer.get('name', 'Unknown')}: {str(e)}")
-            stats["failed"] += 1
+    # Workers share one iterator; next() only runs between awaits
+    pending = remaining()
+
+    async with async_client(max_connections=concurrency) as http:
+        async def worker():
+            for dealer in pending:
+                await post_dealer(http, semaphore, dealer, stats, journal)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
 
     return stats
 
 
+def post_dealers_data(dealers: Iterable[Dict], concurrency: int = CONCURRENCY,
+                      journal: Optional[Journal] = None) -> Dict[str, int]:
+    """
+    Post dealers data to the API and return statistics.
+    """
+    return asyncio.run(post_dealers_data_async(dealers, concurrency, journal))
+
+
 def main():
     """Main execution function."""
+    parser = argparse.ArgumentParser(description="Upload dealers to Strapi.")
+    parser.add_argument("--file", default=DEALERS_FILE,
+                        help="Dealer CSV export, or a csvjson JSON file")
+    parser.add_argument("--offset", type=int, default=0,
+                        help="Skip this many dealers from the start of the file")
+    parser.add_argument("--limit", type=int,
+                        help="Upload at most this many dealers")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help="Dealer POSTs in flight at once")
+    parser.add_argument("--journal", default=JOURNAL_FILE,
+                        help="Checkpoint journal of uploaded dealer ids")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip dealers already recorded in the journal")
+    add_geography_arguments(parser)
+    args = parser.parse_args()
+
     try:
         logger.info("Starting dealer data upload process")
 
-        # Load dealer data
-        file_path = '/Users/shubhamk/Developer/office_work/century-product-work/dealer/dealer-to-push.json'
-        with open(file_path, "r") as f:
-            dealers = json.load(f)
+        # States and cities are loaded once, before the event loop starts
+        geography = GeographyResolver.from_args(args, get_client()).load()
 
-        logger.info(f"Loaded {len(dealers)} dealers from file")
+        # Dealers are streamed from the file as the workers need them
+        end = args.offset + args.limit if args.limit is not None else None
+        dealers = with_locations(islice(
+            load_records(args.file, DEALER_COLUMNS), args.offset, end), geography)
+        logger.info(f"Uploading dealers from {args.file} "
+                    f"(offset {args.offset}, concurrency {args.concurrency})")
 
         # Process dealers
-        stats = post_dealers_data(dealers)
+        with Journal(args.journal, resume=args.resume) as journal:
+            if args.resume:
+                logger.info(f"Resuming with {len(journal)} journaled dealers")
+            stats = post_dealers_data(
+                dealers, max(1, args.concurrency), journal)
 
         # Log final statistics
         logger.info("Upload process completed")
@@ -136,6 +280,7 @@ def main():
         logger.info(f"Successfully uploaded: {stats['success']}")
         logger.info(f"Failed to upload: {stats['failed']}")
         logger.info(f"Skipped due to validation: {stats['skipped']}")
+        logger.info(f"Already uploaded (resumed): {stats['resumed']}")
 
     except json.JSONDecodeError as e:
         logger.error(f"Error parsing JSON file: {str(e)}")
@@ -0,0 +1,844 @@
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import mimetypes
+import random
+import re
+import string
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 1337
+DEFAULT_PAGE_SIZE = 25  # Strapi's defaultLimit for pagination[pageSize]
+MAX_PAGE_SIZE = 100  # Strapi's maxLimit
+FILE_SIZE = 64 * 1024  # Bytes served for every synthetic /files/ download
+READ_LIMIT = 1024 * 1024  # Longest request line or header accepted
+ERROR_STATUS = 503
+
+# Relation fields of the content types the loaders write:
+# field -> (collection it points to, whether it holds several entries)
+RELATIONS = {
+    "parent_category": ("product-categories", False),
+    "product_categories": ("product-categories", True),
+    "products": ("products", True),
+    "product_variants": ("product-variants", True),
+    "product": ("products", False),
+    "state": ("states", False),
+    "cities": ("cities", True),
+    "city": ("cities", False),
+    "Multiple_Image": ("files", True),
+}
+# Upload "ref" values whose plural is not just name + "s"
+REF_COLLECTIONS = {
+    "api::product-category.product-category": "product-categories",
+    "api::city.city": "cities",
+}
+OPERATORS = frozenset({
+    "$eq", "$eqi", "$ne", "$nei", "$in", "$notIn", "$lt", "$lte", "$gt", "$gte",
+    "$null", "$notNull", "$contains", "$containsi", "$notContains",
+    "$startsWith", "$endsWith",
+})
+REASONS = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request",
+           404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error",
+           503: "Service Unavailable"}
+
+
+def document_id(rng=random):
+    """A 24-character documentId in Strapi's lowercase alphanumeric style."""
+    return "".join(rng.choices(string.ascii_lowercase + string.digits, k=24))
+
+
+def timestamp():
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def make_pdf(title, pages=3):
+    """
+    A small valid PDF with uncompressed text pages and an info dictionary.
+
+    Investor document downloads are served as this, so PDF handling can
+    be exercised without real files.
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        (f"<< /Title ({title}) /Producer (fake_strapi) "
+         f"/Creator (fake_strapi) /CreationDate (D:20240101000000Z) >>").encode(),
+    ]
+    kids = []
+    for page in range(pages):
+        lines = [f"BT /F1 12 Tf 72 {720 - 14 * i} Td ({title} page {page + 1} "
+                 f"line {i + 1}) Tj ET" for i in range(40)]
+        stream = "\n".join(lines).encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content = len(objects)
+        objects.append((f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                        f"/Resources << /Font << /F1 3 0 R >> >> "
+                        f"/Contents {content} 0 R >>").encode())
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += (b"trailer\n<< /Size %d /Root 1 0 R /Info 4 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(objects) + 1, xref))
+    return bytes(out)
+
+
+def _truthy(value):
+    return str(value).lower() in ("true", "1")
+
+
+def _values(node):
+    """A bracketed list (a[0]=x&a[1]=y), a comma list or a single value as a list."""
+    if node is None:
+        return []
+    if isinstance(node, dict):
+        if all(key.isdigit() for key in node):
+            return [node[key] for key in sorted(node, key=int)]
+        return [node]
+    if isinstance(node, list):
+        return node
+    if isinstance(node, str):
+        return [part for part in node.split(",") if part]
+    return [node]
+
+
+def parse_query(query):
+    """Nest Strapi's bracketed query keys: filters[a][$eq]=1 -> {"filters": {"a": {"$eq": "1"}}}."""
+    params = {}
+    for key, value in parse_qsl(query, keep_blank_values=True):
+        parts = re.findall(r"[^\[\]]+", key)
+        if not parts:
+            continue
+        node = params
+        for part in parts[:-1]:
+            child = node.get(part)
+            if not isinstance(child, dict):
+                child = node[part] = {}
+            node = child
+        node[parts[-1]] = value
+    return params
+
+
+def parse_multipart(body, content_type):
+    """Split a multipart/form-data body into (fields, [(name, filename, type, bytes)])."""
+    match = re.search(r'boundary="?([^";]+)"?', content_type)
+    if not match:
+        raise ValueError("multipart body without a boundary")
+    delimiter = b"--" + match.group(1).encode()
+    fields, files = {}, []
+    for part in body.split(delimiter)[1:]:
+        if part.startswith(b"--"):
+            break
+        head, _, data = part.lstrip(b"\r\n").partition(b"\r\n\r\n")
+        if data.endswith(b"\r\n"):
+            data = data[:-2]
+        headers = {}
+        for line in head.decode("utf-8", "replace").split("\r\n"):
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        disposition = headers.get("content-disposition", "")
+        name = re.search(r'(?:^|;)\s*name="([^"]*)"', disposition)
+        filename = re.search(r'filename="([^"]*)"', disposition)
+        if filename:
+            files.append((name.group(1) if name else "files", filename.group(1),
+                          headers.get("content-type", "application/octet-stream"), data))
+        elif name:
+            fields[name.group(1)] = data.decode("utf-8", "replace")
+    return fields, files
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, name=None):
+        super().__init__(message)
+        self.status = status
+        self.name = name or ("NotFoundError" if status == 404 else "ValidationError")
+
+
+class Entry:
+    """One document: plain attributes plus relation links by documentId."""
+
+    __slots__ = ("attrs", "links")
+
+    def __init__(self, attrs):
+        self.attrs = attrs
+        self.links = {}
+
+
+class Store:
+    """
+    In-memory Strapi v5 content: collections of documents keyed by documentId.
+
+    Drafts and published versions are the same entry, so status=draft
+    reads return the document that was written. Relations are stored as
+    documentIds and resolved on populate; fields in RELATIONS, media
+    fields that receive uploads and any field written with connect/set
+    are treated as relations.
+    """
+
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+        self.reset()
+
+    def reset(self):
+        self.collections = defaultdict(dict)  # collection -> documentId -> Entry
+        self.by_id = defaultdict(dict)  # collection -> id -> documentId
+        self.schema = defaultdict(dict)  # collection -> field -> (target, many)
+        self.ids = defaultdict(lambda: itertools.count(1))
+        self.component_ids = itertools.count(1)
+
+    def relation(self, collection, field):
+        return self.schema[collection].get(field) or RELATIONS.get(field)
+
+    def _resolve(self, target, ref):
+        """documentId of a relation given as documentId, numeric id or {documentId|id}."""
+        if isinstance(ref, dict):
+            ref = ref.get("documentId", ref.get("id"))
+        if ref is None:
+            return None
+        if isinstance(ref, int) or (isinstance(ref, str) and ref.isdigit()):
+            found = self.by_id[target].get(int(ref))
+        else:
+            found = ref if ref in self.collections[target] else None
+        if found is None:
+            raise HTTPError(400, f"1 relation(s) of type {target} associated with "
+                                 f"this entity do not exist")
+        return found
+
+    def _link(self, collection, entry, field, value):
+        target, many = self.relation(collection, field)
+        self.schema[collection][field] = (target, many)
+        current = list(entry.links.get(field, []))
+        if isinstance(value, dict) and {"connect", "disconnect", "set"} & value.keys():
+            if "set" in value:
+                current = []
+                value = {**value, "connect": value["set"]}
+            for ref in _values(value.get("disconnect")):
+                gone = self._resolve(target, ref)
+                current = [doc for doc in current if doc != gone]
+            for ref in _values(value.get("connect")):
+                if ref is None:
+                    continue
+                doc = self._resolve(target, ref)
+                if doc in current:
+                    current.remove(doc)
+                position = ref.get("position") if isinstance(ref, dict) else None
+                if not many:
+                    current = [doc]
+                elif position and position.get("start"):
+                    current.insert(0, doc)
+                elif position and (position.get("before") or position.get("after")) in current:
+                    anchor = current.index(position.get("before") or position.get("after"))
+                    current.insert(anchor if position.get("before") else anchor + 1, doc)
+                else:
+                    current.append(doc)
+        else:
+            current = [self._resolve(target, ref) for ref in _values(value)
+                       if ref is not None]
+            if not many:
+                current = current[-1:]
+        entry.links[field] = current
+
+    def _component(self, value):
+        """Give component entries ids, as Strapi does when they are stored."""
+        if isinstance(value, list):
+            return [self._component(item) for item in value]
+        if isinstance(value, dict):
+            value = {key: self._component(item) for key, item in value.items()}
+            value.setdefault("id", next(self.component_ids))
+        return value
+
+    def _write(self, collection, entry, data):
+        for field, value in data.items():
+            if field in ("id", "documentId", "createdAt", "updatedAt", "publishedAt"):
+                continue
+            if (self.relation(collection, field) is None and isinstance(value, dict)
+                    and {"connect", "disconnect", "set"} & value.keys()):
+                # Unknown relation; remember it so later reads treat it as one
+                self.schema[collection][field] = (field, True)
+            if self.relation(collection, field) is not None:
+                self._link(collection, entry, field, value)
+            else:
+                entry.attrs[field] = self._component(value)
+        entry.attrs["updatedAt"] = timestamp()
+
+    def create(self, collection, data, document=None):
+        now = timestamp()
+        entry_id = next(self.ids[collection])
+        doc = document or document_id(self.rng)
+        entry = Entry({"id": entry_id, "documentId": doc, "createdAt": now,
+                       "updatedAt": now, "publishedAt": now})
+        self._write(collection, entry, data)
+        self.collections[collection][doc] = entry
+        self.by_id[collection][entry_id] = doc
+        return entry
+
+    def get(self, collection, doc):
+        entry = self.collections[collection].get(doc)
+        if entry is None:
+            raise HTTPError(404, "Not Found")
+        return entry
+
+    def update(self, collection, doc, data):
+        entry = self.get(collection, doc)
+        self._write(collection, entry, data)
+        return entry
+
+    def delete(self, collection, doc):
+        entry = self.collections[collection].pop(doc, None)
+        if entry is None:
+            raise HTTPError(404, "Not Found")
+        self.by_id[collection].pop(entry.attrs["id"], None)
+
+    def seed(self, collection, rows):
+        """Insert documents, keeping any documentId they carry; relations by documentId."""
+        for row in rows:
+            self.create(collection, row, row.get("documentId"))
+        return len(rows)
+
+    def related(self, collection, entry, field):
+        target, _ = self.relation(collection, field)
+        docs = self.collections[target]
+        return target, [docs[doc] for doc in entry.links.get(field, []) if doc in docs]
+
+    # Filters
+
+    def matches(self, collection, entry, conditions):
+        if not isinstance(conditions, dict):
+            return True
+        for key, condition in conditions.items():
+            if key == "$and":
+                ok = all(self.matches(collection, entry, c) for c in _values(condition))
+            elif key == "$or":
+                ok = any(self.matches(collection, entry, c) for c in _values(condition))
+            elif key == "$not":
+                ok = not self.matches(collection, entry, condition)
+            elif self.relation(collection, key) is not None:
+                ok = self._match_relation(collection, entry, key, condition)
+            else:
+                ok = _match_value(entry.attrs.get(key), condition)
+            if not ok:
+                return False
+        return True
+
+    def _match_relation(self, collection, entry, field, condition):
+        target, related = self.related(collection, entry, field)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        if condition.keys() <= OPERATORS:
+            # Operators on the relation itself compare documentIds
+            if "$null" in condition or "$notNull" in condition:
+                empty = not related
+                wanted = (_truthy(condition["$null"]) if "$null" in condition
+                          else not _truthy(condition["$notNull"]))
+                return empty == wanted
+            return any(_match_value(r.attrs["documentId"], condition) for r in related)
+        return any(self.matches(target, r, condition) for r in related)
+
+    # Rendering
+
+    def render(self, collection, entry, fields=None, populate=None):
+        out = {"id": entry.attrs["id"], "documentId": entry.attrs["documentId"]}
+        for key, value in entry.attrs.items():
+            if fields is None or key in fields:
+                out[key] = value
+        for field, spec in (populate or {}).items():
+            if self.relation(collection, field) is None:
+                continue
+            target, related = self.related(collection, entry, field)
+            _, many = self.relation(collection, field)
+            rendered = [self.render(target, r, spec.get("fields"), spec.get("populate"))
+                        for r in related]
+            out[field] = rendered if many else (rendered[0] if rendered else None)
+        return out
+
+    def populate_spec(self, collection, node):
+        """{field: {"fields": [...] | None, "populate": {...}}} from a populate param."""
+        spec = {}
+        if node is None:
+            return spec
+        if node == "*" or node == "true":
+            return {field: {} for field in self.schema[collection]}
+        if isinstance(node, dict) and not all(key.isdigit() for key in node):
+            for field, sub in node.items():
+                target = (self.relation(collection, field) or (field, True))[0]
+                if isinstance(sub, dict):
+                    fields = _values(sub.get("fields")) if "fields" in sub else None
+                    spec[field] = {"fields": fields,
+                                   "populate": self.populate_spec(target, sub.get("populate"))}
+                else:
+                    spec[field] = {}
+            return spec
+        for path in _values(node):
+            if not isinstance(path, str):
+                continue
+            level = spec
+            for part in path.split("."):
+                level = level.setdefault(part, {}).setdefault("populate", {})
+        return spec
+
+    def find(self, collection, params):
+        """Entries of a collection for a list query, plus Strapi's pagination meta."""
+        conditions = params.get("filters") or {}
+        entries = [entry for entry in self.collections[collection].values()
+                   if self.matches(collection, entry, conditions)]
+
+        for sort in reversed(_values(params.get("sort"))):
+            field, _, direction = str(sort).partition(":")
+            entries.sort(key=lambda e: _sort_key(e.attrs.get(field)),
+                         reverse=direction.lower() == "desc")
+
+        pagination = params.get("pagination") or {}
+        total = len(entries)
+        if "start" in pagination or "limit" in pagination:
+            start = int(pagination.get("start", 0))
+            limit = min(int(pagination.get("limit", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+            meta = {"start": start, "limit": limit, "total": total}
+        else:
+            page = max(1, int(pagination.get("page", 1)))
+            limit = min(max(1, int(pagination.get("pageSize", DEFAULT_PAGE_SIZE))),
+                        MAX_PAGE_SIZE)
+            start = (page - 1) * limit
+            meta = {"page": page, "pageSize": limit,
+                    "pageCount": -(-total // limit), "total": total}
+        return entries[start:start + limit], {"pagination": meta}
+
+
+def _sort_key(value):
+    return (value is None, value if value is not None else 0)
+
+
+def _compare(value, expected):
+    """Coerce a query string to the stored value's type: -1, 0 or 1."""
+    if isinstance(value, bool):
+        expected = _truthy(expected)
+    elif isinstance(value, (int, float)):
+        try:
+            expected = float(expected)
+        except (TypeError, ValueError):
+            value, expected = str(value), str(expected)
+    else:
+        value, expected = str(value), str(expected)
+    return (value > expected) - (value < expected)
+
+
+def _match_value(value, condition):
+    if not isinstance(condition, dict):
+        condition = {"$eq": condition}
+    for op, expected in condition.items():
+        if op not in OPERATORS:
+            # Nested component field: filters[seo][metaTitle][$null]
+            if not _match_value(value.get(op) if isinstance(value, dict) else None, expected):
+                return False
+            continue
+        missing = value is None or value == [] or value == ""
+        if op == "$null":
+            ok = (value is None) == _truthy(expected)
+        elif op == "$notNull":
+            ok = (value is not None) == _truthy(expected)
+        elif missing:
+            ok = op in ("$ne", "$nei", "$notIn", "$notContains") or (
+                op == "$eq" and value == expected)
+        elif op == "$in":
+            ok = any(_compare(value, e) == 0 for e in _values(expected))
+        elif op == "$notIn":
+            ok = all(_compare(value, e) != 0 for e in _values(expected))
+        elif op == "$eq":
+            ok = _compare(value, expected) == 0
+        elif op == "$ne":
+            ok = _compare(value, expected) != 0
+        elif op == "$eqi":
+            ok = str(value).lower() == str(expected).lower()
+        elif op == "$nei":
+            ok = str(value).lower() != str(expected).lower()
+        elif op == "$lt":
+            ok = _compare(value, expected) < 0
+        elif op == "$lte":
+            ok = _compare(value, expected) <= 0
+        elif op == "$gt":
+            ok = _compare(value, expected) > 0
+        elif op == "$gte":
+            ok = _compare(value, expected) >= 0
+        elif op == "$contains":
+            ok = str(expected) in str(value)
+        elif op == "$containsi":
+            ok = str(expected).lower() in str(value).lower()
+        elif op == "$notContains":
+            ok = str(expected) not in str(value)
+        elif op == "$startsWith":
+            ok = str(value).startswith(str(expected))
+        else:
+            ok = str(value).endswith(str(expected))
+        if not ok:
+            return False
+    return True
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class FakeStrapi:
+    """
+    Asyncio stand-in for the Strapi v5 REST API the loaders talk to.
+
+    Serves /api/<collection> list/create and /api/<collection>/<documentId>
+    get/update/delete with filters, sort, fields, populate and pagination
+    meta; multipart /api/upload with ref/refId/field linking; and
+    synthetic downloads under /files/<name> (a small PDF for .pdf names)
+    with ETag and Last-Modified validators. Every /api request can be
+    delayed by latency +/- jitter seconds and failed with error_status at
+    error_rate. Admin routes: GET /__stats, POST /__reset, POST /__seed.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0,
+                 error_status=ERROR_STATUS, file_size=FILE_SIZE, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.file_size = file_size
+        self.rng = random.Random(seed)
+        self.store = Store(self.rng)
+        self.server = None
+        self.connections = set()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.latencies = []
+        self.requests = Counter()  # "METHOD /api/collection" -> count
+        self.statuses = Counter()
+        self.injected = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.started = time.monotonic()
+
+    def stats(self):
+        elapsed = time.monotonic() - self.started
+        total = sum(self.requests.values())
+        return {
+            "requests": total,
+            "elapsed": round(elapsed, 3),
+            "requests_per_second": round(total / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(_percentile(self.latencies, 0.50) * 1000, 2),
+            "p95_ms": round(_percentile(self.latencies, 0.95) * 1000, 2),
+            "injected_errors": self.injected,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "routes": dict(self.requests.most_common()),
+        }
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.server = await asyncio.start_server(self._serve, host, port, limit=READ_LIMIT)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        await self.start(host, port)
+        async with self.server:
+            await self.server.serve_forever()
+
+    # HTTP plumbing
+
+    async def close(self):
+        """Stop listening and drop open keep-alive connections."""
+        self.server.close()
+        for writer in list(self.connections):
+            writer.close()
+        await self.server.wait_closed()
+
+    async def _serve(self, reader, writer):
+        self.connections.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await self._read_body(reader, headers)
+
+                start = time.monotonic()
+                status, response_headers, payload = await self._dispatch(
+                    method, target, headers, body)
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version == "HTTP/1.1")
+                head = [f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}",
+                        f"Content-Length: {len(payload)}",
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                head += [f"{k}: {v}" for k, v in response_headers.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+                if method != "HEAD":
+                    writer.write(payload)
+                await writer.drain()
+
+                path = urlsplit(target).path
+                if not path.startswith("/__"):
+                    self.latencies.append(time.monotonic() - start)
+                    self.requests[f"{method} {_route(path)}"] += 1
+                    self.statuses[status] += 1
+                    self.bytes_in += len(body)
+                    self.bytes_out += len(payload) if method != "HEAD" else 0
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+
+    async def _read_body(self, reader, headers):
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    return b"".join(chunks)
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+        length = int(headers.get("content-length") or 0)
+        return await reader.readexactly(length) if length else b""
+
+    async def _dispatch(self, method, target, headers, body):
+        url = urlsplit(target)
+        path = unquote(url.path)
+        params = parse_query(url.query)
+        try:
+            if path.startswith("/__"):
+                return self._admin(method, path, body)
+            if not path.startswith(("/api/", "/files/")):
+                raise HTTPError(404, "Not Found")
+
+            delay = self.latency + self.rng.uniform(-self.jitter, self.jitter)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self.error_rate and self.rng.random() < self.error_rate:
+                self.injected += 1
+                raise HTTPError(self.error_status, "Injected failure", "ServiceUnavailableError")
+
+            if path.startswith("/files/"):
+                return self._file(path[len("/files/"):])
+            if path == "/api/upload":
+                if method != "POST":
+                    raise HTTPError(405, "Method Not Allowed")
+                return self._upload(headers, body)
+            return self._api(method, path, params, headers, body)
+        except HTTPError as e:
+            return _json(e.status, {"data": None, "error": {
+                "status": e.status, "name": e.name, "message": str(e), "details": {}}})
+        except (ValueError, KeyError, TypeError) as e:
+            return _json(400, {"data": None, "error": {
+                "status": 400, "name": "ValidationError", "message": str(e), "details": {}}})
+
+    # Routes
+
+    def _api(self, method, path, params, headers, body):
+        parts = path.strip("/").split("/")
+        if len(parts) not in (2, 3):
+            raise HTTPError(404, "Not Found")
+        collection = parts[1]
+        doc = parts[2] if len(parts) == 3 else None
+        store = self.store
+        fields = _values(params["fields"]) if "fields" in params else None
+        populate = store.populate_spec(collection, params.get("populate"))
+
+        if doc is None and method == "GET":
+            entries, meta = store.find(collection, params)
+            return _json(200, {"data": [store.render(collection, e, fields, populate)
+                                        for e in entries], "meta": meta})
+        if doc is None and method == "POST":
+            entry = store.create(collection, _data(body))
+            return _json(201, {"data": store.render(collection, entry, fields, populate),
+                               "meta": {}})
+        if doc is not None and method in ("GET", "HEAD"):
+            entry = store.get(collection, doc)
+            return _json(200, {"data": store.render(collection, entry, fields, populate),
+                               "meta": {}})
+        if doc is not None and method == "PUT":
+            entry = store.update(collection, doc, _data(body))
+            return _json(200, {"data": store.render(collection, entry, fields, populate),
+                               "meta": {}})
+        if doc is not None and method == "DELETE":
+            store.delete(collection, doc)
+            return 204, {}, b""
+        raise HTTPError(405, "Method Not Allowed")
+
+    def _upload(self, headers, body):
+        fields, files = parse_multipart(body, headers.get("content-type", ""))
+        if not files:
+            raise HTTPError(400, "Files are empty")
+        uploaded = []
+        for _, filename, content_type, data in files:
+            digest = hashlib.sha256(data).hexdigest()
+            name, dot, ext = filename.rpartition(".")
+            entry = self.store.create("files", {
+                "name": filename,
+                "hash": f"{(name or ext)}_{digest[:10]}",
+                "ext": f".{ext}" if dot else "",
+                "mime": content_type,
+                "size": round(len(data) / 1024, 2),
+                "url": f"/uploads/{(name or ext)}_{digest[:10]}{dot}{ext}",
+                "provider": "local",
+            })
+            uploaded.append(entry)
+
+        ref, ref_id, field = fields.get("ref"), fields.get("refId"), fields.get("field")
+        if ref and ref_id and field:
+            collection = REF_COLLECTIONS.get(ref) or f"{ref.rpartition('.')[2]}s"
+            target = self.store.collections[collection].get(
+                self.store.by_id[collection].get(int(ref_id)) if ref_id.isdigit() else ref_id)
+            if target is not None:
+                if self.store.relation(collection, field) is None:
+                    self.store.schema[collection][field] = ("files", True)
+                self.store._link(collection, target, field, {
+                    "connect": [e.attrs["documentId"] for e in uploaded]})
+        return _json(201, [self.store.render("files", e) for e in uploaded])
+
+    def _file(self, name):
+        if not name:
+            raise HTTPError(404, "Not Found")
+        if name.lower().endswith(".pdf"):
+            data = make_pdf(name.rpartition("/")[2])
+        else:
+            block = hashlib.sha256(name.encode()).digest()
+            data = (block * (self.file_size // len(block) + 1))[:self.file_size]
+        etag = hashlib.sha1(data).hexdigest()
+        return 200, {
+            "Content-Type": mimetypes.guess_type(name)[0] or "application/octet-stream",
+            "ETag": f'"{etag}"',
+            "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+        }, data
+
+    def _admin(self, method, path, body):
+        if path == "/__stats" and method == "GET":
+            return _json(200, self.stats())
+        if path == "/__reset" and method == "POST":
+            self.store.reset()
+            self.reset_stats()
+            return _json(200, {"ok": True})
+        if path == "/__seed" and method == "POST":
+            counts = {collection: self.store.seed(collection, rows)
+                      for collection, rows in json.loads(body or b"{}").items()}
+            return _json(200, counts)
+        raise HTTPError(404, "Not Found")
+
+
+def _route(path):
+    """Group /api/products/<documentId> style paths for the stats."""
+    parts = path.strip("/").split("/")
+    if parts[0] == "files":
+        return "/files"
+    return "/" + "/".join(parts[:2]) + ("/:id" if len(parts) > 2 else "")
+
+
+def _data(body):
+    payload = json.loads(body or b"{}")
+    data = payload.get("data")
+    if not isinstance(data, dict):
+        raise HTTPError(400, 'Missing "data" payload in the request body')
+    return data
+
+
+def _json(status, payload):
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    return status, headers, json.dumps(payload).encode()
+
+
+class ServerThread:
+    """
+    Run a FakeStrapi on its own event loop thread, e.g. inside a benchmark.
+
+    reset(), seed() and stats() are forwarded to the loop thread so they
+    never race with requests being served.
+    """
+
+    def __init__(self, strapi, host=DEFAULT_HOST, port=0):
+        self.strapi = strapi
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        host, port = self.call(lambda: None, strapi.start(host, port))
+        self.base_url = f"http://{host}:{port}"
+
+    def call(self, func, coro=None):
+        async def run():
+            return await coro if coro is not None else func()
+        return asyncio.run_coroutine_threadsafe(run(), self.loop).result()
+
+    def reset(self):
+        def reset():
+            self.strapi.store.reset()
+            self.strapi.reset_stats()
+        self.call(reset)
+
+    def seed(self, collections):
+        return self.call(lambda: {name: self.strapi.store.seed(name, rows)
+                                  for name, rows in collections.items()})
+
+    def reset_stats(self):
+        self.call(self.strapi.reset_stats)
+
+    def stats(self):
+        return self.call(self.strapi.stats)
+
+    def stop(self):
+        self.call(None, self.strapi.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve a fake Strapi v5 REST API for local loader runs.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds added to every API request")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Latency varies uniformly by up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of API requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=ERROR_STATUS)
+    parser.add_argument("--file-size", type=int, default=FILE_SIZE,
+                        help="Bytes served for each /files/ download")
+    parser.add_argument("--seed", type=int,
+                        help="Random seed for documentIds, jitter and errors")
+    parser.add_argument("--data", help="JSON file of {collection: [documents]} to preload")
+    args = parser.parse_args()
+
+    strapi = FakeStrapi(args.latency, args.jitter, args.error_rate,
+                        args.error_status, args.file_size, args.seed)
+    if args.data:
+        with open(args.data) as f:
+            for collection, rows in json.load(f).items():
+                strapi.store.seed(collection, rows)
+    print(f"Fake Strapi listening on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(strapi.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,202 @@
+import json
+import os
+import threading
+import time
+
+from strapi_client import get_client
+from strapi_mirror import open_mirror
+
+STATES_URL = "/api/states"
+CITIES_URL = "/api/cities"
+CACHE_TTL = 24 * 60 * 60  # Seconds a cached copy of states/cities stays valid
+
+
+def normalize(name):
+    """Case- and whitespace-insensitive lookup key for a place name."""
+    return " ".join(str(name).split()).casefold()
+
+
+def add_geography_arguments(parser):
+    """Add the shared --geo-cache/--geo-ttl flags to an argparse parser."""
+    parser.add_argument("--geo-cache",
+                        help="Cache states and cities in this JSON file between runs")
+    parser.add_argument("--geo-ttl", type=int, default=CACHE_TTL,
+                        help="Seconds before the geography cache is refetched")
+
+
+class GeographyResolver:
+    """
+    In-memory index of the states and cities collections.
+
+    Both collections are fetched once per run (or read from an on-disk
+    cache younger than ttl) and indexed by normalized name. Cities keep
+    their state's documentId, so a city name alone resolves to the
+    (state, city) pair a variant or dealer connects to. Cities created
+    during the run can be added to the index; they are written to the
+    cache file too, so a later run within ttl does not create them
+    again. With a StrapiMirror both
+    collections are read from it after a delta refresh. Safe to share
+    between threads once loaded.
+    """
+
+    def __init__(self, client=None, cache_path=None, ttl=CACHE_TTL, mirror=None):
+        self.client = client or get_client()
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.mirror = mirror
+        self.states = {}  # name -> documentId
+        self.cities = {}  # name -> [(city documentId, state documentId)]
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.snapshot = None  # What the cache file holds
+
+    @classmethod
+    def from_args(cls, args, client=None):
+        return cls(client, args.geo_cache, args.geo_ttl, open_mirror(client))
+
+    def load(self, refresh=False):
+        """Index every state and city, from the cache when it is fresh."""
+        snapshot = None if refresh else self._read_cache()
+        if snapshot is None:
+            snapshot = self._fetch()
+            self._write_cache(snapshot)
+        self.snapshot = snapshot
+
+        for state in snapshot["states"]:
+            self.states.setdefault(normalize(state["name"]), state["documentId"])
+        for city in snapshot["cities"]:
+            self._index_city(city["name"], city["documentId"], city.get("state"))
+
+        self.loaded = True
+        return self
+
+    def _fetch(self):
+        if self.mirror is not None:
+            self.mirror.ensure(["states", "cities"])
+            states = self.mirror.find("states")
+            cities = self.mirror.find("cities", populate=("state",))
+        else:
+            states = self.client.snapshot(STATES_URL, fields=("documentId", "name"))
+            cities = self.client.snapshot(CITIES_URL, fields=("documentId", "name"),
+                                          populate={"state": ["name"]})
+        return {
+            "fetched_at": time.time(),
+            "base_url": self.client.base_url,
+            "states": [{"documentId": s["documentId"], "name": s["name"]}
+                       for s in states if s.get("name")],
+            "cities": [{"documentId": c["documentId"], "name": c["name"],
+                        "state": (c.get("state") or {}).get("documentId")}
+                       for c in cities if c.get("name")],
+        }
+
+    def _read_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path, "r") as f:
+                snapshot = json.load(f)
+        except ValueError:
+            return None
+        if snapshot.get("base_url") != self.client.base_url:
+            return None
+        if time.time() - snapshot.get("fetched_at", 0) > self.ttl:
+            return None
+        return snapshot
+
+    def _write_cache(self, snapshot):
+        if not self.cache_path:
+            return
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def _index_city(self, name, document_id, state_id):
+        entries = self.cities.setdefault(normalize(name), [])
+        if (document_id, state_id) not in entries:
+            entries.append((document_id, state_id))
+
+    def _ensure_loaded(self):
+        if not self.loaded:
+            # Threads that find the index empty share one load
+            self.client.coalesce((STATES_URL, "load", id(self)), self._load_once)
+
+    def _load_once(self):
+        if not self.loaded:
+            self.load()
+
+    def state(self, name):
+        """documentId of the state called name, or None."""
+        self._ensure_loaded()
+        if not name:
+            return None
+        return self.states.get(normalize(name))
+
+    def city(self, name, state_id=None):
+        """
+        (city documentId, state documentId) for a city name, or None.
+
+        A name shared by cities in several states needs state_id to pick
+        one; without it the first city loaded wins.
+        """
+        self._ensure_loaded()
+        if not name:
+            return None
+        entries = self.cities.get(normalize(name), [])
+        if state_id is not None:
+            entries = [entry for entry in entries if entry[1] == state_id]
+        return entries[0] if entries else None
+
+    def location(self, name):
+        """
+        (state documentId, city documentId or None) for a place name.
+
+        Cities win over states, so "Delhi" is the city in the Delhi state
+        while "Goa" with no such city resolves to the state alone.
+        """
+        city = self.city(name)
+        if city:
+            return city[1], city[0]
+        state_id = self.state(name)
+        if state_id:
+            return state_id, None
+        return None
+
+    def add_city(self, name, document_id, state_id):
+        """Index a city created during this run and add it to the cache file."""
+        self._ensure_loaded()
+        with self.lock:
+            self._index_city(name, document_id, state_id)
+            if self.cache_path and self.snapshot is not None:
+                self.snapshot["cities"].append(
+                    {"documentId": document_id, "name": name, "state": state_id})
+                self._write_cache(self.snapshot)
+
+    def get_or_create_city(self, name, state_id, create):
+        """
+        Resolve a city in a state, creating it when it does not exist.
+
+        create(name, state_id) must return the new city's documentId. It
+        runs at most once per city: concurrent callers for the same name
+        and state wait for the first and share its result.
+
+        Returns:
+            tuple: (city documentId, whether it was created by this call)
+        """
+        existing = self.city(name, state_id)
+        if existing:
+            return existing[0], False
+
+        def lookup_or_create():
+            existing = self.city(name, state_id)
+            if existing:
+                return existing[0], None
+            document_id = create(name, state_id)
+            if document_id:
+                self.add_city(name, document_id, state_id)
+            return document_id, threading.get_ident()
+
+        # Callers that joined the flight share the id but did not create it
+        document_id, creator = self.client.coalesce(
+            (CITIES_URL, state_id, normalize(name)), lookup_or_create)
+        return document_id, creator == threading.get_ident()
@@ -1,23 +1,46 @@
+import argparse
+import csv
+import hashlib
 import json
+import os
+import sys
 import requests
 import re
+import shutil
+import tempfile
+import time
 import concurrent.futures
 import logging
 from PyPDF2 import PdfWriter, PdfReader
-import io
+from PyPDF2.generic import IndirectObject
+from contextlib import contextmanager
 from tenacity import retry, stop_after_attempt, wait_fixed
 from urllib.parse import quote
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from media_cache import MediaCache, validators  # noqa: E402
+from strapi_client import get_client  # noqa: E402
+from uploads import spool_download, upload_stream  # noqa: E402
+
 # Configure logging
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # Configuration
-API_URL = "http://localhost:1337/api/investors?populate[0]=investor_info&populate[1]=investor_info.file_info&status=draft"
-UPLOAD_URL = "http://localhost:1337/api/upload"
+API_URL = "/api/investors?populate[0]=investor_info&populate[1]=investor_info.file_info&status=draft"
+UPLOAD_URL = "/api/upload"
 MAX_WORKERS = 5  # Adjust based on system capabilities
 REQUEST_TIMEOUT = 30  # Timeout for requests
+PAGE_SIZE = 50  # Investors per page when listing
+CHUNK_SIZE = 64 * 1024  # Bytes held per worker while streaming a PDF
+SPOOL_THRESHOLD = 4 * 1024 * 1024  # PDFs above this are spooled to disk
+MEDIA_CACHE_PATH = os.environ.get("MEDIA_CACHE_PATH", "media_cache.sqlite3")
+UPLOAD_REF = "investors.file-data"
+UPLOAD_FIELD = "file"
+OPTIMIZE_WORKERS = os.cpu_count() or 1  # Processes re-writing PDFs with --optimize
+# Page entries that only matter to the application that made the PDF
+PAGE_METADATA = ("/Metadata", "/PieceInfo")
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
     "Accept": "application/pdf",
@@ -25,34 +48,20 @@ HEADERS = {
     "Connection": "keep-alive"
 }
 
-session = requests.Session()
-session.headers.update(HEADERS)
+client = get_client(os.environ.get("STRAPI_URL", "http://localhost:1337"),
+                    timeout=REQUEST_TIMEOUT, pool_size=MAX_WORKERS * 2)
+client.session.headers.update(HEADERS)
+media_cache = MediaCache(MEDIA_CACHE_PATH)
 
 
 def get_request_with_pagination(url):
-    """Fetch all paginated results from the API efficiently."""
+    """Fetch all paginated results from the API, pages fetched concurrently."""
     results = []
-    page = 1
-    while True:
-        try:
-            paginated_url = f"{url}&pagination[page]={
-                page}&pagination[pageSize]=50"
-            response = session.get(paginated_url, timeout=REQUEST_TIMEOUT)
-            response.raise_for_status()
-            data = response.json()
-
-            if "data" not in data or "meta" not in data:
-                logger.error("Invalid API response format")
-                break
-
-            results.extend(data.get("data", []))
-
-            if page >= data["meta"]["pagination"]["pageCount"]:
-                break
-            page += 1
-        except requests.RequestException as e:
-            logger.error(f"Pagination request error: {e}")
-            break
+    try:
+        results.extend(client.iter_collection(
+            url, page_size=PAGE_SIZE, max_workers=MAX_WORKERS))
+    except requests.RequestException as e:
+        logger.error(f"Pagination request error: {e}")
     return results
 
 
@@ -66,7 +75,7 @@ def download_file(file_url):
     try:
         file_url = quote(file_url, safe=":/")  # Ensure URL is properly encoded
         logger.info(f"Downloading file: {file_url}")
-        response = session.get(file_url, stream=True, timeout=REQUEST_TIMEOUT)
+        response = client.get(file_url, stream=True)
         response.raise_for_status()
         logger.info(f"Downloaded file: {file_url}")
         return response
@@ -82,70 +91,260 @@ def download_file(file_url):
         raise
 
 
-def download_and_process_file(file_info):
+def cached_upload(file_url, ref_id):
+    """
+    HEAD the source and check the media cache for an identical upload.
+
+    Returns:
+        str or None: content hash if this file is already attached to ref_id
+    """
+    try:
+        sha256, _, _ = media_cache.check(client, quote(file_url, safe=":/"))
+    except requests.exceptions.RequestException as e:
+        logger.debug(f"HEAD failed for {file_url}, downloading instead: {e}")
+        return None
+    if sha256 and media_cache.is_linked(sha256, UPLOAD_REF, ref_id, UPLOAD_FIELD):
+        return sha256
+    return None
+
+
+def drop_duplicate_images(reader):
+    """
+    Point identical image XObjects of all pages at their first copy.
+
+    Generators often embed the same logo or background once per page;
+    only the first copy is then written to the optimized file.
+    """
+    seen = {}
+    for page in reader.pages:
+        resources = page.get("/Resources")
+        xobjects = resources.get_object().get("/XObject") if resources else None
+        if not xobjects:
+            continue
+        xobjects = xobjects.get_object()
+        for name, ref in list(xobjects.items()):
+            if not isinstance(ref, IndirectObject):
+                continue
+            image = ref.get_object()
+            if image.get("/Subtype") != "/Image":
+                continue
+            key = (hashlib.sha256(image.get_data()).hexdigest(),
+                   repr(sorted((k, v) for k, v in image.items() if k != "/Length")))
+            xobjects[name] = seen.setdefault(key, ref)
+
+
+def optimize_pdf(source_path, target_path):
+    """
+    Re-write a PDF smaller: duplicate images merged, content streams
+    compressed and metadata other than the title dropped.
+
+    Only objects reachable from the pages and outline are copied, so
+    unused objects and earlier revisions of the file are left behind.
+    Runs in a worker process; the PDF is read from source_path and the
+    result written to target_path.
+
+    Returns:
+        tuple: (page count, original size, optimized size or None when
+        not smaller)
+    """
+    original = os.path.getsize(source_path)
+    reader = PdfReader(source_path)
+    if reader.is_encrypted:
+        return len(reader.pages), original, None
+
+    drop_duplicate_images(reader)
+    # Compressed on the reader's pages: done on the writer's copies,
+    # PyPDF2 3.0.1 leaves the stream inline and the old one in the file
+    for page in reader.pages:
+        for key in PAGE_METADATA:
+            page.pop(key, None)
+        page.compress_content_streams()
+    writer = PdfWriter()
+    writer.append(reader)
+    title = reader.metadata.get("/Title") if reader.metadata else None
+    if title:
+        writer.add_metadata({"/Title": title})
+
+    with open(target_path, "wb") as f:
+        writer.write(f)
+    optimized = os.path.getsize(target_path)
+    return len(reader.pages), original, optimized if optimized < original else None
+
+
+@contextmanager
+def optimized_upload(pdf_pool, spool, file_url):
+    """
+    Optimize a downloaded PDF in the process pool, through temp files.
+
+    The spool is copied to disk in CHUNK_SIZE pieces and the worker
+    process writes its result to a file, so neither copy is held in this
+    process's memory. Yields (file object to upload, report dict or None
+    when optimization failed); the temp files are removed afterwards.
+    """
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as source:
+        shutil.copyfileobj(spool, source, CHUNK_SIZE)
+    spool.seek(0)
+    target_path = f"{source.name}.optimized"
+    try:
+        try:
+            pages, original, optimized = pdf_pool.submit(
+                optimize_pdf, source.name, target_path).result()
+        except Exception as e:
+            logger.warning(f"Could not optimize {file_url}, uploading original: {e}")
+            pages = None
+
+        if pages is None:
+            yield spool, None
+            return
+        report = {
+            "file_url": file_url,
+            "pages": pages,
+            "original_bytes": original,
+            "optimized_bytes": optimized or original,
+            "saved_bytes": original - optimized if optimized else 0,
+        }
+        if optimized is None:
+            yield spool, report
+            return
+        with open(target_path, "rb") as f:
+            yield f, report
+    finally:
+        for path in (source.name, target_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def write_optimization_report(reports, output_dir="exports"):
+    """Write the per-file page counts and byte savings to a CSV."""
+    os.makedirs(output_dir, exist_ok=True)
+    filename = os.path.join(
+        output_dir, f"pdf_optimization_{time.strftime('%Y%m%d_%H%M%S')}.csv")
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=[
+            "file_url", "pages", "original_bytes", "optimized_bytes", "saved_bytes"])
+        writer.writeheader()
+        writer.writerows(reports)
+    return filename
+
+
+def download_and_process_file(file_info, pdf_pool=None):
     """
     Download and process a single file with error handling.
 
+    Files whose source is unchanged and already attached to the same
+    file-data entry are skipped after a HEAD request. With a pdf_pool,
+    the PDF is optimized first and the result uploaded if it is smaller.
+
     Args:
         file_info (dict): File information dictionary
+        pdf_pool: ProcessPoolExecutor running optimize_pdf, or None
 
     Returns:
-        tuple: (success, file_url, error_message)
+        tuple: (success, file_url, error_message, optimization report or None)
     """
     try:
         file_url = file_info.get("file_url")
         if not file_url:
-            return False, None, "Missing file URL"
+            return False, None, "Missing file URL", None
 
         file_url = file_url.replace('\\', '/')
+        ref_id = file_info.get("id")
+        if cached_upload(file_url, ref_id):
+            return True, file_url, "Unchanged, skipped", None
+
         response = download_file(file_url)
 
         if response is None:  # Skip processing if the file was not found
-            return False, file_url, "File not found (404)"
+            return False, file_url, "File not found (404)", None
 
         content_type = response.headers.get("Content-Type", "")
         if "application/pdf" not in content_type:
-            return False, file_url, f"Invalid content type: {content_type}"
+            response.close()
+            return False, file_url, f"Invalid content type: {content_type}", None
+
+        # Stream the body to a spool so a worker never holds the whole PDF
+        etag, last_modified = validators(response)
+        spool, size, sha256, download_seconds = spool_download(
+            response, CHUNK_SIZE, SPOOL_THRESHOLD)
+        media_cache.record_source(quote(file_url, safe=":/"), etag,
+                                  last_modified, sha256)
+        if media_cache.is_linked(sha256, UPLOAD_REF, ref_id, UPLOAD_FIELD):
+            spool.close()
+            return True, file_url, "Content unchanged, upload skipped", None
+
+        with spool:
+            if pdf_pool is None:
+                report, upload_size = None, size
+                upload_seconds, uploaded = upload_file(
+                    spool, ref_id, file_url.split("/")[-1])
+            else:
+                with optimized_upload(pdf_pool, spool, file_url) as (file_obj, report):
+                    upload_size = report["optimized_bytes"] if report else size
+                    upload_seconds, uploaded = upload_file(
+                        file_obj, ref_id, file_url.split("/")[-1])
+        # Keyed by the source hash, so an unchanged source is still skipped
+        if uploaded:
+            media_cache.record_media(sha256, uploaded[0]["id"], upload_size)
+        media_cache.record_link(sha256, UPLOAD_REF, ref_id, UPLOAD_FIELD)
+
+        optimized = (f", {report['pages']} pages, saved {report['saved_bytes']} bytes"
+                     if report else "")
+        return True, file_url, (
+            f"Success ({size} bytes{optimized}, "
+            f"download {format_rate(size, download_seconds)}, "
+            f"upload {format_rate(upload_size, upload_seconds)})"), report
 
-        file_data = response.content
-        upload_response = upload_file(
-            file_data, file_info.get("id"), file_url.split("/")[-1])
+    except Exception as e:
+        return False, file_url, str(e), None
 
-        return True, file_url, "Success"
 
-    except Exception as e:
-        return False, file_url, str(e)
+def format_rate(size, seconds):
+    """Human readable bytes-per-second figure."""
+    rate = size / seconds if seconds > 0 else 0
+    for unit in ("B/s", "KB/s", "MB/s"):
+        if rate < 1024 or unit == "MB/s":
+            return f"{rate:.1f} {unit}"
+        rate /= 1024
 
 
-def upload_file(file_data, ref_id, file_name):
-    """Upload a file to the API with robust error handling."""
+def upload_file(file_obj, ref_id, file_name):
+    """
+    Stream a file to the upload API.
+
+    Returns:
+        tuple: (seconds spent uploading, list of uploaded media entries)
+    """
     sanitized_name = sanitize_file_name(file_name)
 
-    # Construct the form-data payload
-    files = {
-        "files": (sanitized_name, file_data, "application/pdf")
-    }
+    # Construct the form-data payload, the file part is streamed in chunks
+    files = [("files", sanitized_name, file_obj, "application/pdf")]
     data = {
         "refId": ref_id,          # Matches the 'refId' field in Postman
-        "ref": "investors.file-data",  # Matches the 'ref' field in Postman
-        "field": "file"           # Matches the 'field' field in Postman
+        "ref": UPLOAD_REF,        # Matches the 'ref' field in Postman
+        "field": UPLOAD_FIELD     # Matches the 'field' field in Postman
     }
 
     # Perform the POST request
     logger.info(f"Uploading file: {sanitized_name}")
-    response = session.post(UPLOAD_URL, files=files,
-                            data=data, timeout=REQUEST_TIMEOUT)
+    start = time.monotonic()
+    response = upload_stream(client, UPLOAD_URL, data, files)
     logger.debug(f"Upload response: {response.status_code} {response.text}")
     response.raise_for_status()
-    return response.json()
+    return time.monotonic() - start, response.json()
 
 
-def process_request():
+def process_request(optimize_workers=0):
     """
     Efficiently process files with concurrent downloads and uploads.
 
-    Uses ThreadPoolExecutor for parallel processing of files.
+    Uses ThreadPoolExecutor for parallel processing of files. With
+    optimize_workers, PDFs are re-written in a ProcessPoolExecutor of that
+    many processes, so the CPU work does not hold up the network threads,
+    and the page counts and savings are written to a CSV report.
     """
+    pdf_pool = (concurrent.futures.ProcessPoolExecutor(max_workers=optimize_workers)
+                if optimize_workers else None)
+    reports = []
     try:
         all_data = get_request_with_pagination(API_URL)
 
@@ -157,20 +356,40 @@ def process_request():
 
         with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
             futures = {
-                executor.submit(download_and_process_file, file_info): file_info
+                executor.submit(download_and_process_file, file_info, pdf_pool): file_info
                 for file_info in files_to_process
             }
 
             for future in concurrent.futures.as_completed(futures):
-                success, file_url, message = future.result()
+                success, file_url, message, report = future.result()
+                if report is not None:
+                    reports.append(report)
                 if success:
-                    logger.info(f"Successfully processed: {file_url}")
+                    logger.info(f"Successfully processed: {file_url} {message}")
                 else:
                     logger.error(f"Failed to process {file_url}: {message}")
 
     except Exception as e:
         logger.error(f"Error processing request: {e}")
+    finally:
+        if pdf_pool is not None:
+            pdf_pool.shutdown()
+
+    if reports:
+        original = sum(report["original_bytes"] for report in reports)
+        saved = sum(report["saved_bytes"] for report in reports)
+        share = f"{saved / original:.1%}" if original else "0%"
+        logger.info(f"Optimized {len(reports)} PDFs: saved {saved} of {original} bytes "
+                    f"({share}), report: {write_optimization_report(reports)}")
 
 
 if __name__ == "__main__":
-    process_request()
+    parser = argparse.ArgumentParser(
+        description="Upload investor documents to their file-data entries.")
+    parser.add_argument("--optimize", action="store_true",
+                        help="Re-write PDFs smaller before uploading them")
+    parser.add_argument("--optimize-workers", type=int, default=OPTIMIZE_WORKERS,
+                        help="Processes used to optimize PDFs")
+    args = parser.parse_args()
+
+    process_request(max(1, args.optimize_workers) if args.optimize else 0)
@@ -1,20 +1,35 @@
+import argparse
+import hashlib
 import json
+import os
+import sys
 import requests
 import logging
 import time
+from collections import defaultdict
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from csv_source import Column, load_records, to_int, to_str  # noqa: E402
+from logging_setup import (  # noqa: E402
+    Payload, add_verbosity_arguments, setup_logging_from_args)
+from strapi_client import get_client, run_concurrently  # noqa: E402
+from strapi_mirror import open_mirror  # noqa: E402
+
 # Configuration
-API_URL = "http://localhost:1337/api"
-INVESTORS_CATEGORY_PATH = "investors-category.json"
-INVESTORS_DATA_PATH = "investordatas.json"
-
-# Configure more detailed logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filename='investor_processing.log'
-)
+client = get_client(os.environ.get("STRAPI_URL", "http://localhost:1337"))
+API_URL = "/api"
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INVESTORS_CATEGORY_PATH = os.path.join(BASE_DIR, "investors.csv")
+INVESTORS_DATA_PATH = os.path.join(BASE_DIR, "investordatas.csv")
+INVESTORS_STATE_PATH = os.path.join(BASE_DIR, "investor_state.json")
+MAX_WORKERS = 4  # Top-level investors uploaded at once
+LOG_FILE = 'investor_processing.log'
+
+# order_c is a position ("10" must come after "2"); every other category
+# column is kept as text, as the id/parent_id/status comparisons expect
+CATEGORY_COLUMNS = {"order_c": Column("order_c", to_int, default=0)}
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,14 +59,12 @@ def send_request(method, url, data=None, max_retries=5, initial_delay=2):
     """
     for attempt in range(max_retries):
         try:
-            response = requests.request(method, url, json=data, timeout=10)
+            response = client.request(method, url, json=data, timeout=10)
 
-            # Log full request and response details for debugging
-            logger.info(f"Request URL: {url}")
-            logger.info(f"Request Method: {method}")
-            logger.info(f"Request Data: {json.dumps(
-                data, indent=2) if data else 'None'}")
-            logger.info(f"Response Status: {response.status_code}")
+            # Bodies are only serialized when running with -v
+            logger.info("%s %s -> %s", method, url, response.status_code)
+            logger.debug("Request Data: %s", Payload(data))
+            logger.debug("Response Body: %s", Payload(response.text))
 
             # Raise an exception for HTTP errors
             response.raise_for_status()
@@ -60,83 +73,211 @@ def send_request(method, url, data=None, max_retries=5, initial_delay=2):
 
         except requests.RequestException as e:
             delay = initial_delay * (2 ** attempt)  # Exponential backoff
-            logger.warning(f"Request failed (Attempt {
-                           attempt + 1}/{max_retries}): {e}")
+            logger.warning("Request failed (Attempt %d/%d): %s",
+                           attempt + 1, max_retries, e)
 
             if attempt == max_retries - 1:
-                logger.error(f"Final attempt failed for URL: {url}")
+                logger.error("Final attempt failed for URL: %s", url)
                 raise
 
             time.sleep(delay)
 
 
-def process_investors(categories, data):
-    """Process and upload investor data with error handling."""
-    successful_uploads = 0
-    failed_uploads = 0
+def build_indexes(categories, data):
+    """
+    Index the export once so the investor tree is built in a linear pass.
+
+    Returns:
+        tuple: (top-level categories,
+                active child categories by parent_id, sorted by order_c,
+                active file entries by catid, newest first,
+                date errors by catid)
+    """
+    top_level = []
+    children = defaultdict(list)
+    for category in categories:
+        if category["parent_id"] == "0":
+            top_level.append(category)
+        elif category["status"] == "1":
+            children[category["parent_id"]].append(category)
+    for child_categories in children.values():
+        # csvjson exports are not mapped and still carry order_c as text
+        child_categories.sort(key=lambda x: to_int(x["order_c"]) or 0)
 
-    for category in [c for c in categories if c["parent_id"] == "0"]:
+    files = defaultdict(list)
+    invalid = {}
+    for item in data:
+        if item["status"] != "1":
+            continue
         try:
-            # Create top-level investor
-            top_investor = send_request('POST', f"{API_URL}/investors", {
-                "data": {"title": category["name"]}
+            date = format_date(item["edate"])
+        except ValueError as e:
+            # Only the investor owning this entry should fail
+            invalid.setdefault(item["catid"], e)
+            continue
+        files[item["catid"]].append({
+            "title": item["name"],
+            "date": date,
+            "file_url": 'https://www.centuryply.com/'+item["file"],
+        })
+    for file_info in files.values():
+        file_info.sort(key=lambda x: x["date"] or "", reverse=True)
+
+    return top_level, children, files, invalid
+
+
+def build_investor_info(category, children, files, invalid):
+    """Collect the parent category and its children that have files."""
+    investor_info = []
+    # Parent category first, then its children in order
+    for child in [category] + children.get(category["id"], []):
+        if child["id"] in invalid:
+            raise invalid[child["id"]]
+        child_data = files.get(child["id"])
+        if child_data:
+            investor_info.append({
+                "title": child["name"],
+                "file_info": child_data
             })
-            investor_id = top_investor['data']['documentId']
-            logger.info(f"Created investor: {
-                        category['name']} (ID: {investor_id})")
-
-            # Process child categories
-            child_categories = [
-                child for child in categories
-                if child["parent_id"] == category["id"] and child["status"] == "1"
-            ]
-            child_categories.sort(key=lambda x: x["order_c"])
-            # add parent category to child_categories
-            child_categories.insert(0, category)
-
-            investor_info = []
-            for child in child_categories:
-                child_data = [
-                    {
-                        "title": item["name"],
-                        "date": format_date(item["edate"]),
-                        "file_url": 'https://www.centuryply.com/'+item["file"],
-                    }
-                    for item in data
-                    if item["catid"] == child["id"] and item["status"] == "1"
-                ]
-                child_data.sort(key=lambda x: x["date"], reverse=True)
-                if child_data:
-                    investor_info.append({
-                        "title": child["name"],
-                        "file_info": child_data
-                    })
-
-            # Update investor with child information
-            if investor_info:
-                response_of_put = send_request('PUT', f"{API_URL}/investors/{investor_id}", {
-                    "data": {"investor_info": investor_info}
-                })
-
-                successful_uploads += 1
+    return investor_info
+
+
+def document_hash(document):
+    """Stable SHA-256 of an investor document."""
+    encoded = json.dumps(document, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def load_state(path):
+    """Map of category id -> {"documentId", "hash"} from earlier runs."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_state(state, path):
+    """Write the state file atomically so a crash never truncates it."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def process_investor(category, children, files, invalid, known=None):
+    """
+    Create or update one top-level investor in a single request.
 
+    The whole document, investor_info included, is built before anything
+    is sent. It is POSTed when the investor is new and PUT to the known
+    documentId when its hash differs from the last upload.
+
+    Returns:
+        tuple: (action, documentId, hash); action is "created",
+               "updated" or "unchanged"
+    """
+    document = {
+        "title": category["name"],
+        "investor_info": build_investor_info(category, children, files, invalid),
+    }
+    digest = document_hash(document)
+
+    if known and known.get("hash") == digest:
+        return "unchanged", known["documentId"], digest
+
+    if known:
+        investor_id = known["documentId"]
+        send_request('PUT', f"{API_URL}/investors/{investor_id}", {
+            "data": document
+        })
+        logger.info(f"Updated investor: {
+                    category['name']} (ID: {investor_id})")
+        return "updated", investor_id, digest
+
+    response = send_request('POST', f"{API_URL}/investors", {
+        "data": document
+    })
+    investor_id = response['data']['documentId']
+    logger.info(f"Created investor: {
+                category['name']} (ID: {investor_id})")
+    return "created", investor_id, digest
+
+
+def existing_investors(mirror, titles):
+    """Map of title -> documentId for investors already in Strapi, from the mirror."""
+    try:
+        mirror.ensure(["investors"])
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Failed to refresh investors, using the local mirror: {e}")
+    return mirror.lookup("investors", "name", titles)
+
+
+def process_investors(categories, data, max_workers=MAX_WORKERS,
+                      state_path=INVESTORS_STATE_PATH, mirror=None):
+    """
+    Process and upload investor data with error handling.
+
+    Investors missing from the state file but already in Strapi (found by
+    title in the mirror) are updated instead of created again.
+    """
+    counts = defaultdict(int)
+    state = load_state(state_path)
+
+    top_level, children, files, invalid = build_indexes(categories, data)
+    existing = {}
+    if mirror is not None:
+        existing = existing_investors(mirror, [c["name"] for c in top_level])
+
+    def process(category):
+        try:
+            known = state.get(category["id"])
+            if known is None and category["name"] in existing:
+                known = {"documentId": existing[category["name"]], "hash": None}
+            return category, process_investor(category, children, files, invalid, known), None
         except Exception as e:
-            failed_uploads += 1
-            logger.error(f"Failed to process category {category['name']}: {e}")
+            return category, None, e
 
-    logger.info(f"Upload Summary: Successful={
-                successful_uploads}, Failed={failed_uploads}")
+    # State is only touched here, on the main thread
+    for category, result, error in run_concurrently(process, top_level, max_workers):
+        if error is not None:
+            counts["failed"] += 1
+            logger.error(f"Failed to process category {category['name']}: {error}")
+            continue
+        action, investor_id, digest = result
+        counts[action] += 1
+        if action != "unchanged":
+            state[category["id"]] = {"documentId": investor_id, "hash": digest}
+            save_state(state, state_path)
+
+    logger.info(f"Upload Summary: Created={counts['created']}, "
+                f"Updated={counts['updated']}, Unchanged={counts['unchanged']}, "
+                f"Failed={counts['failed']}")
 
 
 def main():
     """Main execution function."""
-    with open('/Users/shubhamk/Developer/office_work/century-product-work/invistor/investors-category.json', "r") as f:
-        categories = json.load(f)
+    parser = argparse.ArgumentParser(description="Upload investor documents.")
+    parser.add_argument("--categories", default=INVESTORS_CATEGORY_PATH,
+                        help="Investor category CSV or JSON export")
+    parser.add_argument("--data", default=INVESTORS_DATA_PATH,
+                        help="Investor document CSV or JSON export")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="Top-level investors uploaded at once")
+    parser.add_argument("--state", default=INVESTORS_STATE_PATH,
+                        help="Documents and content hashes of uploaded investors")
+    parser.add_argument("--log-file", default=LOG_FILE,
+                        help="Log file to write")
+    add_verbosity_arguments(parser)
+    args = parser.parse_args()
+
+    setup_logging_from_args(args, args.log_file, console=False)
 
-    with open('/Users/shubhamk/Developer/office_work/century-product-work/invistor/investordatas.json', "r") as f:
-        data = json.load(f)
+    # Both exports are streamed straight into the indexes
+    categories = load_records(args.categories, CATEGORY_COLUMNS, rest=to_str)
+    data = load_records(args.data)
 
-    process_investors(categories, data)
+    process_investors(categories, data, max(1, args.workers), args.state,
+                      open_mirror(client))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,154 @@
+import atexit
+import json
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+MAX_BODY = 2000  # Characters of a payload or response body kept in the log
+PAYLOAD_SAMPLE = 1  # Log every Nth DEBUG payload record
+
+_listener = None
+
+
+def verbosity_level(verbosity):
+    """Map -q/-v counts to a level: -1 WARNING, 0 INFO, 1+ DEBUG."""
+    if verbosity < 0:
+        return logging.WARNING
+    if verbosity == 0:
+        return logging.INFO
+    return logging.DEBUG
+
+
+def add_verbosity_arguments(parser):
+    """Add the shared -v/--verbose and -q/--quiet flags to an argparse parser."""
+    parser.add_argument("-v", "--verbose", action="count", default=0,
+                        help="More log output; -v also logs request/response bodies")
+    parser.add_argument("-q", "--quiet", action="count", default=0,
+                        help="Only log warnings and errors")
+    parser.add_argument("--log-sample", type=int, default=PAYLOAD_SAMPLE,
+                        help="With -v, log only every Nth request/response body")
+
+
+def truncate(text, limit=MAX_BODY):
+    """Cut text down to limit characters, noting how much was dropped."""
+    if limit is None or len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more chars]"
+
+
+class Payload:
+    """
+    Log argument that serializes a request or response body on demand.
+
+    Pass it as a %-style argument, e.g. logger.debug("Body: %s", Payload(data)):
+    nothing is dumped unless the record is actually emitted, so payloads
+    cost nothing below DEBUG.
+    """
+
+    def __init__(self, body, limit=MAX_BODY):
+        self.body = body
+        self.limit = limit
+
+    def __str__(self):
+        if self.body is None:
+            return "None"
+        if isinstance(self.body, (bytes, bytearray)):
+            text = self.body.decode("utf-8", "replace")
+        elif isinstance(self.body, str):
+            text = self.body
+        else:
+            text = json.dumps(self.body, default=str)
+        return truncate(text, self.limit)
+
+
+class PayloadSampler(logging.Filter):
+    """
+    Let through only every Nth record that carries a Payload argument.
+
+    Handlers run filters before taking their own lock, and loaders log
+    from worker threads, so the count has a lock of its own.
+    """
+
+    def __init__(self, every=PAYLOAD_SAMPLE):
+        super().__init__()
+        self.every = max(1, every)
+        self.seen = 0
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        args = record.args if isinstance(record.args, tuple) else ()
+        if not any(isinstance(arg, Payload) for arg in args):
+            return True
+        with self.lock:
+            seen = self.seen
+            self.seen += 1
+        return seen % self.every == 0
+
+
+def setup_logging(filename=None, verbosity=0, console=True,
+                  payload_sample=PAYLOAD_SAMPLE, fmt=LOG_FORMAT):
+    """
+    Route all logging through a queue drained by a background thread.
+
+    Records are formatted on the calling thread only if their level is
+    enabled; file and console writes happen on the QueueListener thread,
+    off the request path. The listener is flushed and stopped at exit.
+
+    Args:
+        filename: log file to write, or None for console only
+        verbosity: -1 WARNING, 0 INFO, 1 or more DEBUG (2 adds HTTP
+            library logs)
+        console: also log to stderr
+        payload_sample: keep every Nth Payload record
+    """
+    global _listener
+
+    formatter = logging.Formatter(fmt)
+    handlers = []
+    if filename:
+        handlers.append(logging.FileHandler(filename))
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    stop_logging()
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(PayloadSampler(payload_sample))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(verbosity_level(verbosity))
+    # HTTP libraries log every connection at DEBUG; only show them at -vv
+    for name in ("urllib3", "httpx", "httpcore"):
+        logging.getLogger(name).setLevel(
+            logging.DEBUG if verbosity >= 2 else logging.WARNING)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def setup_logging_from_args(args, filename=None, console=True):
+    """setup_logging() driven by the flags from add_verbosity_arguments()."""
+    return setup_logging(filename, args.verbose - args.quiet, console,
+                         payload_sample=args.log_sample)
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
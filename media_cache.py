@@ -0,0 +1,104 @@
+import sqlite3
+import threading
+
+DEFAULT_PATH = "media_cache.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS media (
+    sha256 TEXT PRIMARY KEY,
+    media_id INTEGER NOT NULL,
+    size INTEGER
+);
+CREATE TABLE IF NOT EXISTS links (
+    sha256 TEXT NOT NULL,
+    ref TEXT NOT NULL,
+    ref_id TEXT NOT NULL,
+    field TEXT NOT NULL,
+    PRIMARY KEY (sha256, ref, ref_id, field)
+);
+"""
+
+
+def validators(response):
+    """Return the (ETag, Last-Modified) pair of a response."""
+    return response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+
+class MediaCache:
+    """
+    Local index of files already transferred to the Strapi media library.
+
+    Source URLs are keyed by their ETag/Last-Modified validators and map to
+    the SHA-256 of their content; each hash maps to the upload media id and
+    the (ref, refId, field) targets it has been attached to. A HEAD request
+    is then enough to tell that a file is unchanged and already uploaded.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def check(self, client, url):
+        """
+        HEAD a source URL and look up the hash of its current content.
+
+        Returns:
+            tuple: (sha256 or None, etag, last_modified)
+        """
+        response = client.head(url, allow_redirects=True)
+        response.raise_for_status()
+        etag, last_modified = validators(response)
+        return self.source_hash(url, etag, last_modified), etag, last_modified
+
+    def source_hash(self, url, etag, last_modified):
+        """SHA-256 recorded for url, if its validators are unchanged."""
+        if not etag and not last_modified:
+            return None
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT sha256 FROM sources WHERE url = ? AND etag IS ? AND last_modified IS ?",
+                (url, etag, last_modified)).fetchone()
+        return row[0] if row else None
+
+    def media_id(self, sha256):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT media_id FROM media WHERE sha256 = ?", (sha256,)).fetchone()
+        return row[0] if row else None
+
+    def is_linked(self, sha256, ref, ref_id, field):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM links WHERE sha256 = ? AND ref = ? AND ref_id = ? AND field = ?",
+                (sha256, ref, str(ref_id), field)).fetchone()
+        return row is not None
+
+    def record_source(self, url, etag, last_modified, sha256):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+                (url, etag, last_modified, sha256))
+
+    def record_media(self, sha256, media_id, size=None):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO media VALUES (?, ?, ?)",
+                (sha256, media_id, size))
+
+    def record_link(self, sha256, ref, ref_id, field):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO links VALUES (?, ?, ?, ?)",
+                (sha256, ref, str(ref_id), field))
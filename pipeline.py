@@ -0,0 +1,159 @@
+import queue
+import threading
+import time
+
+QUEUE_SIZE = 16  # Items buffered between two stages
+REPORT_INTERVAL = 5.0  # Seconds between progress lines
+
+_DONE = object()
+
+
+class Stage:
+    """
+    One step of a Pipeline.
+
+    func takes an item and returns the item for the next stage, or None
+    to drop it (e.g. nothing left to do for that row). An exception fails
+    the item; it is counted and passed to the pipeline's on_error.
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=QUEUE_SIZE):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.inbox = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self.busy = 0.0
+        self.max_depth = 0
+        self.depth_total = 0
+        self.depth_samples = 0
+        self.running = 0
+
+    def record(self, seconds, failed, depth):
+        """Count a finished item and the queue depth seen when it was taken."""
+        with self.lock:
+            self.processed += 1
+            self.failed += failed
+            self.busy += seconds
+            self.max_depth = max(self.max_depth, depth)
+            self.depth_total += depth
+            self.depth_samples += 1
+
+    def summary(self, elapsed):
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rate": round(self.processed / elapsed, 2) if elapsed else 0.0,
+            "avg_seconds": round(self.busy / self.processed, 3) if self.processed else 0.0,
+            "max_queue": self.max_depth,
+            "avg_queue": round(self.depth_total / self.depth_samples, 1)
+            if self.depth_samples else 0.0,
+        }
+
+
+class Pipeline:
+    """
+    Stages connected by bounded queues, each with its own worker threads.
+
+    Items flow through the stages in order; a full queue blocks the stage
+    feeding it, so a slow stage throttles the ones before it instead of
+    letting work pile up in memory. Each stage's throughput and queue
+    depth are printed every report_interval seconds and returned by run().
+    Items may finish out of input order.
+    """
+
+    def __init__(self, stages, on_error=None, report_interval=REPORT_INTERVAL):
+        self.stages = stages
+        self.on_error = on_error
+        self.report_interval = report_interval
+        self.started = None
+        self.stopped = threading.Event()
+
+    def _work(self, index):
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        try:
+            while True:
+                item = stage.inbox.get()
+                if item is _DONE:
+                    break
+                depth = stage.inbox.qsize()
+                start = time.monotonic()
+                try:
+                    result = stage.func(item)
+                except Exception as e:
+                    stage.record(time.monotonic() - start, True, depth)
+                    self._report_error(stage.name, item, e)
+                    continue
+                stage.record(time.monotonic() - start, False, depth)
+                if result is not None and next_stage is not None:
+                    next_stage.inbox.put(result)
+        finally:
+            # Runs even if this worker dies, so run() never waits forever
+            with stage.lock:
+                stage.running -= 1
+                last = stage.running == 0
+            if last and next_stage is not None:
+                # Every worker of this stage is done; shut the next one down
+                for _ in range(next_stage.workers):
+                    next_stage.inbox.put(_DONE)
+
+    def _report_error(self, stage_name, item, error):
+        if self.on_error is None:
+            return
+        try:
+            self.on_error(stage_name, item, error)
+        except Exception as e:
+            print(f"{stage_name}: error handler failed for {error!r}: {e}")
+
+    def _report(self):
+        while not self.stopped.wait(self.report_interval):
+            elapsed = time.monotonic() - self.started
+            parts = []
+            for stage in self.stages:
+                parts.append(f"{stage.name}: {stage.processed} done "
+                             f"({stage.processed / elapsed:.1f}/s, "
+                             f"queue {stage.inbox.qsize()})")
+            print(f"[{elapsed:.0f}s] " + " | ".join(parts))
+
+    def run(self, items):
+        """Feed items into the first stage and block until all stages drain."""
+        self.started = time.monotonic()
+        threads = []
+        for index, stage in enumerate(self.stages):
+            stage.running = stage.workers
+            for _ in range(stage.workers):
+                thread = threading.Thread(target=self._work, args=(index,), daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        reporter = threading.Thread(target=self._report, daemon=True)
+        reporter.start()
+
+        first = self.stages[0]
+        try:
+            for item in items:
+                first.inbox.put(item)
+        finally:
+            for _ in range(first.workers):
+                first.inbox.put(_DONE)
+            for thread in threads:
+                thread.join()
+            self.stopped.set()
+            reporter.join()
+
+        elapsed = time.monotonic() - self.started
+        return [stage.summary(elapsed) for stage in self.stages]
+
+
+def print_summary(summaries):
+    """Print the per-stage table returned by Pipeline.run()."""
+    print(f"{'stage':<12}{'workers':>8}{'done':>8}{'failed':>8}"
+          f"{'per sec':>9}{'avg s':>8}{'max q':>7}{'avg q':>7}")
+    for s in summaries:
+        print(f"{s['stage']:<12}{s['workers']:>8}{s['processed']:>8}{s['failed']:>8}"
+              f"{s['rate']:>9}{s['avg_seconds']:>8}{s['max_queue']:>7}{s['avg_queue']:>7}")
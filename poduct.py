@@ -1,5 +1,7 @@
-import requests
-import json
+from category_resolver import CategoryResolver, slug
+from csv_source import load_records
+from strapi_client import get_client
+from strapi_mirror import open_mirror
 
 file_name = "./csvjson.json"
 # file data
@@ -38,96 +40,34 @@ file_name = "./csvjson.json"
 #   }]
 
 # Main URL for API calls
-main_url = "http://49.205.180.247:3007/api/product-categories"
-product_post_url = "http://49.205.180.247:3007/api/products"
-# Check for the parent category
+PRODUCTS_URL = "/api/products"
 
-for data in json.load(open(file_name)):
-    response = requests.get(
-        # Fix URL formatting
-        f"{main_url}?filters[Name][$eq]={data['parent_category']}")
-    print("GET Response:", response.json())
+client = get_client()
+categories = CategoryResolver(client, mirror=open_mirror(client))
 
-    # Extract the parent category if it exists
-    parent_category_document_id = None
-    if response.status_code == 200 and response.json().get("data"):
-        # Adjusted to match typical Strapi response structure
-        parent_category_document_id = response.json()[
-            "data"][0].get("documentId")
-    else:
-        # Create the parent category if it doesn't exist
-        payload = {
-            "data": {
-                "Name": data["parent_category"],
-                "level": "1",
-                "show_on_eshop": "true",
-            }
-        }
-        # Use `json` to send payload as JSON
-        post_response = requests.post(main_url, json=payload)
-        if post_response.status_code == 200 or post_response.status_code == 201:
-            parent_category_document_id = post_response.json().get("documentId")
-        else:
-            print("Failed to create Parent Category:", post_response.text)
+# Create the missing categories of the whole file up front, one concurrent
+# wave per level, so the product loop below only hits the index
+categories.ensure_paths(
+    [(data["parent_category"], None), (data["child_category"], None),
+     (data["sub_child_category"], None)]
+    for data in load_records(file_name))
+
+for data in load_records(file_name):
+    # Check for the parent category, creating it if it doesn't exist
+    parent_category_document_id = categories.get_or_create_by_name(
+        data["parent_category"], "1")
 
     # Check for the child category
     child_category_document_id = None
     if parent_category_document_id:
-        response = requests.get(
-            f"{main_url}?filters[Name][$eq]={data['child_category']}")
-
-        # Extract the child category if it exists
-        if response.status_code == 200 and response.json().get("data"):
-            # Adjusted to match typical Strapi response structure
-            child_category_document_id = response.json()[
-                "data"][0].get("documentId")
-        else:
-            # Create the child category if it doesn't exist
-            payload = {
-                "data": {
-                    "Name": data["child_category"],
-                    "level": "2",
-                    "show_on_eshop": "true",
-                    "parent_category": {
-                        "connect": parent_category_document_id
-                    },
-                }
-            }
-            post_response = requests.post(main_url, json=payload)
-            if post_response.status_code == 200 or post_response.status_code == 201:
-                child_category_document_id = post_response.json().get("documentId")
-            else:
-                print("Failed to create Child Category:", post_response.text)
+        child_category_document_id = categories.get_or_create_by_name(
+            data["child_category"], "2", parent_category_document_id)
 
         # Check for the sub-child category
         sub_child_category_document_id = None
         if child_category_document_id:
-            response = requests.get(
-                f"{main_url}?filters[Name][$eq]={data['sub_child_category']}")
-
-            # Extract the sub-child category if it exists
-            if response.status_code == 200 and response.json().get("data"):
-                # Adjusted to match typical Strapi response structure
-                sub_child_category_document_id = response.json()[
-                    "data"][0].get("documentId")
-            else:
-                # Create the sub-child category if it doesn't exist
-                payload = {
-                    "data": {
-                        "Name": data["sub_child_category"],
-                        "level": "3",
-                        "show_on_eshop": "true",
-                        "parent_category": {
-                            "connect": child_category_document_id
-                        },
-                    }
-                }
-                post_response = requests.post(main_url, json=payload)
-                if post_response.status_code == 200 or post_response.status_code == 201:
-                    sub_child_category_document_id = post_response.json().get("documentId")
-                else:
-                    print("Failed to create Sub-Child Category:",
-                          post_response.text)
+            sub_child_category_document_id = categories.get_or_create_by_name(
+                data["sub_child_category"], "3", child_category_document_id)
 
             # Create the product
             if sub_child_category_document_id:
@@ -146,7 +86,7 @@ for data in json.load(open(file_name)):
                         },
                     }
                 }
-                post_response = requests.post(product_post_url, json=payload)
+                post_response = client.post(PRODUCTS_URL, json=payload)
                 if post_response.status_code == 200 or post_response.status_code == 201:
                     print("Product Created Successfully")
                 else:
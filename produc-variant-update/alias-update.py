@@ -1,10 +1,17 @@
-import json
+import argparse
+import os
+import sys
+import threading
 import requests
 from collections import defaultdict
 
-API_URL = "http://49.205.180.247:3007"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from strapi_client import get_client, run_concurrently  # noqa: E402
+
+client = get_client()
 PRODUCTS_URL = "/api/product-variants"
 PAGE_SIZE = 100
+UPDATE_WORKERS = 8  # Alias PUTs in flight at once
 
 
 class StatusTracker:
@@ -13,6 +20,16 @@ class StatusTracker:
         self.successful_updates = 0
         self.failed_updates = 0
         self.errors = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def add_success(self):
+        with self.lock:
+            self.successful_updates += 1
+
+    def add_failure(self, error_type, error_msg):
+        with self.lock:
+            self.failed_updates += 1
+            self.errors[error_type].append(error_msg)
 
     def print_status(self):
         print("\n" + "="*50)
@@ -32,20 +49,26 @@ class StatusTracker:
         print("="*50)
 
 
-def fetch_products_variants(page, status_tracker):
+def fetch_products_variants(status_tracker, spool_path=None):
     """
-    Fetch products from the API with pagination.
+    Snapshot every variant without an alias before any of them is updated.
+
+    Only the fields needed to build the alias are fetched, so the scan is
+    small and the work list does not shrink while aliases are being set.
     """
     try:
-        url = f"{API_URL}{PRODUCTS_URL}?pagination[page]={page}&pagination[pageSize]={PAGE_SIZE}&filters[alias][$null]=true&populate[0]=state&populate[1]=city"
-        response_search = requests.get(url)
-        response_search.raise_for_status()
-        return response_search.json()
+        return client.snapshot(
+            PRODUCTS_URL,
+            params={"filters[alias][$null]": "true"},
+            fields=("documentId", "height", "width", "tickness"),
+            populate={"state": ["name"], "city": ["name"]},
+            spool_path=spool_path,
+            page_size=PAGE_SIZE,
+        )
     except requests.exceptions.RequestException as req_err:
-        status_tracker.errors['fetch_errors'].append(
-            f"Page {page}: {str(req_err)}")
+        status_tracker.errors['fetch_errors'].append(str(req_err))
         print(f"Error fetching products: {req_err}")
-        return None
+        return []
 
 
 def update_product_variants(product, status_tracker):
@@ -56,8 +79,7 @@ def update_product_variants(product, status_tracker):
         # Check if required data exists
         if not product.get('state'):
             error_msg = f"Missing state data for product {product.get('documentId', 'Unknown ID')}"
-            status_tracker.errors['data_errors'].append(error_msg)
-            status_tracker.failed_updates += 1
+            status_tracker.add_failure('data_errors', error_msg)
             print(error_msg)
             return
 
@@ -75,59 +97,52 @@ def update_product_variants(product, status_tracker):
             }
         }
 
-        response_update = requests.put(
-            f"{API_URL}{PRODUCTS_URL}/{product['documentId']}",
+        response_update = client.put(
+            f"{PRODUCTS_URL}/{product['documentId']}",
             json=product_update_data
         )
         response_update.raise_for_status()
 
-        status_tracker.successful_updates += 1
+        status_tracker.add_success()
         print(
             f"Successfully updated product {product['documentId']} with alias: {alias}")
 
     except requests.exceptions.RequestException as req_err:
         error_msg = f"Request error updating product {product.get('documentId', 'Unknown ID')}: {str(req_err)}"
-        status_tracker.errors['api_errors'].append(error_msg)
-        status_tracker.failed_updates += 1
+        status_tracker.add_failure('api_errors', error_msg)
         print(error_msg)
 
     except KeyError as key_err:
         error_msg = f"Missing key {key_err} for product {product.get('documentId', 'Unknown ID')}"
-        status_tracker.errors['data_errors'].append(error_msg)
-        status_tracker.failed_updates += 1
+        status_tracker.add_failure('data_errors', error_msg)
         print(error_msg)
 
     except Exception as e:
         error_msg = f"Unexpected error for product {product.get('documentId', 'Unknown ID')}: {str(e)}"
-        status_tracker.errors['unexpected_errors'].append(error_msg)
-        status_tracker.failed_updates += 1
+        status_tracker.add_failure('unexpected_errors', error_msg)
         print(error_msg)
 
 
 def main():
-    status_tracker = StatusTracker()
-    page = 1
-
-    while True:
-        print(f"\nProcessing page {page}...")
-        products_data_variants = fetch_products_variants(page, status_tracker)
+    parser = argparse.ArgumentParser(
+        description="Set aliases on product variants that have none.")
+    parser.add_argument("--workers", type=int, default=UPDATE_WORKERS,
+                        help="Alias updates in flight at once")
+    parser.add_argument("--spool",
+                        help="Keep the variant snapshot in this JSONL file instead of memory")
+    args = parser.parse_args()
 
-        if not products_data_variants or not products_data_variants.get("data"):
-            break
-
-        products = products_data_variants["data"]
-        status_tracker.total_products += len(products)
+    status_tracker = StatusTracker()
 
-        for product in products:
-            update_product_variants(product, status_tracker)
+    print("\nSnapshotting variants without an alias...")
+    products = fetch_products_variants(status_tracker, args.spool)
 
-        # Check if we've processed all pages
-        total_pages = products_data_variants.get(
-            "meta", {}).get("pagination", {}).get("pageCount", 0)
-        if page >= total_pages:
-            break
+    def update(product):
+        update_product_variants(product, status_tracker)
 
-        page += 1
+    # Counted on this thread as results come back, no lock needed
+    for _ in run_concurrently(update, products, max(1, args.workers)):
+        status_tracker.total_products += 1
 
     status_tracker.print_status()
 
@@ -1,69 +1,115 @@
-import json
-import requests
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from csv_source import Column, load_records, to_int  # noqa: E402
+from logging_setup import (  # noqa: E402
+    Payload, add_verbosity_arguments, setup_logging_from_args, truncate)
+from strapi_client import UPDATE_WORKERS, get_client  # noqa: E402
+from strapi_mirror import open_mirror  # noqa: E402
+from variant_sync import sync_variants, variant_payload  # noqa: E402
 
 # Configuration
-API_URL = "http://49.205.180.247:3007/api"  # Replace with your Strapi base URL
+API_URL = "/api"  # Resolved against STRAPI_URL by the shared client
+client = get_client()
 # Base URL for images
 IMAGE_BASE_URL = "https://www.centuryply.com/centuryveneers/image/big/"
 
-# Load JSON data
-
-
-def load_json(file_path):
-    with open(file_path, "r") as file:
-        return json.load(file)
+logger = logging.getLogger(__name__)
 
+# Columns of the plywood price sheets. The door sheets (door-sanik.csv)
+# price per city in "new_price"; the Plywood.xlsx exports price per state
+# in "New Price" and have no city column, so their variants are state-wide.
+PLYWOOD_COLUMNS = {
+    "document_id": "document_id",
+    "city_document_id": "city_document_id",
+    "product": "product",
+    "Width": Column("Width", to_int),
+    "Length": Column("Length", to_int),
+    "Thickness": Column("Thickness", to_int),
+    "new_price": Column("new_price", to_int),
+    "New Price": Column("New Price", to_int),
+}
 
-def main(json_file):
-    products = load_json(json_file)
 
+def plywood_variants(products, product_id):
+    """Yield the variant row of product_id for every line of a plywood price sheet."""
     for product in products:
-        product_state = product.get("document_id")
-        product_city = product.get("city_document_id")
-        product_id = product.get("product")
-        width = product.get("Width")
-        length = product.get("Length")
-        thickness = product.get("Thickness")
         new_price = product.get("new_price")
+        if new_price is None or new_price == "":
+            new_price = product.get("New Price")
+        if isinstance(new_price, str):
+            # csvjson files keep the sheet's "2,496" formatting
+            new_price = to_int(new_price)
+
+        yield {
+            "state": product.get("document_id"),
+            "city": product.get("city_document_id"),
+            # product.get("product") once the sheets carry the right id
+            "product": product_id,
+            "width": product.get("Width") or None,
+            "height": product.get("Length") or None,
+            "tickness": product.get("Thickness") or None,
+            "price": new_price or None,
+        }
 
-        if new_price:
-            # Remove commas and convert to an integer
-            new_price = int(new_price.replace(",", ""))
 
-        print("product_state", product_state)
+def main(input_file, product_id):
+    products = load_records(input_file, PLYWOOD_COLUMNS)
+
+    for row in plywood_variants(products, product_id):
+        logger.debug("product_state %s", row["state"])
         url = f"{API_URL}/product-variants"
-        payload = {
-            "data": {
-                "state": {"connect": [product_state]} if product_state else None,
-                'city': {"connect": [product_city]} if product_city else None,
-                # "product": {"connect": [product_id]} if product_id else None,
-                "product": {"connect": ["iwu63x1ilvswhnn5c9e9doba"]},
-                "width": width if width else None,
-                "height": length if length else None,
-                "tickness": thickness if thickness else None,
-                "price": new_price if new_price else None
-            }
-        }
-        # Remove None values from the payload
-        payload["data"] = {k: v for k,
-                           v in payload["data"].items() if v is not None}
+        payload = {"data": variant_payload(row)}
 
-        print("Payload being sent:", json.dumps(payload, indent=4))
-        print("URL:", url)
+        logger.debug("Payload being sent to %s: %s", url, Payload(payload))
 
-        response = requests.post(url, json=payload)
-        print("Response status code:", response.status_code)
-        print("Response text:", response.text)
+        response = client.post(url, json=payload)
+        logger.debug("Response %s: %s", response.status_code,
+                     Payload(response.text))
 
         if response.status_code not in (200, 201):
             raise Exception(
-                f"Failed to create product: {response.status_code}, {response.text}")
+                f"Failed to create product: {response.status_code}, {truncate(response.text)}")
         else:
-            print(
-                f"Product created successfully for {product_id}. Response: {response.text}")
+            logger.info("Product created successfully for %s", row["product"])
+
+
+def sync(input_file, product_id, prune=False, max_workers=UPDATE_WORKERS):
+    """Create or re-price only the variants that differ from the sheet."""
+    rows = plywood_variants(load_records(input_file, PLYWOOD_COLUMNS), product_id)
+    stats = sync_variants(client, rows, prune, max_workers, logger=logger,
+                          mirror=open_mirror(client))
+    logger.info("Created %d, updated %d, deleted %d, unchanged %d, failed %d",
+                stats["created"], stats["updated"], stats["deleted"],
+                stats["unchanged"], stats["failed"])
+    if stats["stale"]:
+        logger.info("%d stale variants left in place (use --prune)", stats["stale"])
 
 
 if __name__ == "__main__":
-    # Replace with the path to your JSON file
-    json_file_path = "/Users/shubhamk/Developer/office_work/century-product-work/produc-variant-update/club-prime-dore.json"
-    main(json_file_path)
+    parser = argparse.ArgumentParser(
+        description="Create plywood product variants.")
+    # Each sheet prices a different product (club-prime-dore.json is the
+    # Club Prime door, door-sanik.csv the Sainik door), so neither the
+    # file nor the product has a default
+    parser.add_argument("--file", required=True,
+                        help="Plywood price CSV, or a csvjson JSON file")
+    parser.add_argument("--product", required=True,
+                        help="documentId of the product the sheet's rows are variants of")
+    parser.add_argument("--sync", action="store_true",
+                        help="Only create missing variants and update changed prices")
+    parser.add_argument("--prune", action="store_true",
+                        help="With --sync, delete variants of the product not in the sheet")
+    parser.add_argument("--workers", type=int, default=UPDATE_WORKERS,
+                        help="With --sync, variant writes in flight at once")
+    add_verbosity_arguments(parser)
+    args = parser.parse_args()
+    setup_logging_from_args(args)
+
+    if args.sync:
+        sync(args.file, args.product, args.prune, max(1, args.workers))
+    else:
+        main(args.file, args.product)
@@ -1,8 +1,10 @@
 import json
+import os
+import sys
 import requests
 import logging
 from datetime import datetime
-from typing import Dict, Optional, Any, List
+from typing import Dict, Any, Iterator, List
 
 # Configure logging
 logging.basicConfig(
@@ -15,10 +17,15 @@ logging.basicConfig(
     ]
 )
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from strapi_client import get_client  # noqa: E402
+from strapi_mirror import open_mirror  # noqa: E402
+
 # API Configuration
-API_URL = "http://49.205.180.247:3007"
+client = get_client()
+mirror = open_mirror(client)
 PRODUCTS_URL = "/api/products"
-PAGE_SIZE = 100
+SOURCE_CATEGORY_ID = "vrurel0uce9n73vp0l7q32y4"
 
 
 class ProductUpdateStatus:
@@ -50,25 +57,22 @@ class ProductUpdateStatus:
         }
 
 
-def fetch_products(page: int) -> Optional[Dict[str, Any]]:
+def fetch_products() -> Iterator[Dict[str, Any]]:
     """
-    Fetch products from the API with pagination.
+    Fetch the source category's products from the local mirror.
 
-    Args:
-        page: Page number to fetch
+    The mirror is refreshed with the products changed since the last
+    run first; if that fails its current copy is used.
 
-    Returns:
-        Dictionary containing API response or None if request fails
+    Yields:
+        Product dictionaries in id order
     """
     try:
-        url = f"{API_URL}{PRODUCTS_URL}?pagination[page]={page}&pagination[pageSize]={PAGE_SIZE}&filters[product_categories][documentId][$in]=vrurel0uce9n73vp0l7q32y4"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-
+        mirror.ensure(["products"])
     except requests.exceptions.RequestException as e:
-        logging.error(f"Failed to fetch products from page {page}: {str(e)}")
-        return None
+        logging.error(f"Failed to refresh products, using the local mirror: {str(e)}")
+    yield from mirror.find(
+        "products", linked={"product_categories": SOURCE_CATEGORY_ID})
 
 
 def update_product(product: Dict, status: ProductUpdateStatus) -> None:
@@ -112,11 +116,7 @@ def update_product(product: Dict, status: ProductUpdateStatus) -> None:
             "Ordering": product.get('id')
         }
 
-        response = requests.post(
-            f"{API_URL}{PRODUCTS_URL}",
-            json=product_page_data,
-            timeout=30
-        )
+        response = client.post(PRODUCTS_URL, json=product_page_data)
         response.raise_for_status()
 
         response_data = response.json()  # Parse JSON response
@@ -147,34 +147,15 @@ def main():
     Main function to coordinate product updates with status tracking.
     """
     status = ProductUpdateStatus()
-    page = 1
 
     try:
-        while True:
-            logging.info(f"Fetching page {page}...")
-            products_data = fetch_products(page)
-            if not products_data or not products_data.get("data"):
-                break
-
-            products = products_data["data"]
-            total_products = products_data.get("meta", {}).get(
-                "pagination", {}).get("total", 0)
-
-            if total_products == 0:
-                logging.warning("No products found in the response")
-                break
-
-            logging.info(
-                f"Processing {len(products)} products from page {page}")
-
-            for product in products:
-                status.total_products += 1
-                update_product(product, status)
-
-            if len(products) < PAGE_SIZE:
-                break
+        logging.info("Fetching products...")
+        for product in fetch_products():
+            status.total_products += 1
+            update_product(product, status)
 
-            page += 1
+        if status.total_products == 0:
+            logging.warning("No products found in the response")
 
         # Log final summary
         summary = status.get_summary()
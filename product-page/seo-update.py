@@ -1,41 +1,51 @@
-import json
-import requests
+import os
+import sys
 import time
-from typing import Optional, Dict, Any
+import argparse
+import requests
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, List
 
-API_URL = "http://49.205.180.247:3007"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rate_limiter import AdaptiveRateLimiter, MAX_CONCURRENCY, MAX_RATE  # noqa: E402
+from strapi_client import get_client, run_concurrently  # noqa: E402
+
+client = get_client()
 PRODUCTS_URL = "/api/products"
-PAGE_SIZE = 25
+PAGE_SIZE = 100
+FETCH_WORKERS = 4  # Pages fetched concurrently
+MAX_ATTEMPTS = 5  # Tries per update when Strapi answers 429/5xx
+MAX_RETRY_AFTER = 60  # Cap in seconds on a server-requested wait
+
+# Shared by every update worker; replaced in main() when limits are passed
+limiter = AdaptiveRateLimiter()
 
 
-def fetch_products(page: int) -> Optional[Dict[str, Any]]:
+def fetch_products() -> List[Dict[str, Any]]:
     """
-    Fetch products that do not have SEO set.
+    Snapshot the products that do not have SEO set.
+
+    The list is captured before any update so that setting SEO does not
+    shrink the filtered result set under the page cursor.
 
-    Args:
-        page: Page number to fetch
     Returns:
-        JSON response or None if request fails
+        Product dictionaries with just the fields SEO generation needs
     """
     try:
-        params = {
-            "pagination[page]": page,
-            "pagination[pageSize]": PAGE_SIZE,
-            "filters[product_categories][documentId][$in]": "rn2yfgzt2qu2jx6y0ja4xebt",
-            "filters[seo][$null]": "true",
-            "populate": "product_categories",
-        }
-
-        response_search = requests.get(
-            f"{API_URL}{PRODUCTS_URL}",
-            params=params,
-            timeout=30
+        return client.snapshot(
+            PRODUCTS_URL,
+            params={
+                "filters[product_categories][documentId][$in]": "rn2yfgzt2qu2jx6y0ja4xebt",
+                "filters[seo][$null]": "true",
+            },
+            fields=("documentId", "Name", "model_code"),
+            populate={"product_categories": ["Name", "level"]},
+            page_size=PAGE_SIZE,
+            max_workers=FETCH_WORKERS,
         )
-        response_search.raise_for_status()
-        return response_search.json()
     except requests.exceptions.RequestException as req_err:
         print(f"❌ Error fetching products: {req_err}")
-        return None
+        return []
 
 
 def generate_seo_metadata(product: Dict[str, Any]) -> tuple[str, str]:
@@ -68,10 +78,28 @@ def generate_seo_metadata(product: Dict[str, Any]) -> tuple[str, str]:
     return metaTitle, metaDescription
 
 
+def retry_after(response: requests.Response) -> float:
+    """Seconds the Retry-After header asks for, 0 when absent or invalid."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return 0.0
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return 0.0
+    return min(MAX_RETRY_AFTER, max(0.0, seconds))
+
+
 def update_product(product: Dict[str, Any]) -> bool:
     """
     Update product page data with SEO metadata.
 
+    A 429/5xx answer makes the limiter back off; the PUT is then sent
+    again, after Retry-After if the server gave one, up to MAX_ATTEMPTS.
+
     Args:
         product: Product dictionary containing details
     Returns:
@@ -95,11 +123,17 @@ def update_product(product: Dict[str, Any]) -> bool:
             }
         }
 
-        response_update = requests.put(
-            f"{API_URL}{PRODUCTS_URL}/{product_id}",
-            json=product_page_data,
-            timeout=30
-        )
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            with limiter.slot() as slot:
+                response_update = client.put(
+                    f"{PRODUCTS_URL}/{product_id}", json=product_page_data)
+                slot.status = response_update.status_code
+            status = response_update.status_code
+            if (status != 429 and status < 500) or attempt == MAX_ATTEMPTS:
+                break
+            print(f"⏳ Throttled ({status}) updating {product.get('model_code', 'Unknown')}, "
+                  f"retrying ({attempt}/{MAX_ATTEMPTS - 1})")
+            time.sleep(retry_after(response_update))
         response_update.raise_for_status()
 
         print(f"✅ Product page updated for {
@@ -117,52 +151,32 @@ def update_product(product: Dict[str, Any]) -> bool:
 
 
 def main():
-    page = 1
+    global limiter
+
+    parser = argparse.ArgumentParser(
+        description="Backfill SEO metadata for products that have none.")
+    parser.add_argument("--max-rate", type=float, default=MAX_RATE,
+                        help="Upper bound on updates per second")
+    parser.add_argument("--max-workers", type=int, default=MAX_CONCURRENCY,
+                        help="Upper bound on updates in flight")
+    args = parser.parse_args()
+    limiter = AdaptiveRateLimiter(max_rate=args.max_rate,
+                                  max_concurrency=max(1, args.max_workers))
+
     successful_updates = 0
     total_products = 0
-    has_more_pages = True
 
     try:
-        while has_more_pages:
-            print(f"\n📄 Processing page {page}...")
-            products_data = fetch_products(page)
-
-            if not products_data:
-                print("❌ Failed to fetch products data")
-                break
+        print("\n📄 Fetching products without SEO...")
+        products = fetch_products()
+        print(f"📊 {len(products)} products to update")
 
-            # Extract pagination metadata
-            pagination = products_data.get("meta", {}).get("pagination", {})
-            current_page = pagination.get("page", 0)
-            total_pages = pagination.get("pageCount", 0)
-            total_items = pagination.get("total", 0)
-
-            print(f"📊 Page {current_page} of {
-                  total_pages} (Total items: {total_items})")
-
-            if not products_data.get("data"):
-                print("⚠️ No products found on this page")
-                break
-
-            batch_products = products_data["data"]
-            batch_count = len(batch_products)
-            total_products += batch_count
-
-            print(f"🔄 Processing {batch_count} products on this page...")
-
-            for idx, product in enumerate(batch_products, 1):
-                print(f"📦 Product {idx}/{batch_count} on page {page}...")
-                if update_product(product):
-                    successful_updates += 1
-                time.sleep(0.5)  # 500ms delay between products
-
-            # Check if we've reached the last page
-            has_more_pages = current_page < total_pages
-            page += 1
-
-            if has_more_pages:
-                print(f"⏳ Waiting before processing next page...")
-                time.sleep(1)  # 1 second delay between pages
+        # The limiter paces the workers, ramping up while Strapi stays healthy
+        for success in run_concurrently(update_product, products,
+                                        limiter.max_concurrency):
+            total_products += 1
+            if success:
+                successful_updates += 1
 
     except KeyboardInterrupt:
         print("\n⚠️ Script interrupted by user")
@@ -172,6 +186,13 @@ def main():
         print(f"Successful updates: {successful_updates}")
         print(f"Failed updates: {total_products - successful_updates}")
 
+        stats = limiter.summary()
+        print(f"Rate: current {stats['current_rate']}/s "
+              f"(concurrency {stats['current_concurrency']}), "
+              f"achieved {stats['achieved_rate']}/s")
+        print(f"Latency: p50 {stats['p50_latency']}s, "
+              f"p95 {stats['p95_latency']}s, backoffs {stats['backoffs']}")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,168 @@
+import threading
+import time
+from contextlib import contextmanager
+
+INITIAL_RATE = 2.0  # Requests per second to start from
+MIN_RATE = 0.5
+MAX_RATE = 50.0
+RATE_STEP = 1.0  # Minimum increase per healthy window
+MAX_CONCURRENCY = 16
+LATENCY_TARGET = 1.0  # Seconds; p95 above this stops the ramp-up
+MAX_ERROR_RATE = 0.02
+WINDOW_SIZE = 20  # Completed requests per adjustment
+
+
+class Slot:
+    """Outcome of one request, filled in by the caller inside limiter.slot()."""
+
+    def __init__(self):
+        self.status = None
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket with an AIMD-controlled rate and concurrency limit.
+
+    Every WINDOW_SIZE completed requests the limiter looks at p95 latency
+    and error rate. A healthy window doubles the rate until the first
+    backoff, then raises it by 20% (at least RATE_STEP), and adds one slot
+    of concurrency. An unhealthy window, or any 429/5xx response, halves
+    both; requests already in flight at a backoff cannot trigger another.
+    Safe to share between threads.
+    """
+
+    def __init__(self, rate=INITIAL_RATE, min_rate=MIN_RATE, max_rate=MAX_RATE,
+                 concurrency=2, max_concurrency=MAX_CONCURRENCY,
+                 latency_target=LATENCY_TARGET, max_error_rate=MAX_ERROR_RATE,
+                 window_size=WINDOW_SIZE):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.concurrency = min(concurrency, max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.latency_target = latency_target
+        self.max_error_rate = max_error_rate
+        self.window_size = window_size
+
+        self.cond = threading.Condition()
+        self.tokens = 1.0
+        self.last_refill = time.monotonic()
+        self.in_flight = 0
+        self.window = []
+        self.slow_start = True
+        self.last_decrease = 0.0
+
+        self.started = None
+        self.completed = 0
+        self.failed = 0
+        self.backoffs = 0
+        self.latencies = []
+
+    def _refill(self, now):
+        capacity = max(1.0, self.rate)
+        self.tokens = min(capacity, self.tokens +
+                          (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def acquire(self):
+        """Block until a token and a concurrency slot are both available."""
+        with self.cond:
+            if self.started is None:
+                self.started = time.monotonic()
+            while True:
+                self._refill(time.monotonic())
+                if self.in_flight < self.concurrency and self.tokens >= 1:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    return
+                timeout = None
+                if self.tokens < 1:
+                    timeout = (1 - self.tokens) / self.rate
+                self.cond.wait(timeout)
+
+    def release(self, latency, failed=False, throttled=False, started=None):
+        """Record a finished request and adjust the rate if a window is full."""
+        with self.cond:
+            if started is not None and started < self.last_decrease:
+                # Sent before the last backoff took effect
+                throttled = False
+            self.in_flight -= 1
+            self.completed += 1
+            self.failed += failed
+            self.latencies.append(latency)
+            self.window.append((latency, failed))
+
+            if throttled:
+                self._decrease()
+            elif len(self.window) >= self.window_size:
+                latencies = sorted(latency for latency, _ in self.window)
+                p95 = latencies[int(0.95 * (len(latencies) - 1))]
+                error_rate = sum(f for _, f in self.window) / len(self.window)
+                if error_rate > self.max_error_rate or p95 > 2 * self.latency_target:
+                    self._decrease()
+                elif p95 <= self.latency_target:
+                    self._increase()
+                else:
+                    self.window = []
+            self.cond.notify_all()
+
+    def _increase(self):
+        if self.slow_start:
+            step = self.rate
+        else:
+            step = max(RATE_STEP, self.rate * 0.2)
+        self.rate = min(self.max_rate, self.rate + step)
+        self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+        self.window = []
+
+    def _decrease(self):
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.concurrency = max(1, self.concurrency // 2)
+        self.tokens = min(self.tokens, 0.0)
+        self.backoffs += 1
+        self.slow_start = False
+        self.last_decrease = time.monotonic()
+        self.window = []
+
+    @contextmanager
+    def slot(self):
+        """
+        Hold a request slot for the duration of the block.
+
+        Set slot.status to the HTTP status code; an exception escaping the
+        block counts as a failure.
+        """
+        self.acquire()
+        slot = Slot()
+        start = time.monotonic()
+        try:
+            yield slot
+        except Exception:
+            self.release(time.monotonic() - start, failed=True, started=start)
+            raise
+        status = slot.status or 0
+        throttled = status == 429 or status >= 500
+        self.release(time.monotonic() - start, failed=throttled or status >= 400,
+                     throttled=throttled, started=start)
+
+    def summary(self):
+        """Return the current and achieved rates with latency percentiles."""
+        with self.cond:
+            elapsed = time.monotonic() - self.started if self.started else 0
+            latencies = sorted(self.latencies)
+
+            def percentile(p):
+                if not latencies:
+                    return 0.0
+                return latencies[int(p * (len(latencies) - 1))]
+
+            return {
+                "completed": self.completed,
+                "failed": self.failed,
+                "backoffs": self.backoffs,
+                "current_rate": round(self.rate, 2),
+                "current_concurrency": self.concurrency,
+                "achieved_rate": round(self.completed / elapsed, 2) if elapsed else 0.0,
+                "p50_latency": round(percentile(0.50), 3),
+                "p95_latency": round(percentile(0.95), 3),
+            }
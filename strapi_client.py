@@ -0,0 +1,298 @@
+import concurrent.futures
+import json
+import os
+import threading
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Base URL of the Strapi server, overridable with the STRAPI_URL environment variable
+DEFAULT_BASE_URL = "http://49.205.180.247:3007"
+DEFAULT_TIMEOUT = 30  # Seconds, applied to every request without an explicit timeout
+POOL_SIZE = 32  # Keep-alive connections kept open per host
+LOOKUP_CHUNK_SIZE = 100  # Values per $in filter in bulk lookups
+PAGE_SIZE = 100  # Strapi's default maxLimit for pagination[pageSize]
+FETCH_WORKERS = 8  # Pages fetched concurrently by iter_collection
+UPDATE_WORKERS = 8  # Writes in flight in run_concurrently
+
+_clients = {}
+_END = object()
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one.
+
+    The first caller for a key runs the function; callers arriving while
+    it is in flight wait for it and get the same result or exception.
+    The key is forgotten once the call returns, so results are not
+    cached: a get-or-create should check its own index again inside the
+    call, so a late caller does not create the record a second time.
+    Safe to share between threads.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}  # key -> Future of the call in flight
+
+    def do(self, key, func, *args, **kwargs):
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = self.calls[key] = concurrent.futures.Future()
+        if not leader:
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.calls[key]
+
+
+class StrapiClient:
+    """
+    Thin wrapper over a pooled requests.Session for the Strapi REST API.
+
+    Paths are resolved against the configured base URL ("/api/products"),
+    absolute URLs are passed through unchanged so downloads from other
+    hosts share the same session. Concurrent lookups and get-or-creates
+    of the same key are coalesced through coalesce().
+    """
+
+    def __init__(self, base_url=None, timeout=DEFAULT_TIMEOUT, pool_size=POOL_SIZE):
+        self.base_url = (base_url or os.environ.get(
+            "STRAPI_URL", DEFAULT_BASE_URL)).rstrip("/")
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.headers.update({"Connection": "keep-alive"})
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=pool_size,
+            # Only idempotent requests are retried on connection errors
+            max_retries=Retry(total=3, connect=3, read=0, backoff_factor=0.5,
+                              status_forcelist=(502, 503, 504),
+                              allowed_methods=("GET", "HEAD")),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.flights = SingleFlight()
+
+    def url(self, path):
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}{path}"
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, self.url(path), **kwargs)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def coalesce(self, key, func, *args, **kwargs):
+        """Run func once for all threads asking for key at the same time."""
+        return self.flights.do(key, func, *args, **kwargs)
+
+    def get_json(self, path, params=None):
+        """
+        GET and decode a response, shared by concurrent identical requests.
+
+        The returned data may be handed to several callers, so treat it
+        as read-only.
+        """
+        key = ("GET", path, tuple(sorted((params or {}).items())))
+        return self.coalesce(key, self._get_json, path, params)
+
+    def _get_json(self, path, params):
+        response = self.get(path, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    def head(self, path, **kwargs):
+        return self.request("HEAD", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def fetch_page(self, path, params=None, page=1, page_size=PAGE_SIZE):
+        """Fetch one page of a collection and return the decoded response."""
+        query = dict(params or {})
+        query["pagination[page]"] = page
+        query["pagination[pageSize]"] = page_size
+        response = self.get(path, params=query)
+        response.raise_for_status()
+        return response.json()
+
+    def iter_collection(self, path, params=None, page_size=PAGE_SIZE,
+                        max_workers=FETCH_WORKERS):
+        """
+        Yield every row of a collection, fetching pages concurrently.
+
+        Page 1 is read first to learn meta.pagination.pageCount, the rest
+        are fanned out over a bounded thread pool. Rows are yielded in page
+        order and at most max_workers pages are held in memory at once.
+
+        Args:
+            path: Collection path, may already carry a query string
+            params: Extra query parameters (filters, populate, fields)
+            page_size: Rows per page
+            max_workers: Pages in flight at once
+        """
+        first = self.fetch_page(path, params, 1, page_size)
+        yield from first.get("data", [])
+
+        page_count = first.get("meta", {}).get(
+            "pagination", {}).get("pageCount", 1)
+        if page_count <= 1:
+            return
+
+        pages = iter(range(2, page_count + 1))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = deque(
+                executor.submit(self.fetch_page, path, params, page, page_size)
+                for _, page in zip(range(max_workers), pages))
+            while pending:
+                data = pending.popleft().result()
+                page = next(pages, None)
+                if page is not None:
+                    pending.append(executor.submit(
+                        self.fetch_page, path, params, page, page_size))
+                yield from data.get("data", [])
+
+    def snapshot(self, path, params=None, fields=("documentId",), populate=None,
+                 spool_path=None, page_size=PAGE_SIZE, max_workers=FETCH_WORKERS):
+        """
+        Capture the rows matching a filter before any of them are modified.
+
+        Jobs that update the very field they filter on (e.g. alias $null)
+        shrink the result set under a page cursor and skip rows. Taking a
+        snapshot of just the needed fields first gives a fixed work list.
+
+        Args:
+            path: Collection path
+            params: Filters for the rows to capture
+            fields: Scalar fields to fetch, documentId alone by default
+            populate: Optional {relation: [fields]} to include
+            spool_path: Write the rows to this JSONL file and stream them
+                back from disk instead of keeping them in memory
+
+        Returns:
+            list or iterator of row dicts, sorted by id
+        """
+        query = dict(params or {})
+        query["sort[0]"] = "id:asc"
+        for i, field in enumerate(fields):
+            query[f"fields[{i}]"] = field
+        for relation, relation_fields in (populate or {}).items():
+            for i, field in enumerate(relation_fields):
+                query[f"populate[{relation}][fields][{i}]"] = field
+
+        rows = self.iter_collection(path, query, page_size, max_workers)
+        if not spool_path:
+            return list(rows)
+
+        with open(spool_path, "w") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+        return _read_spool(spool_path)
+
+    def lookup(self, path, field, values, chunk_size=LOOKUP_CHUNK_SIZE):
+        """
+        Resolve many field values to documentIds with chunked $in filters.
+
+        Args:
+            path: Collection path, e.g. "/api/products"
+            field: Field to match, e.g. "model_code"
+            values: Values to resolve
+            chunk_size: Values per request
+
+        Returns:
+            dict: value -> documentId for every value that was found
+        """
+        values = list(dict.fromkeys(v for v in values if v))
+        found = {}
+        for start in range(0, len(values), chunk_size):
+            chunk = values[start:start + chunk_size]
+            params = {f"filters[{field}][$in][{i}]": value
+                      for i, value in enumerate(chunk)}
+            params.update({"fields[0]": "documentId", "fields[1]": field,
+                           "pagination[pageSize]": chunk_size})
+            page = 1
+            while True:
+                params["pagination[page]"] = page
+                data = self.get_json(path, params)
+                for row in data.get("data", []):
+                    # Keep the first match, like the single-row lookups did
+                    found.setdefault(row.get(field), row["documentId"])
+                page_count = data.get("meta", {}).get(
+                    "pagination", {}).get("pageCount", 1)
+                if page >= page_count:
+                    break
+                page += 1
+        return found
+
+
+def _read_spool(spool_path):
+    with open(spool_path) as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def run_concurrently(func, items, max_workers=UPDATE_WORKERS):
+    """
+    Apply func to every item on a thread pool, yielding results in order.
+
+    Items are pulled lazily, so at most 2 * max_workers are pending at once.
+    """
+    items = iter(items)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque(executor.submit(func, item)
+                        for _, item in zip(range(max_workers * 2), items))
+        while pending:
+            result = pending.popleft().result()
+            item = next(items, _END)
+            if item is not _END:
+                pending.append(executor.submit(func, item))
+            yield result
+
+
+def async_client(base_url=None, max_connections=POOL_SIZE, timeout=DEFAULT_TIMEOUT):
+    """
+    Create an httpx.AsyncClient configured like the shared sync client.
+
+    httpx is only needed by the asyncio loaders, so it is imported here.
+    Use it as an async context manager so connections are closed.
+    """
+    import httpx
+
+    return httpx.AsyncClient(
+        base_url=(base_url or os.environ.get("STRAPI_URL", DEFAULT_BASE_URL)).rstrip("/"),
+        limits=httpx.Limits(max_connections=max_connections,
+                            max_keepalive_connections=max_connections),
+        timeout=timeout,
+    )
+
+
+def get_client(base_url=None, **kwargs):
+    """Return the shared client for a base URL, creating it on first use."""
+    key = (base_url or os.environ.get("STRAPI_URL", DEFAULT_BASE_URL)).rstrip("/")
+    if key not in _clients:
+        _clients[key] = StrapiClient(key, **kwargs)
+    return _clients[key]
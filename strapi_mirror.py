@@ -0,0 +1,368 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from itertools import batched
+
+from strapi_client import FETCH_WORKERS, get_client
+
+DEFAULT_PATH = "strapi_mirror.sqlite3"
+WRITE_BATCH = 500  # Rows stored per executemany
+QUERY_CHUNK = 500  # Values per IN (...) clause, below SQLite's variable limit
+
+# Mirrored collections: the attribute kept in the indexed name column and
+# the relations stored as links (field -> (target collection, many))
+COLLECTIONS = {
+    "products": {"name": "Name", "relations": {
+        "product_categories": ("product-categories", True)}},
+    "product-categories": {"name": "Name", "relations": {
+        "parent_category": ("product-categories", False)}},
+    "product-variants": {"name": None, "relations": {
+        "product": ("products", False), "state": ("states", False),
+        "city": ("cities", False)}},
+    "states": {"name": "name", "relations": {}},
+    "cities": {"name": "name", "relations": {"state": ("states", False)}},
+    "dealers": {"name": "name", "relations": {
+        "state": ("states", False), "city": ("cities", False)}},
+    "investors": {"name": "title", "relations": {}},
+}
+# Columns find() and lookup() can filter on
+COLUMNS = {"documentId": "document_id", "id": "id", "name": "name",
+           "model_code": "model_code", "slug": "slug", "alias": "alias"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    collection TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    id INTEGER,
+    updated_at TEXT,
+    name TEXT,
+    model_code TEXT,
+    slug TEXT,
+    alias TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (collection, document_id)
+);
+CREATE INDEX IF NOT EXISTS documents_id ON documents (collection, id);
+CREATE INDEX IF NOT EXISTS documents_name ON documents (collection, name);
+CREATE INDEX IF NOT EXISTS documents_model_code ON documents (collection, model_code);
+CREATE INDEX IF NOT EXISTS documents_slug ON documents (collection, slug);
+CREATE INDEX IF NOT EXISTS documents_alias ON documents (collection, alias);
+CREATE TABLE IF NOT EXISTS links (
+    collection TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    field TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    target_id TEXT NOT NULL,
+    PRIMARY KEY (collection, document_id, field, position)
+);
+CREATE INDEX IF NOT EXISTS links_target ON links (collection, field, target_id);
+CREATE TABLE IF NOT EXISTS watermarks (
+    collection TEXT PRIMARY KEY,
+    base_url TEXT NOT NULL,
+    updated_at TEXT,
+    refreshed_at REAL NOT NULL
+);
+"""
+
+_mirrors = {}
+_mirrors_lock = threading.Lock()
+
+
+def _placeholders(values):
+    return ", ".join("?" for _ in values)
+
+
+class StrapiMirror:
+    """
+    Local SQLite copy of the Strapi collections the loaders read.
+
+    refresh() only fetches documents whose updatedAt is at or after the
+    newest one already stored (the boundary is refetched so writes in the
+    same millisecond are not missed), so after the first run a refresh
+    is one small delta query per collection. Deletions cannot be seen
+    that way, so the collection's documentIds are rescanned, and the ones
+    Strapi no longer has dropped, whenever the delta brought anything new
+    or the local count differs from Strapi's total. Documents Strapi has
+    but the mirror never saw make the next refresh a full one. A mirror
+    made against another base URL is refetched in full.
+
+    Documents are returned in the shape Strapi's REST API gives them,
+    relations included when asked for, so loaders can swap a paginated
+    fetch for find(). Safe to share between threads; reads wait while a
+    collection is being refreshed.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, client=None):
+        self.path = path
+        self.client = client or get_client()
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.refreshed = set()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # Refresh
+
+    def refresh(self, collections=None, full=False, max_workers=FETCH_WORKERS):
+        """
+        Bring collections up to date with Strapi.
+
+        Returns:
+            dict: collection -> documents fetched
+        """
+        fetched = {}
+        with self.refresh_lock:
+            for collection in collections or COLLECTIONS:
+                fetched[collection] = self._refresh(collection, full, max_workers)
+                self.refreshed.add(collection)
+        return fetched
+
+    def ensure(self, collections):
+        """Refresh the collections this process has not refreshed yet."""
+        with self.refresh_lock:
+            for collection in collections:
+                if collection not in self.refreshed:
+                    self._refresh(collection, False, FETCH_WORKERS)
+                    self.refreshed.add(collection)
+
+    def _watermark(self, collection):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT base_url, updated_at FROM watermarks WHERE collection = ?",
+                (collection,)).fetchone()
+        if row is None or row[0] != self.client.base_url:
+            return None, True
+        return row[1], False
+
+    def _refresh(self, collection, full, max_workers):
+        spec = COLLECTIONS[collection]
+        watermark, stale = self._watermark(collection)
+        full = full or stale or watermark is None
+
+        params = {"sort[0]": "id:asc"}
+        if not full:
+            params["filters[updatedAt][$gte]"] = watermark
+        for relation in spec["relations"]:
+            params[f"populate[{relation}][fields][0]"] = "documentId"
+        rows = self.client.iter_collection(
+            f"/api/{collection}", params, max_workers=max_workers)
+
+        fetched = changed = 0
+        latest = None if full else watermark
+        # One transaction per collection: a failed fetch leaves the old copy
+        with self.lock, self.conn:
+            if full:
+                self.conn.execute("DELETE FROM documents WHERE collection = ?", (collection,))
+                self.conn.execute("DELETE FROM links WHERE collection = ?", (collection,))
+            for batch in batched(rows, WRITE_BATCH):
+                self._store(collection, spec, batch)
+                fetched += len(batch)
+                # The boundary document at the watermark is refetched every time
+                changed += sum(1 for row in batch if (row.get("updatedAt") or "") != watermark)
+                newest = max((row.get("updatedAt") or "" for row in batch), default="")
+                if newest and (latest is None or newest > latest):
+                    latest = newest
+            self.conn.execute(
+                "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?)",
+                (collection, self.client.base_url, latest, time.time()))
+
+        if not full:
+            self._drop_deleted(collection, rescan=changed > 0)
+        return fetched
+
+    def _store(self, collection, spec, rows):
+        documents, links, document_ids = [], [], []
+        for row in rows:
+            data = {k: v for k, v in row.items() if k not in spec["relations"]}
+            documents.append((
+                collection, row["documentId"], row.get("id"), row.get("updatedAt"),
+                row.get(spec["name"]) if spec["name"] else None,
+                row.get("model_code"), row.get("slug"), row.get("alias"),
+                json.dumps(data)))
+            document_ids.append((collection, row["documentId"]))
+            for field in spec["relations"]:
+                related = row.get(field)
+                if isinstance(related, dict):
+                    related = [related]
+                for position, target in enumerate(related or []):
+                    if target and target.get("documentId"):
+                        links.append((collection, row["documentId"], field, position,
+                                      target["documentId"]))
+        self.conn.executemany(
+            "DELETE FROM links WHERE collection = ? AND document_id = ?", document_ids)
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", documents)
+        self.conn.executemany("INSERT INTO links VALUES (?, ?, ?, ?, ?)", links)
+
+    def _drop_deleted(self, collection, rescan=False):
+        """
+        Drop mirrored documents that Strapi no longer has.
+
+        A document deleted while another was created leaves the counts
+        equal, so any change in the delta forces the rescan; otherwise it
+        only runs when Strapi's total differs from the local count.
+        """
+        path = f"/api/{collection}"
+        if not rescan:
+            total = self.client.fetch_page(path, {"fields[0]": "documentId"}, 1, 1).get(
+                "meta", {}).get("pagination", {}).get("total")
+            if total is None or total == self.count(collection):
+                return
+        remote = {row["documentId"] for row in self.client.snapshot(path)}
+        with self.lock, self.conn:
+            local = {row[0] for row in self.conn.execute(
+                "SELECT document_id FROM documents WHERE collection = ?", (collection,))}
+            gone = [(collection, doc) for doc in local if doc not in remote]
+            self.conn.executemany(
+                "DELETE FROM documents WHERE collection = ? AND document_id = ?", gone)
+            self.conn.executemany(
+                "DELETE FROM links WHERE collection = ? AND document_id = ?", gone)
+            if not remote <= local:
+                # Documents older than the watermark were never fetched
+                self.conn.execute(
+                    "DELETE FROM watermarks WHERE collection = ?", (collection,))
+
+    # Reads
+
+    def count(self, collection):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM documents WHERE collection = ?",
+                (collection,)).fetchone()[0]
+
+    def find(self, collection, where=None, linked=None, populate=()):
+        """
+        Mirrored documents of a collection, in id order.
+
+        Args:
+            where: {column: value}; a list matches any of its values and
+                None matches a missing value. Columns are documentId, id,
+                name (the collection's name/title attribute), model_code,
+                slug and alias.
+            linked: {relation: documentId or list}, documents related to
+                any of the given documentIds
+            populate: relations to embed, as Strapi would with populate
+
+        Returns:
+            list: document dicts
+        """
+        sql = ["SELECT document_id, data FROM documents AS d WHERE collection = ?"]
+        args = [collection]
+        for key, value in (where or {}).items():
+            column = COLUMNS[key]
+            if value is None:
+                sql.append(f"AND {column} IS NULL")
+            elif isinstance(value, (list, tuple, set)):
+                value = list(value)
+                sql.append(f"AND {column} IN ({_placeholders(value)})")
+                args.extend(value)
+            else:
+                sql.append(f"AND {column} = ?")
+                args.append(value)
+        for field, targets in (linked or {}).items():
+            targets = [targets] if isinstance(targets, str) else list(targets)
+            sql.append("AND EXISTS (SELECT 1 FROM links AS l WHERE l.collection = d.collection"
+                       " AND l.document_id = d.document_id AND l.field = ?"
+                       f" AND l.target_id IN ({_placeholders(targets)}))")
+            args.append(field)
+            args.extend(targets)
+        sql.append("ORDER BY id")
+
+        with self.lock:
+            rows = self.conn.execute(" ".join(sql), args).fetchall()
+        documents = {doc: json.loads(data) for doc, data in rows}
+        for field in populate:
+            self._populate(collection, documents, field)
+        return list(documents.values())
+
+    def get(self, collection, document_id, populate=()):
+        """One mirrored document, or None."""
+        found = self.find(collection, {"documentId": document_id}, populate=populate)
+        return found[0] if found else None
+
+    def lookup(self, collection, field, values):
+        """Like StrapiClient.lookup(): {value: documentId} for values found locally."""
+        column = COLUMNS[field]
+        values = list(dict.fromkeys(v for v in values if v is not None))
+        found = {}
+        for chunk in batched(values, QUERY_CHUNK):
+            with self.lock:
+                rows = self.conn.execute(
+                    f"SELECT {column}, document_id FROM documents WHERE collection = ?"
+                    f" AND {column} IN ({_placeholders(chunk)}) ORDER BY id",
+                    (collection, *chunk)).fetchall()
+            for value, document_id in rows:
+                found.setdefault(value, document_id)
+        return found
+
+    def _populate(self, collection, documents, field):
+        target, many = COLLECTIONS[collection]["relations"][field]
+        links = []
+        for chunk in batched(list(documents), QUERY_CHUNK):
+            with self.lock:
+                links.extend(self.conn.execute(
+                    "SELECT document_id, target_id FROM links WHERE collection = ?"
+                    f" AND field = ? AND document_id IN ({_placeholders(chunk)})"
+                    " ORDER BY document_id, position",
+                    (collection, field, *chunk)).fetchall())
+        related = {}
+        for chunk in batched(list({t for _, t in links}), QUERY_CHUNK):
+            with self.lock:
+                related.update((doc, json.loads(data)) for doc, data in self.conn.execute(
+                    "SELECT document_id, data FROM documents WHERE collection = ?"
+                    f" AND document_id IN ({_placeholders(chunk)})",
+                    (target, *chunk)))
+
+        values = {doc: [] for doc in documents}
+        for doc, target_id in links:
+            # Targets missing from the mirror still carry their documentId
+            values[doc].append(related.get(target_id, {"documentId": target_id}))
+        for doc, document in documents.items():
+            document[field] = values[doc] if many else (values[doc] or [None])[0]
+
+
+def open_mirror(client=None, path=None):
+    """
+    Return the shared mirror for a path, creating it on first use.
+
+    The path defaults to the STRAPI_MIRROR_PATH environment variable,
+    then strapi_mirror.sqlite3 in the working directory.
+    """
+    path = path or os.environ.get("STRAPI_MIRROR_PATH", DEFAULT_PATH)
+    with _mirrors_lock:
+        if path not in _mirrors:
+            _mirrors[path] = StrapiMirror(path, client)
+        return _mirrors[path]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Refresh the local SQLite mirror of Strapi collections.")
+    parser.add_argument("collections", nargs="*",
+                        help=f"Collections to refresh: {', '.join(COLLECTIONS)} (default: all)")
+    parser.add_argument("--path", help="Mirror file (default: $STRAPI_MIRROR_PATH "
+                                       f"or {DEFAULT_PATH})")
+    parser.add_argument("--full", action="store_true",
+                        help="Refetch everything instead of the changes since the last run")
+    parser.add_argument("--workers", type=int, default=FETCH_WORKERS,
+                        help="Pages fetched concurrently")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.collections if name not in COLLECTIONS]
+    if unknown:
+        parser.error(f"unknown collection(s): {', '.join(unknown)}")
+
+    mirror = open_mirror(path=args.path)
+    for collection in args.collections or COLLECTIONS:
+        start = time.monotonic()
+        fetched = mirror.refresh([collection], args.full, max(1, args.workers))[collection]
+        print(f"{collection:<20}{fetched:>8} fetched{mirror.count(collection):>8} mirrored"
+              f"{time.monotonic() - start:>8.2f}s")
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_strapi import FakeStrapi, ServerThread  # noqa: E402
+from strapi_client import StrapiClient  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def server():
+    server = ServerThread(FakeStrapi(seed=1))
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def strapi(server):
+    """The fake server, emptied before each test."""
+    server.reset()
+    return server
+
+
+@pytest.fixture
+def client(strapi):
+    client = StrapiClient(strapi.base_url)
+    yield client
+    client.session.close()
+
+
+@pytest.fixture
+def requests_made(strapi):
+    """Requests served since the last reset_stats(), optionally of one method."""
+    def count(method=None):
+        routes = strapi.stats()["routes"]
+        return sum(n for route, n in routes.items()
+                   if method is None or route.startswith(f"{method} "))
+    return count
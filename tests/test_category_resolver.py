@@ -0,0 +1,64 @@
+import threading
+
+from category_resolver import CategoryResolver, slug
+
+PATHS = [
+    [("Doors", "doors"), ("Flush Doors", "doors-flush-doors")],
+    [("Doors", "doors"), ("Panel Doors", None)],
+    [("Doors", "doors"), ("Flush Doors", "doors-flush-doors"), ("", None)],
+    [("Plywood", "plywood")],
+]
+
+
+def test_ensure_paths_creates_each_category_once(client, requests_made):
+    counts = CategoryResolver(client).ensure_paths(PATHS)
+    assert counts == {"existing": 0, "created": 4, "failed": 0}
+    assert requests_made("POST") == 4
+
+
+def test_ensure_paths_connects_parents(client):
+    resolver = CategoryResolver(client)
+    resolver.ensure_paths(PATHS)
+
+    doors = resolver.find_by_slug("doors")
+    flush = resolver.find_by_slug("doors-flush-doors")
+    panel = resolver.find_by_name("Panel Doors", doors)
+    assert resolver.parents[flush] == doors
+    assert resolver.parents[panel] == doors
+    assert resolver.parents[doors] is None
+
+    # The links are in Strapi, not only in this resolver's index
+    reloaded = CategoryResolver(client).load()
+    assert reloaded.parents[reloaded.find_by_slug("doors-flush-doors")] == doors
+
+
+def test_ensure_paths_rerun_creates_nothing(client, strapi, requests_made):
+    CategoryResolver(client).ensure_paths(PATHS)
+
+    strapi.reset_stats()
+    counts = CategoryResolver(client).ensure_paths(PATHS)
+    assert counts == {"existing": 4, "created": 0, "failed": 0}
+    assert requests_made("POST") == 0
+
+
+def test_ensure_paths_fails_children_of_a_failed_parent(client):
+    resolver = CategoryResolver(client)
+    resolver.create = lambda *args, **kwargs: None  # Every create is rejected
+
+    counts = resolver.ensure_paths(PATHS)
+    assert counts == {"existing": 0, "created": 0, "failed": 4}
+
+
+def test_concurrent_get_or_create_posts_once(client, requests_made):
+    resolver = CategoryResolver(client).load()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        resolver.get_or_create("Doors", 1))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(set(results)) == 1
+    assert requests_made("POST") == 1
+    assert resolver.find_by_slug(slug("Doors")) == results[0]
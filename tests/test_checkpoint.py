@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from checkpoint import Journal
+
+
+def journal_lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_resume_skips_journaled_keys(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with Journal(path) as journal:
+        journal.record(1, "doc-1")
+        journal.record("2:pune", "doc-2")
+
+    with Journal(path, resume=True) as journal:
+        assert len(journal) == 2
+        assert 1 in journal
+        assert journal.get("2:pune") == "doc-2"
+        assert "3" not in journal
+
+
+def test_refuses_a_journal_with_records_without_resume(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with Journal(path) as journal:
+        journal.record(1, "doc-1")
+
+    with pytest.raises(FileExistsError):
+        Journal(path)
+    assert journal_lines(path) == [{"key": "1", "documentId": "doc-1"}]
+
+
+def test_empty_journal_needs_no_resume(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.touch()
+    with Journal(path) as journal:
+        assert len(journal) == 0
+
+
+def test_resume_cuts_off_a_torn_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with Journal(path) as journal:
+        journal.record(1, "doc-1")
+        journal.record(2, "doc-2")
+    with open(path, "a") as f:
+        f.write('{"key": "3", "docum')  # Crash in the middle of a write
+
+    with Journal(path, resume=True) as journal:
+        assert len(journal) == 2
+        assert 3 not in journal
+        journal.record(4, "doc-4")
+
+    assert journal_lines(path) == [
+        {"key": "1", "documentId": "doc-1"},
+        {"key": "2", "documentId": "doc-2"},
+        {"key": "4", "documentId": "doc-4"},
+    ]
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from csv_source import Column, load_records, read_csv, to_float, to_int, to_str
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1,234", 1234), (" 30.0\r\n", 30), ("7", 7), (12.9, 12), (5, 5),
+    ("", None), ("NULL", None), ("#N/A", None), (" null ", None), (None, None),
+])
+def test_to_int(value, expected):
+    assert to_int(value) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1,234.5", 1234.5), ("18", 18.0), (3, 3.0), ("#VALUE!", None), ("", None),
+])
+def test_to_float(value, expected):
+    assert to_float(value) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("  Goa\r\n", "Goa"), ("NULL", ""), ("#REF!", ""), (None, ""), (42, "42"),
+])
+def test_to_str(value, expected):
+    assert to_str(value) == expected
+
+
+def test_to_int_rejects_text():
+    with pytest.raises(ValueError):
+        to_int("twelve")
+
+
+def write(path, text):
+    path.write_bytes(text.encode("utf-8-sig"))
+    return str(path)
+
+
+def test_read_csv_maps_and_coerces_columns(tmp_path):
+    path = write(tmp_path / "prices.csv",
+                 "name,Width,price,,name\r\n"
+                 "Flush Door ,\"1,220\",NULL,x,dup\r\n"
+                 ",,,,\r\n"
+                 "Panel Door,610,2496.0,y,dup2\r\n")
+    columns = {
+        "name": "name",
+        "width": Column("Width", to_int),
+        "price": Column("price", to_int, default=0),
+        "blank": Column(3),
+        "second_name": Column(4),
+        "thickness": Column("Thickness", to_int, default=18),
+    }
+
+    assert list(read_csv(path, columns)) == [
+        {"name": "Flush Door", "width": 1220, "price": 0, "blank": "x",
+         "second_name": "dup", "thickness": 18},
+        {"name": "Panel Door", "width": 610, "price": 2496, "blank": "y",
+         "second_name": "dup2", "thickness": 18},
+    ]
+
+
+def test_read_csv_without_mapping_keeps_named_columns_as_text(tmp_path):
+    path = write(tmp_path / "rows.csv", "id,,name\n1,skipped, Goa \n")
+    assert list(read_csv(path)) == [{"id": "1", "name": "Goa"}]
+
+
+def test_read_csv_rest_keeps_and_renames_unmapped_columns(tmp_path):
+    path = write(tmp_path / "rows.csv", "order_c,id,Parent\n10,3,0\n")
+    records = read_csv(path, {"order_c": Column("order_c", to_int)}, rest=to_str,
+                       rename={"Parent": "parent_id"})
+    assert list(records) == [{"order_c": 10, "id": "3", "parent_id": "0"}]
+
+
+def test_read_csv_reports_the_failing_cell(tmp_path):
+    path = write(tmp_path / "rows.csv", "Width\n1220\nwide\n")
+    with pytest.raises(ValueError, match=r"rows\.csv:3: column 'Width'"):
+        list(read_csv(path, {"Width": Column("Width", to_int)}))
+
+
+def test_read_csv_required_column(tmp_path):
+    path = write(tmp_path / "rows.csv", "name\nGoa\n")
+    with pytest.raises(ValueError, match="not found"):
+        list(read_csv(path, {"code": Column("code", required=True)}))
+
+
+def test_read_csv_streams_rows(tmp_path):
+    path = write(tmp_path / "rows.csv", "n\n" + "".join(f"{i}\n" for i in range(5)))
+    records = read_csv(path, {"n": Column("n", to_int)})
+    assert next(records) == {"n": 0}  # Generator: later rows are not read yet
+    assert [r["n"] for r in records] == [1, 2, 3, 4]
+
+
+def test_load_records_passes_csvjson_through(tmp_path):
+    path = tmp_path / "rows.json"
+    path.write_text(json.dumps([{"Width": "1,220"}]))
+    assert list(load_records(str(path), {"Width": Column("Width", to_int)})) == [
+        {"Width": "1,220"}]
@@ -0,0 +1,88 @@
+import asyncio
+import importlib.util
+import os
+
+import httpx
+import pytest
+
+from checkpoint import Journal
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                      "dealer", "dealear-push.py")
+DEALER = {"id": 7, "name": "Sharma Plywood", "stateDocumentid": "s" * 24,
+          "city_documentid": "c" * 24}
+
+
+@pytest.fixture(scope="module")
+def dealer_push(tmp_path_factory):
+    # The script opens its log file in the working directory on import
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("dealer"))
+    try:
+        spec = importlib.util.spec_from_file_location("dealear_push", SCRIPT)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+    module.RETRY_BASE_DELAY = 0
+    return module
+
+
+def post(dealer_push, outcomes, dealer=DEALER, journal=None):
+    """post_dealer() against a transport answering with outcomes in turn."""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        outcome = outcomes[min(len(requests), len(outcomes)) - 1]
+        if isinstance(outcome, type) and issubclass(outcome, Exception):
+            raise outcome("injected", request=request)
+        body = {"data": {"documentId": "d" * 24}} if outcome in (200, 201) else {}
+        return httpx.Response(outcome, json=body)
+
+    async def run():
+        stats = {"success": 0, "failed": 0, "skipped": 0}
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler),
+                                     base_url="http://strapi") as http:
+            await dealer_push.post_dealer(http, asyncio.Semaphore(1), dict(dealer),
+                                          stats, journal)
+        return stats
+
+    return asyncio.run(run()), requests
+
+
+@pytest.mark.parametrize("outcomes, attempts", [
+    ([503, 429, 201], 3),
+    ([httpx.ConnectError, 201], 2),
+    ([httpx.ConnectTimeout, httpx.PoolTimeout, 200], 3),
+])
+def test_retries_failures_strapi_cannot_have_processed(dealer_push, outcomes, attempts):
+    stats, requests = post(dealer_push, outcomes)
+    assert stats["success"] == 1
+    assert len(requests) == attempts
+
+
+@pytest.mark.parametrize("outcome", [
+    httpx.ReadTimeout, httpx.RemoteProtocolError, 500, 502, 400,
+])
+def test_does_not_resend_a_dealer_that_may_exist(dealer_push, outcome):
+    stats, requests = post(dealer_push, [outcome, 201])
+    assert stats == {"success": 0, "failed": 1, "skipped": 0}
+    assert len(requests) == 1
+
+
+def test_gives_up_after_max_retries(dealer_push):
+    stats, requests = post(dealer_push, [503])
+    assert stats["failed"] == 1
+    assert len(requests) == dealer_push.MAX_RETRIES
+
+
+def test_journals_created_dealers(dealer_push, tmp_path):
+    with Journal(tmp_path / "dealers.jsonl") as journal:
+        post(dealer_push, [429, 201], journal=journal)
+        assert journal.get(7) == "d" * 24
+
+
+def test_drafts_go_to_the_draft_endpoint(dealer_push):
+    _, requests = post(dealer_push, [201], dealer={**DEALER, "status": 2})
+    assert requests[0].url.params["status"] == "draft"
@@ -0,0 +1,120 @@
+import json
+import threading
+
+import pytest
+
+from geography import GeographyResolver, normalize
+
+MAHARASHTRA, GOA, DELHI = "m" * 24, "g" * 24, "d" * 24
+
+
+@pytest.fixture
+def places(strapi):
+    strapi.seed({"states": [{"documentId": MAHARASHTRA, "name": "Maharashtra"},
+                            {"documentId": GOA, "name": "Goa"},
+                            {"documentId": DELHI, "name": "Delhi"}]})
+    strapi.seed({"cities": [{"documentId": "pune" + "0" * 20, "name": "Pune",
+                             "state": MAHARASHTRA},
+                            {"documentId": "aurangabad" + "0" * 14, "name": "Aurangabad",
+                             "state": MAHARASHTRA},
+                            {"documentId": "delhi" + "0" * 19, "name": "Delhi",
+                             "state": DELHI}]})
+    return strapi
+
+
+def create_city(client):
+    def create(name, state_id):
+        response = client.post("/api/cities", json={
+            "data": {"name": name, "state": {"connect": [state_id]}}})
+        response.raise_for_status()
+        return response.json()["data"]["documentId"]
+    return create
+
+
+def test_normalize_ignores_case_and_spacing():
+    assert normalize("  Tamil   NADU\r\n") == "tamil nadu"
+
+
+def test_resolves_states_and_cities_by_name(client, places, requests_made):
+    geography = GeographyResolver(client).load()
+
+    assert geography.state(" goa ") == GOA
+    assert geography.city("PUNE") == ("pune" + "0" * 20, MAHARASHTRA)
+    assert geography.city("Pune", GOA) is None
+    assert geography.state("Atlantis") is None and geography.state(None) is None
+    assert requests_made("GET") == 2  # One snapshot per collection
+
+
+def test_location_prefers_the_city(client, places):
+    geography = GeographyResolver(client).load()
+    assert geography.location("Delhi") == (DELHI, "delhi" + "0" * 19)
+    assert geography.location("Goa") == (GOA, None)
+    assert geography.location("Nowhere") is None
+
+
+def test_loads_lazily_once_across_threads(client, places, requests_made):
+    geography = GeographyResolver(client)
+    threads = [threading.Thread(target=geography.state, args=("Goa",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert requests_made("GET") == 2
+
+
+def test_get_or_create_city_creates_once(client, places, requests_made):
+    geography = GeographyResolver(client).load()
+    results = []
+
+    def resolve():
+        results.append(geography.get_or_create_city("Margao", GOA, create_city(client)))
+
+    threads = [threading.Thread(target=resolve) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert requests_made("POST") == 1
+    assert len({document_id for document_id, _ in results}) == 1
+    assert sum(created for _, created in results) == 1
+    assert geography.get_or_create_city("margao", GOA, create_city(client)) == (
+        results[0][0], False)
+
+
+def test_cache_file_skips_the_fetch(client, places, requests_made, tmp_path):
+    cache = str(tmp_path / "geo.json")
+    GeographyResolver(client, cache_path=cache).load()
+
+    places.reset_stats()
+    geography = GeographyResolver(client, cache_path=cache).load()
+    assert geography.state("Goa") == GOA
+    assert requests_made() == 0
+
+
+def test_cities_created_during_a_run_reach_the_cache(client, places, requests_made, tmp_path):
+    cache = str(tmp_path / "geo.json")
+    first = GeographyResolver(client, cache_path=cache).load()
+    margao, created = first.get_or_create_city("Margao", GOA, create_city(client))
+    assert created
+
+    places.reset_stats()
+    second = GeographyResolver(client, cache_path=cache).load()
+    assert second.get_or_create_city("Margao", GOA, create_city(client)) == (margao, False)
+    assert requests_made() == 0
+
+
+def test_stale_or_foreign_cache_is_refetched(client, places, requests_made, tmp_path):
+    cache = tmp_path / "geo.json"
+    GeographyResolver(client, cache_path=str(cache)).load()
+
+    places.reset_stats()
+    GeographyResolver(client, cache_path=str(cache), ttl=-1).load()
+    assert requests_made("GET") == 2
+
+    snapshot = json.loads(cache.read_text())
+    snapshot["base_url"] = "http://elsewhere"
+    cache.write_text(json.dumps(snapshot))
+    places.reset_stats()
+    GeographyResolver(client, cache_path=str(cache)).load()
+    assert requests_made("GET") == 2
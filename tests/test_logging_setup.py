@@ -0,0 +1,92 @@
+import logging
+import threading
+
+import pytest
+
+from logging_setup import (
+    Payload, PayloadSampler, setup_logging, stop_logging, truncate, verbosity_level)
+
+
+def record(*args):
+    return logging.LogRecord("test", logging.DEBUG, __file__, 1, "Body: %s", args, None)
+
+
+def test_truncate_notes_the_dropped_length():
+    assert truncate("abcdef", 4) == "abcd... [2 more chars]"
+    assert truncate("abc", 4) == "abc"
+    assert truncate("abcdef", None) == "abcdef"
+
+
+def test_payload_serializes_only_when_formatted():
+    class Body:
+        dumped = 0
+
+        def __str__(self):
+            Body.dumped += 1
+            return "body"
+
+    logger = logging.getLogger("test.payload")
+    logger.setLevel(logging.INFO)
+    logger.debug("Body: %s", Payload({"data": Body()}))
+    assert Body.dumped == 0
+
+    assert str(Payload({"data": Body()})) == '{"data": "body"}'
+    assert str(Payload(b"\xffok", limit=2)) == "�o... [1 more chars]"
+    assert str(Payload(None)) == "None"
+
+
+def test_verbosity_levels():
+    assert verbosity_level(-1) == logging.WARNING
+    assert verbosity_level(0) == logging.INFO
+    assert verbosity_level(2) == logging.DEBUG
+
+
+def test_sampler_passes_records_without_payloads():
+    sampler = PayloadSampler(every=3)
+    assert all(sampler.filter(record("text")) for _ in range(5))
+    assert [sampler.filter(record(Payload("x"))) for _ in range(6)] == [
+        True, False, False, True, False, False]
+
+
+def test_sampler_counts_exactly_across_threads():
+    sampler = PayloadSampler(every=10)
+    passed = []
+
+    def log():
+        passed.append(sum(sampler.filter(record(Payload("x"))) for _ in range(5000)))
+
+    threads = [threading.Thread(target=log) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sampler.seen == 40000
+    assert sum(passed) == 4000
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield root
+    stop_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def test_setup_logging_writes_through_the_queue(root_logger, tmp_path):
+    path = tmp_path / "run.log"
+    setup_logging(str(path), verbosity=1, console=False, payload_sample=2)
+    log = logging.getLogger("test.setup")
+    for i in range(4):
+        log.debug("Body %d: %s", i, Payload({"i": i}))
+    log.info("done")
+    stop_logging()
+
+    lines = path.read_text().splitlines()
+    assert [line.split(" - ", 2)[2] for line in lines] == [
+        'Body 0: {"i": 0}', 'Body 2: {"i": 2}', "done"]
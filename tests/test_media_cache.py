@@ -0,0 +1,62 @@
+import pytest
+
+from media_cache import MediaCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = MediaCache(str(tmp_path / "media.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def test_unchanged_source_is_known_after_one_head(cache, client, strapi, requests_made):
+    url = f"{strapi.base_url}/files/veneers/NV-0001.jpg"
+    assert cache.check(client, url)[0] is None  # Never transferred
+
+    response = client.get(url)
+    etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+    cache.record_source(url, etag, last_modified, "abc123")
+    cache.record_media("abc123", 41, len(response.content))
+
+    strapi.reset_stats()
+    sha256, _, _ = cache.check(client, url)
+    assert sha256 == "abc123"
+    assert cache.media_id(sha256) == 41
+    assert requests_made() == 1
+    assert requests_made("HEAD") == 1
+
+
+def test_changed_validators_miss(cache):
+    cache.record_source("http://img/a.jpg", '"v1"', "Mon, 01 Jan 2024 00:00:00 GMT", "abc")
+    assert cache.source_hash("http://img/a.jpg", '"v1"', "Mon, 01 Jan 2024 00:00:00 GMT") == "abc"
+    assert cache.source_hash("http://img/a.jpg", '"v2"', "Mon, 01 Jan 2024 00:00:00 GMT") is None
+    assert cache.source_hash("http://img/b.jpg", '"v1"', "Mon, 01 Jan 2024 00:00:00 GMT") is None
+
+
+def test_sources_without_validators_are_never_trusted(cache):
+    cache.record_source("http://img/a.jpg", None, None, "abc")
+    assert cache.source_hash("http://img/a.jpg", None, None) is None
+
+
+def test_links_are_per_target(cache):
+    cache.record_media("abc", 7)
+    cache.record_link("abc", "api::product.product", 12, "Multiple_Image")
+    cache.record_link("abc", "api::product.product", 12, "Multiple_Image")
+
+    assert cache.is_linked("abc", "api::product.product", "12", "Multiple_Image")
+    assert not cache.is_linked("abc", "api::product.product", 13, "Multiple_Image")
+    assert cache.media_id("missing") is None
+
+
+def test_cache_survives_a_restart(tmp_path):
+    path = str(tmp_path / "media.sqlite3")
+    first = MediaCache(path)
+    first.record_media("abc", 7, 1024)
+    first.close()
+
+    second = MediaCache(path)
+    try:
+        assert second.media_id("abc") == 7
+    finally:
+        second.close()
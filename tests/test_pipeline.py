@@ -0,0 +1,37 @@
+import threading
+
+from pipeline import Pipeline, Stage
+
+
+def run_with_timeout(pipeline, items, timeout=10):
+    summaries = []
+    thread = threading.Thread(target=lambda: summaries.extend(pipeline.run(items)),
+                              daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "pipeline did not drain"
+    return summaries
+
+
+def test_items_flow_through_every_stage():
+    done = []
+    pipeline = Pipeline([Stage("double", lambda x: x * 2, workers=3),
+                         Stage("collect", done.append, workers=2)])
+    summaries = run_with_timeout(pipeline, range(50))
+
+    assert sorted(done) == [x * 2 for x in range(50)]
+    assert [s["processed"] for s in summaries] == [50, 50]
+
+
+def test_failing_error_handler_does_not_hang_the_run():
+    def fail(item):
+        raise ValueError(item)
+
+    def broken_handler(stage_name, item, error):
+        raise RuntimeError("log sink is down")
+
+    pipeline = Pipeline([Stage("fail", fail, workers=2), Stage("next", print)],
+                        on_error=broken_handler)
+    summaries = run_with_timeout(pipeline, range(10))
+
+    assert summaries[0]["failed"] == 10
@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+
+from rate_limiter import AdaptiveRateLimiter
+
+
+def limiter(**kwargs):
+    # A high rate so the token bucket never makes the tests wait long
+    options = {"rate": 200.0, "max_rate": 10000.0, "concurrency": 2,
+               "max_concurrency": 8, "latency_target": 1.0, "window_size": 4}
+    options.update(kwargs)
+    return AdaptiveRateLimiter(**options)
+
+
+def finish(limiter, status=200, count=1):
+    for _ in range(count):
+        with limiter.slot() as slot:
+            slot.status = status
+
+
+def test_healthy_windows_double_the_rate_in_slow_start():
+    rl = limiter()
+    finish(rl, count=4)
+    assert (rl.rate, rl.concurrency) == (400.0, 3)
+    finish(rl, count=4)
+    assert (rl.rate, rl.concurrency) == (800.0, 4)
+
+
+def test_throttled_response_halves_rate_and_concurrency():
+    rl = limiter(concurrency=4)
+    finish(rl, status=429)
+    assert (rl.rate, rl.concurrency, rl.backoffs) == (100.0, 2, 1)
+    finish(rl, status=503)
+    assert (rl.rate, rl.concurrency, rl.backoffs) == (50.0, 1, 2)
+    assert rl.summary()["failed"] == 2
+
+
+def test_growth_is_additive_after_a_backoff():
+    rl = limiter()
+    finish(rl, status=503)  # 100/s, slow start over
+    finish(rl, count=4)
+    assert rl.rate == 120.0  # +20% instead of doubling
+
+
+def test_requests_sent_before_a_backoff_do_not_back_off_again():
+    rl = limiter(concurrency=4)
+    rl.acquire()
+    rl.acquire()
+    sent = time.monotonic()
+    rl.release(0.1, failed=True, throttled=True, started=sent)
+    rl.release(0.1, failed=True, throttled=True, started=sent)
+    assert rl.backoffs == 1
+
+
+def test_slow_window_backs_off():
+    rl = limiter(latency_target=0.01)
+    for _ in range(4):
+        rl.acquire()
+        rl.release(0.05)  # p95 over twice the target
+    assert rl.backoffs == 1
+
+
+def test_exception_in_slot_counts_as_failure():
+    rl = limiter()
+    with pytest.raises(RuntimeError):
+        with rl.slot():
+            raise RuntimeError("connection reset")
+    assert rl.summary()["failed"] == 1
+    assert rl.in_flight == 0
+
+
+def test_concurrency_limit_holds_across_threads():
+    rl = limiter(concurrency=2, max_concurrency=2, window_size=1000)
+    lock = threading.Lock()
+    in_flight, peak = [0], [0]
+
+    def request():
+        with rl.slot() as slot:
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+            slot.status = 200
+
+    threads = [threading.Thread(target=request) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert peak[0] == 2
+    assert rl.summary()["completed"] == 20
+
+
+def test_rate_is_paced():
+    rl = limiter(rate=50.0, max_rate=50.0, concurrency=8, window_size=1000)
+    start = time.monotonic()
+    finish(rl, count=11)
+    # One token up front, then one every 1/50 s
+    assert time.monotonic() - start >= 0.18
@@ -0,0 +1,222 @@
+import threading
+import time
+
+import pytest
+
+from strapi_client import SingleFlight
+
+PRODUCTS = "/api/products"
+FOLLOWERS = 8
+
+
+def seed_products(strapi, count, **attrs):
+    strapi.seed({"products": [
+        {"Name": f"Product {i}", "model_code": f"MC-{i:04d}", **attrs} for i in range(count)]})
+
+
+def product_ids(client):
+    return {row["model_code"]: row["documentId"]
+            for row in client.snapshot(PRODUCTS, fields=("documentId", "model_code"))}
+
+
+def test_lookup_resolves_values_in_chunks(client, strapi, requests_made):
+    seed_products(strapi, 250)
+    expected = product_ids(client)
+
+    strapi.reset_stats()
+    codes = [f"MC-{i:04d}" for i in range(250)] + ["MC-9999", "", None, "MC-0001"]
+    found = client.lookup(PRODUCTS, "model_code", codes, chunk_size=100)
+
+    assert found == expected
+    assert requests_made("GET") == 3  # 250 distinct codes, 100 per $in filter
+
+
+def test_lookup_keeps_the_first_match(client, strapi):
+    strapi.seed({"products": [{"Name": "Old", "model_code": "MC-1"},
+                              {"Name": "New", "model_code": "MC-1"}]})
+    first = client.get(PRODUCTS, params={"sort[0]": "id:asc"}).json()["data"][0]
+
+    assert client.lookup(PRODUCTS, "model_code", ["MC-1"]) == {"MC-1": first["documentId"]}
+
+
+def test_lookup_of_nothing_sends_nothing(client, requests_made):
+    assert client.lookup(PRODUCTS, "model_code", [None, ""]) == {}
+    assert requests_made() == 0
+
+
+def test_iter_collection_yields_every_page_in_order(client, strapi, requests_made):
+    seed_products(strapi, 250)
+
+    strapi.reset_stats()
+    rows = list(client.iter_collection(PRODUCTS, {"sort[0]": "id:asc"}, page_size=20))
+
+    assert [row["model_code"] for row in rows] == [f"MC-{i:04d}" for i in range(250)]
+    assert requests_made("GET") == 13
+
+
+def test_iter_collection_single_and_empty_pages(client, strapi, requests_made):
+    assert list(client.iter_collection(PRODUCTS)) == []
+    seed_products(strapi, 5)
+    assert len(list(client.iter_collection(PRODUCTS))) == 5
+    assert requests_made("GET") == 2
+
+
+def test_iter_collection_bounds_pages_in_flight(client, strapi):
+    seed_products(strapi, 200)
+    fetch_page = client.fetch_page
+    lock = threading.Lock()
+    in_flight, peak = [0], [0]
+
+    def counted(*args, **kwargs):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        try:
+            time.sleep(0.02)  # Long enough for the pool to overlap pages
+            return fetch_page(*args, **kwargs)
+        finally:
+            with lock:
+                in_flight[0] -= 1
+
+    client.fetch_page = counted
+    rows = list(client.iter_collection(PRODUCTS, page_size=10, max_workers=3))
+
+    assert len(rows) == 200
+    assert 1 < peak[0] <= 3
+
+
+def test_snapshot_fixes_the_work_list_before_rows_change(client, strapi):
+    seed_products(strapi, 120)
+    params = {"filters[alias][$null]": "true"}
+
+    rows = client.snapshot(PRODUCTS, params, page_size=50)
+    for row in rows:
+        # Updating the filtered field shrinks the live result set
+        client.put(f"{PRODUCTS}/{row['documentId']}", json={"data": {"alias": "set"}})
+
+    assert len(rows) == 120
+    assert client.snapshot(PRODUCTS, params) == []
+
+
+def test_snapshot_fetches_only_the_asked_fields(client, strapi):
+    strapi.seed({"states": [{"documentId": "s" * 24, "name": "Goa"}]})
+    strapi.seed({"cities": [{"name": "Panaji", "code": "PNJ", "state": "s" * 24}]})
+
+    rows = client.snapshot("/api/cities", fields=("documentId", "name"),
+                           populate={"state": ["name"]})
+
+    assert rows[0]["name"] == "Panaji"
+    assert "code" not in rows[0]
+    assert rows[0]["state"]["name"] == "Goa"
+
+
+def test_snapshot_spools_to_disk(client, strapi, tmp_path):
+    seed_products(strapi, 30)
+    in_memory = client.snapshot(PRODUCTS, fields=("documentId", "model_code"))
+
+    spool = tmp_path / "products.jsonl"
+    spooled = client.snapshot(PRODUCTS, fields=("documentId", "model_code"),
+                              spool_path=str(spool), page_size=7)
+
+    assert not isinstance(spooled, list)
+    assert list(spooled) == in_memory
+    assert len(spool.read_text().splitlines()) == 30
+
+
+def run_together(flights, key, func):
+    """Call flights.do(key, func) from FOLLOWERS threads; return results by thread."""
+    results = [None] * FOLLOWERS
+
+    def call(index):
+        try:
+            results[index] = flights.do(key, func)
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(FOLLOWERS)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_single_flight_runs_concurrent_calls_once():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return object()
+
+    threads, results = run_together(flights, "key", slow)
+    time.sleep(0.2)  # Let every thread join the flight before it lands
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_single_flight_shares_the_exception():
+    flights = SingleFlight()
+    release = threading.Event()
+    error = ValueError("create failed")
+
+    def failing():
+        release.wait(5)
+        raise error
+
+    threads, results = run_together(flights, "key", failing)
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert all(result is error for result in results)
+
+
+def test_single_flight_forgets_the_key_afterwards():
+    flights = SingleFlight()
+    calls = []
+
+    def call():
+        calls.append(1)
+        return len(calls)
+
+    assert flights.do("key", call) == 1
+    assert flights.do("key", call) == 2
+    assert flights.calls == {}
+
+    with pytest.raises(KeyError):
+        flights.do("key", {}.__getitem__, "missing")
+    assert flights.calls == {}
+
+
+def test_single_flight_keeps_keys_apart():
+    flights = SingleFlight()
+    assert flights.do("a", lambda: "a") == "a"
+    assert flights.do("b", lambda: "b") == "b"
+
+
+def test_get_json_shares_one_request_between_threads(client, strapi, requests_made):
+    seed_products(strapi, 3)
+    get_json = client._get_json
+
+    def slow_get_json(*args):
+        time.sleep(0.2)  # Keep the flight open until every thread has joined
+        return get_json(*args)
+
+    client._get_json = slow_get_json
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        client.get_json(PRODUCTS, {"sort[0]": "id:asc"}))) for _ in range(FOLLOWERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(results) == FOLLOWERS
+    assert all(result is results[0] for result in results)
+    assert requests_made("GET") == 1
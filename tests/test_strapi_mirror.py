@@ -0,0 +1,73 @@
+import pytest
+
+from strapi_mirror import StrapiMirror
+
+COLLECTION = "states"
+
+
+@pytest.fixture
+def mirror(client, tmp_path):
+    mirror = StrapiMirror(str(tmp_path / "mirror.sqlite3"), client)
+    yield mirror
+    mirror.close()
+
+
+def names(mirror):
+    return sorted(row["name"] for row in mirror.find(COLLECTION))
+
+
+def seed_states(strapi, *state_names):
+    strapi.seed({COLLECTION: [{"name": name} for name in state_names]})
+
+
+def test_first_refresh_is_full(strapi, mirror):
+    seed_states(strapi, "Goa", "Kerala", "Punjab")
+    assert mirror.refresh([COLLECTION]) == {COLLECTION: 3}
+    assert names(mirror) == ["Goa", "Kerala", "Punjab"]
+
+
+def test_delta_refresh_picks_up_updates(strapi, client, mirror):
+    seed_states(strapi, "Goa", "Kerala")
+    mirror.refresh([COLLECTION])
+    goa = mirror.lookup(COLLECTION, "name", ["Goa"])["Goa"]
+
+    client.put(f"/api/{COLLECTION}/{goa}", json={"data": {"name": "Goa North"}})
+    fetched = mirror.refresh([COLLECTION])[COLLECTION]
+
+    assert fetched < 3  # Only the changed document and the boundary one
+    assert names(mirror) == ["Goa North", "Kerala"]
+
+
+def test_quiet_refresh_is_two_requests(strapi, mirror, requests_made):
+    seed_states(strapi, "Goa", "Kerala")
+    mirror.refresh([COLLECTION])
+
+    strapi.reset_stats()
+    mirror.refresh([COLLECTION])
+    assert requests_made("GET") == 2  # The delta and the total check
+
+
+def test_delete_is_dropped(strapi, client, mirror):
+    seed_states(strapi, "Goa", "Kerala", "Punjab")
+    mirror.refresh([COLLECTION])
+    kerala = mirror.lookup(COLLECTION, "name", ["Kerala"])["Kerala"]
+
+    client.delete(f"/api/{COLLECTION}/{kerala}")
+    mirror.refresh([COLLECTION])
+
+    assert names(mirror) == ["Goa", "Punjab"]
+    assert mirror.get(COLLECTION, kerala) is None
+
+
+def test_delete_with_create_keeps_the_count_but_is_dropped(strapi, client, mirror):
+    seed_states(strapi, "Goa", "Kerala", "Punjab")
+    mirror.refresh([COLLECTION])
+    kerala = mirror.lookup(COLLECTION, "name", ["Kerala"])["Kerala"]
+
+    client.delete(f"/api/{COLLECTION}/{kerala}")
+    client.post(f"/api/{COLLECTION}", json={"data": {"name": "Sikkim"}})
+    mirror.refresh([COLLECTION])
+
+    assert mirror.count(COLLECTION) == 3
+    assert names(mirror) == ["Goa", "Punjab", "Sikkim"]
+
@@ -0,0 +1,59 @@
+import hashlib
+import io
+
+from uploads import MultipartStream, spool_download, upload_stream
+
+
+def test_stream_length_matches_the_body():
+    files = [("files", "a.pdf", io.BytesIO(b"%PDF-1.4" * 1000), "application/pdf"),
+             ("files", "b.jpg", io.BytesIO(b""), "image/jpeg")]
+    body = MultipartStream({"ref": "api::investor.investor", "refId": 7}, files,
+                           chunk_size=1024)
+
+    data = b"".join(body)
+    assert len(body) == len(data)
+    assert data.endswith(f"--{body.boundary}--\r\n".encode())
+    # Streaming twice (a retried request) sends the same bytes
+    assert b"".join(body) == data
+
+
+def test_upload_stream_links_the_file(client, strapi):
+    strapi.seed({"investors": [{"title": "Annual report"}]})
+    investor = client.get("/api/investors").json()["data"][0]
+    content = b"x" * (256 * 1024)
+
+    response = upload_stream(client, "/api/upload", {
+        "ref": "api::investor.investor", "refId": investor["documentId"],
+        "field": "file"}, [("files", "report.pdf", io.BytesIO(content), "application/pdf")])
+
+    assert response.status_code == 201
+    uploaded = response.json()[0]
+    assert uploaded["name"] == "report.pdf"
+    assert uploaded["size"] == 256.0
+
+    linked = client.get(f"/api/investors/{investor['documentId']}",
+                        params={"populate": "file"}).json()["data"]
+    assert linked["file"][0]["documentId"] == uploaded["documentId"]
+
+
+def test_spool_download_streams_to_disk_above_the_threshold(client, strapi):
+    url = f"{strapi.base_url}/files/veneers/NV-0001.jpg"
+    body = client.get(url).content
+
+    response = client.get(url, stream=True)
+    spool, size, sha256, _ = spool_download(response, chunk_size=1024, max_memory=1024)
+    with spool:
+        assert spool._rolled  # Moved to a temporary file on disk
+        assert spool.read() == body
+    assert size == len(body)
+    assert sha256 == hashlib.sha256(body).hexdigest()
+    assert response.raw.closed
+
+
+def test_spool_download_keeps_small_files_in_memory(client, strapi):
+    response = client.get(f"{strapi.base_url}/files/report.pdf", stream=True)
+    spool, size, _, _ = spool_download(response)
+    with spool:
+        assert not spool._rolled
+        assert spool.read(5) == b"%PDF-"
+        assert size > 0
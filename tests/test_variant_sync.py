@@ -0,0 +1,74 @@
+from variant_sync import diff_variants, sync_variants, variant_key, variant_payload
+
+
+def variant(document_id, price, **fields):
+    row = {"documentId": document_id, "product": {"documentId": "p1"},
+           "state": {"documentId": "s1"}, "city": None,
+           "width": 1220, "height": 2440, "tickness": 18, "price": price}
+    row.update(fields)
+    return row
+
+
+def desired(price, **fields):
+    row = {"product": "p1", "state": "s1", "city": None,
+           "width": "1220", "height": "2440", "tickness": "18", "price": price}
+    row.update(fields)
+    return row
+
+
+def test_key_matches_sheet_rows_to_strapi_variants():
+    assert variant_key(desired(100)) == variant_key(variant("v1", 100))
+    assert variant_key(desired(100, tickness="18.0")) == variant_key(variant("v1", 100))
+    assert variant_key(desired(100, tickness="12")) != variant_key(variant("v1", 100))
+
+
+def test_diff_creates_updates_and_leaves_unchanged():
+    rows = [desired("1500"), desired(900, tickness="12"), desired(700, tickness="6")]
+    existing = {variant_key(variant("v18", 1500)): [variant("v18", 1500)],
+                variant_key(variant("v12", 850, tickness=12)): [variant("v12", 850, tickness=12)]}
+
+    creates, updates, deletes = diff_variants(
+        {variant_key(row): row for row in rows}, existing)
+
+    assert creates == [rows[2]]
+    assert updates == [("v12", rows[1])]
+    assert deletes == []
+
+
+def test_diff_deletes_duplicates_and_rows_no_longer_wanted():
+    rows = [desired(1500)]
+    key = variant_key(rows[0])
+    gone = variant("v12", 850, tickness=12)
+    existing = {key: [variant("v1", 1500), variant("v2", 1500), variant("v3", 1400)],
+                variant_key(gone): [gone]}
+
+    creates, updates, deletes = diff_variants({key: rows[0]}, existing)
+
+    assert creates == []
+    assert updates == []  # The first existing variant is kept and already right
+    assert sorted(deletes) == ["v12", "v2", "v3"]
+
+
+def test_payload_drops_empty_fields():
+    assert variant_payload(desired(1500, city=None)) == {
+        "product": {"connect": ["p1"]}, "state": {"connect": ["s1"]},
+        "width": "1220", "height": "2440", "tickness": "18", "price": 1500}
+
+
+def test_sync_writes_only_the_differences(client, strapi, requests_made):
+    strapi.seed({"products": [{"documentId": "p1", "Name": "Club Prime"}],
+                 "states": [{"documentId": "s1", "name": "Goa"}]})
+    rows = [desired(1500), desired(900, tickness="12")]
+
+    assert sync_variants(client, rows)["created"] == 2
+
+    strapi.reset_stats()
+    stats = sync_variants(client, [desired(1500), desired(950, tickness="12")])
+    assert (stats["created"], stats["updated"], stats["unchanged"]) == (0, 1, 1)
+    assert requests_made("PUT") == 1 and requests_made("POST") == 0
+
+    stats = sync_variants(client, [desired(1500)])
+    assert (stats["stale"], stats["deleted"]) == (1, 0)  # Left in place without prune
+    stats = sync_variants(client, [desired(1500)], prune=True)
+    assert stats["deleted"] == 1
+    assert len(client.get("/api/product-variants").json()["data"]) == 1
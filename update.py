@@ -1,53 +1,37 @@
+import argparse
 import requests
-import json
-from urllib.parse import quote
-import re
 
-# Main API details
-file_name = "./csvjson_update.json"
-main_url = "http://49.205.180.247:3007/api/product-categories"
-product_post_url = "http://49.205.180.247:3007/api/products"
+from category_resolver import CategoryResolver, slug
+from csv_source import load_records
+from strapi_client import get_client, run_concurrently
+from strapi_mirror import open_mirror
 
+# Main API details
+file_name = "./work-on-poduct-data - new_data.csv"
+PRODUCTS_URL = "/api/products"
+MAX_WORKERS = 8  # Product POSTs kept in flight at once
 
-# Helper function to generate a slug
-def slug(name, parent_name=None):
-    sanitized_name = re.sub(r"[^A-Za-z0-9-_.~]+", "", name.replace(" ", "-"))
-    if parent_name:
-        sanitized_parent = re.sub(
-            r"[^A-Za-z0-9-_.~]+", "", parent_name.replace(" ", "-"))
-        return f"{sanitized_parent}-{sanitized_name}".lower()
-    return sanitized_name.lower()
+client = get_client()
+categories = CategoryResolver(client, mirror=open_mirror(client))
 
 
 def get_or_create_category(name, level, parent_id=None, parent_name=None):
-    encoded_name = quote(name)
-    category_slug = slug(name, parent_name)
-    response = requests.get(f"{main_url}?filters[slug][$eq]={category_slug}")
-    if response.status_code == 200 and response.json().get("data"):
-        return response.json()["data"][0].get("documentId")
-    else:
-        payload = {
-            "data": {
-                "Name": name,
-                "level": level,
-                "show_on_eshop": True,
-                "slug": category_slug,
-                "parent_category": {"connect": [parent_id]} if parent_id else None
-            }
-        }
-        post_response = requests.post(main_url, json=payload)
-        if post_response.status_code in [200, 201]:
-            return post_response.json()["data"].get("documentId")
-        else:
-            print(f"Failed to create category {name}: {post_response.text}")
-            return None
+    return categories.get_or_create(name, level, parent_id, parent_name)
+
 
+def category_paths(data):
+    """(name, slug) paths of the categories resolve_categories() uses per row."""
+    for item in data:
+        yield [
+            (item["ancaster_category"], slug(item["ancaster_category"])),
+            (item["child_category"], slug(item["child_category"], item["parent_category"])),
+            (item["sub_child_category"],
+             slug(item["sub_child_category"], item["child_category"])),
+        ]
 
-# Load data
-data = json.load(open(file_name))
 
-# Process each product
-for item in data:
+def resolve_categories(item):
+    """Return (parent_id, child_id, sub_child_id) for a product row."""
     parent_id = get_or_create_category(item["ancaster_category"], level=1)
     child_id = get_or_create_category(
         item["child_category"], level=2, parent_id=parent_id, parent_name=item["parent_category"]
@@ -57,38 +41,105 @@ for item in data:
         sub_child_id = get_or_create_category(
             item["sub_child_category"], level=3, parent_id=child_id, parent_name=item["child_category"]
         )
+    return parent_id, child_id, sub_child_id
 
-    if sub_child_id or child_id:
-        product_payload = {
-            "data": {
-                "Name": item["name"],
-                "model_code": item["model_code"],
-                "short_description": item["short_description"],
-                "Description": item["description"],
-                "display_on_eshop": item["display_on_eshop"] == "YES",
-                "specs": item["specs"],
-                "attributes": item["attributes"],
-                "alias": slug(item["name"]),
-                "display_on_eshop": item["new"] == "Y",
-                "product_categories": {
-                    "connect": [
-                        {"documentId": parent_id},
-                        {"documentId": child_id},
-                        {"documentId": sub_child_id} if sub_child_id else None
-                    ]
-                }
+
+def build_product_payload(item, parent_id, child_id, sub_child_id):
+    return {
+        "data": {
+            "Name": item["name"],
+            "model_code": item["model_code"],
+            "short_description": item["short_description"],
+            "Description": item["description"],
+            "display_on_eshop": item["display_on_eshop"] == "YES",
+            "specs": item["specs"],
+            "attributes": item["attributes"],
+            "alias": slug(item["name"]),
+            "display_on_eshop": item["new"] == "Y",
+            "product_categories": {
+                "connect": [
+                    {"documentId": parent_id},
+                    {"documentId": child_id},
+                    {"documentId": sub_child_id} if sub_child_id else None
+                ]
             }
         }
-        # this is the change line on branch1
+    }
+
+
+def create_product(product_payload):
+    """
+    POST a single product.
+
+    Returns:
+        tuple: (success, message)
+    """
+    try:
+        product_response = client.post(PRODUCTS_URL, json=product_payload)
+    except requests.RequestException as e:
+        return False, str(e)
+    if product_response.status_code in [200, 201]:
+        return True, "created successfully"
+    return False, product_response.text
+
 
-        product_response = requests.post(
-            # this is another change
-            product_post_url, json=product_payload)
-        # this is the change in branch1
-        if product_response.status_code in [200, 201]:
+def create_products(data, max_workers=MAX_WORKERS):
+    """
+    Resolve each row's categories, then POST the products concurrently.
+
+    Rows are pulled lazily as POST slots free up, so data can be a stream
+    of any length. Results are reported in input order.
+    """
+    skipped = 0
+
+    def jobs():
+        nonlocal skipped
+        for item in data:
+            # Category resolution is cached, so mostly in-memory
+            parent_id, child_id, sub_child_id = resolve_categories(item)
+            if sub_child_id or child_id:
+                yield item, build_product_payload(
+                    item, parent_id, child_id, sub_child_id)
+            else:
+                skipped += 1
+                print(f"Skipping product {item['name']}: no category resolved")
+
+    def create(job):
+        item, payload = job
+        return item, create_product(payload)
+
+    created = 0
+    attempted = 0
+    for item, (success, message) in run_concurrently(create, jobs(), max_workers):
+        attempted += 1
+        if success:
+            created += 1
             print(f"Product {item['name']} created successfully.")
-            # change in main
-            # this is new comment
         else:
-            print(f"Failed to create product {
-                  item['name']}: {product_response.text}")
+            print(f"Failed to create product {item['name']}: {message}")
+
+    print(f"Created {created}/{attempted} products ({skipped} skipped).")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Create categories and products from the product sheet.")
+    parser.add_argument("--file", default=file_name,
+                        help="Input CSV, or a csvjson JSON file")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="Maximum product POSTs in flight")
+    args = parser.parse_args()
+
+    # A first pass over the file builds the whole category tree, one
+    # concurrent wave per level, so product rows only hit the index
+    counts = categories.ensure_paths(
+        category_paths(load_records(args.file)), max(1, args.workers))
+    print(f"Categories: {counts['existing']} existing, {counts['created']} created, "
+          f"{counts['failed']} failed.")
+
+    # Rows are streamed from the file
+    create_products(load_records(args.file), max(1, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import hashlib
+import os
+import time
+import uuid
+from tempfile import SpooledTemporaryFile
+
+CHUNK_SIZE = 64 * 1024  # Bytes read/written per step while streaming
+SPOOL_THRESHOLD = 4 * 1024 * 1024  # Larger downloads spill to a temp file
+
+
+def spool_download(response, chunk_size=CHUNK_SIZE, max_memory=SPOOL_THRESHOLD):
+    """
+    Copy a streamed response body into a spooled temporary file.
+
+    Only one chunk is held at a time; bodies above max_memory are moved
+    to disk by SpooledTemporaryFile. The response is closed afterwards so
+    its connection goes back to the pool.
+
+    Args:
+        response: requests.Response opened with stream=True
+
+    Returns:
+        tuple: (spool file positioned at 0, size in bytes, sha256 hex, seconds)
+    """
+    spool = SpooledTemporaryFile(max_size=max_memory)
+    digest = hashlib.sha256()
+    size = 0
+    start = time.monotonic()
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if chunk:
+                spool.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+    except Exception:
+        spool.close()
+        raise
+    finally:
+        response.close()
+    spool.seek(0)
+    return spool, size, digest.hexdigest(), time.monotonic() - start
+
+
+def file_size(fileobj):
+    """Size of a seekable file object, leaving it positioned at 0."""
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(0)
+    return size
+
+
+class MultipartStream:
+    """
+    multipart/form-data body that is generated while it is sent.
+
+    requests reads file parts fully into memory when given files=...;
+    passing this object as data=... instead streams each file in
+    CHUNK_SIZE pieces. Its length is known up front, so the request still
+    carries a Content-Length header.
+
+    Args:
+        fields: dict of plain form fields
+        files: list of (field name, file name, file object, content type)
+    """
+
+    def __init__(self, fields, files, chunk_size=CHUNK_SIZE):
+        self.boundary = uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self.parts = []
+
+        for name, value in fields.items():
+            header = (f"--{self.boundary}\r\n"
+                      f'Content-Disposition: form-data; name="{name}"\r\n\r\n')
+            self.parts.append((header.encode() + str(value).encode() + b"\r\n", None, 0))
+
+        for name, file_name, fileobj, content_type in files:
+            header = (f"--{self.boundary}\r\n"
+                      f'Content-Disposition: form-data; name="{name}"; filename="{file_name}"\r\n'
+                      f"Content-Type: {content_type}\r\n\r\n")
+            self.parts.append((header.encode(), fileobj, file_size(fileobj)))
+
+        self.closing = f"--{self.boundary}--\r\n".encode()
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        length = len(self.closing)
+        for header, fileobj, size in self.parts:
+            length += len(header)
+            if fileobj is not None:
+                length += size + 2
+        return length
+
+    def __iter__(self):
+        for header, fileobj, _ in self.parts:
+            yield header
+            if fileobj is None:
+                continue
+            fileobj.seek(0)
+            while True:
+                chunk = fileobj.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+            yield b"\r\n"
+        yield self.closing
+
+
+def upload_stream(client, path, fields, files, **kwargs):
+    """POST a streamed multipart body and return the response."""
+    body = MultipartStream(fields, files)
+    headers = {"Content-Type": body.content_type}
+    headers.update(kwargs.pop("headers", {}))
+    return client.post(path, data=body, headers=headers, **kwargs)
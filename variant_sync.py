@@ -0,0 +1,162 @@
+import requests
+
+from strapi_client import LOOKUP_CHUNK_SIZE, UPDATE_WORKERS, run_concurrently
+
+VARIANTS_URL = "/api/product-variants"
+
+
+def _number(value):
+    """Compare 1220, "1220" and 1220.0 as the same value."""
+    if value is None or value == "":
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    return int(number) if number.is_integer() else number
+
+
+def _relation(value):
+    if isinstance(value, dict):
+        return value.get("documentId")
+    return value or None
+
+
+def variant_key(variant):
+    """(product, state, city, width, height, tickness) identity of a variant."""
+    return (_relation(variant.get("product")), _relation(variant.get("state")),
+            _relation(variant.get("city")), _number(variant.get("width")),
+            _number(variant.get("height")), _number(variant.get("tickness")))
+
+
+def variant_payload(row):
+    """Strapi data for a desired variant row, without empty fields."""
+    data = {
+        "product": {"connect": [row["product"]]} if row.get("product") else None,
+        "state": {"connect": [row["state"]]} if row.get("state") else None,
+        "city": {"connect": [row["city"]]} if row.get("city") else None,
+        "width": row.get("width"),
+        "height": row.get("height"),
+        "tickness": row.get("tickness"),
+        "price": row.get("price"),
+    }
+    return {k: v for k, v in data.items() if v is not None}
+
+
+def fetch_variants(client, product_ids, chunk_size=LOOKUP_CHUNK_SIZE, mirror=None):
+    """
+    Existing variants of the given products, grouped by variant_key.
+
+    Products are queried chunk_size at a time with a $in filter, and only
+    the fields that make up the key and the price are fetched. With a
+    StrapiMirror they are read from it after a delta refresh instead.
+    """
+    product_ids = list(dict.fromkeys(product_ids))
+    existing = {}
+    if mirror is not None:
+        mirror.ensure(["product-variants"])
+        for start in range(0, len(product_ids), chunk_size):
+            rows = mirror.find("product-variants",
+                               linked={"product": product_ids[start:start + chunk_size]},
+                               populate=("product", "state", "city"))
+            for row in rows:
+                existing.setdefault(variant_key(row), []).append(row)
+        return existing
+
+    for start in range(0, len(product_ids), chunk_size):
+        chunk = product_ids[start:start + chunk_size]
+        params = {f"filters[product][documentId][$in][{i}]": product_id
+                  for i, product_id in enumerate(chunk)}
+        rows = client.snapshot(
+            VARIANTS_URL, params,
+            fields=("documentId", "width", "height", "tickness", "price"),
+            populate={"product": ["documentId"], "state": ["documentId"],
+                      "city": ["documentId"]})
+        for row in rows:
+            existing.setdefault(variant_key(row), []).append(row)
+    return existing
+
+
+def diff_variants(desired, existing):
+    """
+    Compare desired rows with what Strapi already has.
+
+    Args:
+        desired: variant_key -> desired row (later rows for a key win)
+        existing: variant_key -> list of existing variants
+
+    Returns:
+        tuple: (rows to create,
+                [(documentId, row)] whose price changed,
+                documentIds of variants no longer in the sheet or duplicated)
+    """
+    creates, updates, deletes = [], [], []
+    for key, row in desired.items():
+        current = existing.get(key)
+        if not current:
+            creates.append(row)
+            continue
+        keep, *duplicates = current
+        if _number(keep.get("price")) != _number(row.get("price")):
+            updates.append((keep["documentId"], row))
+        deletes.extend(variant["documentId"] for variant in duplicates)
+    for key, current in existing.items():
+        if key not in desired:
+            deletes.extend(variant["documentId"] for variant in current)
+    return creates, updates, deletes
+
+
+def sync_variants(client, rows, prune=False, max_workers=UPDATE_WORKERS,
+                  chunk_size=LOOKUP_CHUNK_SIZE, logger=None, mirror=None):
+    """
+    Bring the variants of the products in rows in line with rows.
+
+    Each row is a dict with product, state, city, width, height, tickness
+    and price. Only missing variants are created and only changed prices
+    are updated; with prune, variants of those products that are not in
+    rows (or are duplicates) are deleted. Writes run concurrently.
+
+    Returns:
+        dict: counts of created, updated, deleted, unchanged and failed
+    """
+    desired = {}
+    for row in rows:
+        desired[variant_key(row)] = row
+    existing = fetch_variants(
+        client, [key[0] for key in desired if key[0]], chunk_size, mirror)
+    creates, updates, deletes = diff_variants(desired, existing)
+
+    stats = {"created": 0, "updated": 0, "deleted": 0, "failed": 0,
+             "unchanged": len(desired) - len(creates) - len(updates),
+             "stale": 0 if prune else len(deletes)}
+
+    def send(job):
+        action, document_id, row = job
+        try:
+            if action == "created":
+                response = client.post(
+                    VARIANTS_URL, json={"data": variant_payload(row)})
+            elif action == "updated":
+                response = client.put(f"{VARIANTS_URL}/{document_id}",
+                                      json={"data": {"price": row.get("price")}})
+            else:
+                response = client.delete(f"{VARIANTS_URL}/{document_id}")
+            response.raise_for_status()
+            return action, document_id, row, None
+        except requests.RequestException as e:
+            return action, document_id, row, e
+
+    jobs = ([("created", None, row) for row in creates]
+            + [("updated", document_id, row) for document_id, row in updates]
+            + ([("deleted", document_id, None) for document_id in deletes]
+               if prune else []))
+
+    for action, document_id, row, error in run_concurrently(send, jobs, max_workers):
+        if error is None:
+            stats[action] += 1
+        else:
+            stats["failed"] += 1
+            if logger is not None:
+                logger.error("Variant %s not %s: %s",
+                             document_id or variant_key(row), action, error)
+    return stats
@@ -1,20 +1,36 @@
 # vineers image put logic
 
-import json
+import argparse
+import hashlib
+import os
+import sys
 import requests
 import re
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from category_resolver import CategoryResolver  # noqa: E402
+from csv_source import load_records  # noqa: E402
+from media_cache import MediaCache, validators  # noqa: E402
+from pipeline import QUEUE_SIZE, Pipeline, Stage, print_summary  # noqa: E402
+from strapi_client import get_client  # noqa: E402
+from strapi_mirror import open_mirror  # noqa: E402
+
 # Configuration
-API_URL = "http://49.205.180.247:3007/api"  # Replace with your Strapi base URL
+API_URL = "/api"  # Resolved against STRAPI_URL by the shared client
+client = get_client()
+# Category tree, read from the local mirror once and shared by the
+# category stage workers
+categories = CategoryResolver(client, mirror=open_mirror(client))
 # Base URL for images
-IMAGE_BASE_URL = "https://www.centuryply.com/centuryveneers/image/big/"
-
-# Load JSON data
-
-
-def load_json(file_path):
-    with open(file_path, "r") as file:
-        return json.load(file)
+IMAGE_BASE_URL = os.environ.get(
+    "VENEER_IMAGE_BASE_URL", "https://www.centuryply.com/centuryveneers/image/big/")
+IMAGE_REF = "api::product.product"
+IMAGE_FIELD = "Multiple_Image"
+media_cache = MediaCache(os.environ.get(
+    "MEDIA_CACHE_PATH", "media_cache.sqlite3"))
+# Worker threads per pipeline stage, in pipeline order; downloads get the
+# most since image transfer dominates the run
+STAGE_WORKERS = {"download": 8, "categories": 2, "create": 4, "upload": 4}
 
 
 def sanitize_file_name(file_name):
@@ -24,44 +40,21 @@ def sanitize_file_name(file_name):
 
 
 def get_all_category_in_hierarchy_document_id(category):
+    """documentIds of a category and all its parents, resolved in memory."""
     try:
-        url = (
-            f"{API_URL}/product-categories?filters[Name][$eq]={category}"
-            "&populate[0]=parent_category"
-            "&populate[1]=parent_category.parent_category"
-            "&populate[2]=parent_category.parent_category.parent_category"
-        )
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json().get("data", [])
-        if not data:
-            raise ValueError(f"No category found with name {category}")
-
-        all_category_document_id = []
-
-        def extract_document_ids(category_data):
-            if not category_data:
-                return
-            document_id = category_data.get("documentId")
-            if document_id:
-                all_category_document_id.append(document_id)
-            parent_category = category_data.get("parent_category")
-            if parent_category:
-                extract_document_ids(parent_category)
-
-        for category_item in data:
-            extract_document_ids(category_item)
-
-        return all_category_document_id
-
+        all_category_document_id = categories.hierarchy(category)
     except requests.exceptions.RequestException as e:
         raise Exception(f"Failed to fetch category details: {e}")
+    if not all_category_document_id:
+        raise ValueError(f"No category found with name {category}")
+    return all_category_document_id
 
 
 def download_image(image_url):
-    response = requests.get(image_url, stream=True)
+    """Return (image bytes, etag, last_modified)."""
+    response = client.get(image_url, stream=True)
     if response.status_code == 200:
-        return response.content
+        return (response.content, *validators(response))
     else:
         raise Exception(f"Failed to download image from {image_url}: {
                         response.status_code}, {response.text}")
@@ -79,11 +72,11 @@ def upload_image(image_data, ref_id, file_name):
     }
     data = {
         "refId": ref_id,
-        "ref": "api::product.product",  # Replace with the appropriate reference type
-        "field": "Multiple_Image"   # Replace with the appropriate field in your model
+        "ref": IMAGE_REF,  # Replace with the appropriate reference type
+        "field": IMAGE_FIELD   # Replace with the appropriate field in your model
     }
     print("payload-image", data)
-    response = requests.post(url, files=files, data=data)
+    response = client.post(url, files=files, data=data)
 
     # Check for a successful response (201 or 200)
     if response.status_code in (200, 201):
@@ -100,63 +93,173 @@ def upload_image(image_data, ref_id, file_name):
                         response.status_code}, {response.text}")
 
 
-def main(json_file):
-
-    products = load_json(json_file)
-
-    for product in products:
-        product_name = product.get("name")
-        model_code = product.get("model_code")
-        image_name = product.get("image")
-        specs = product.get("specs")
-        alias = product.get("alias")
-        model_code = product.get("model_code")
-        sub_category = product.get("category")
-
-        category = get_all_category_in_hierarchy_document_id(sub_category)
-        print(f"Processing {product_name} with model_code {model_code}...")
-
-        # create product
-        url = f"{API_URL}/products"
-        payload = {
-            "data": {
-                "Name": product_name,
-                "model_code": model_code,
-                "specs": specs,
-                "alias": alias,
-                "product_categories": {
-                    "connect": category
-                }
+def link_image(product_id, media_id):
+    """Attach an already uploaded media entry to a product."""
+    response = client.put(
+        f"{API_URL}/products/{product_id}",
+        json={"data": {IMAGE_FIELD: [media_id]}})
+    response.raise_for_status()
+    return response.json()
+
+
+def prefetch_image(image_name):
+    """
+    Identify an image and download it unless an upload can be reused.
+
+    A HEAD request identifies unchanged source images; new downloads are
+    matched by SHA-256.
+
+    Returns:
+        tuple: (sha256, image bytes or None when the cached media is enough)
+    """
+    image_url = f"{IMAGE_BASE_URL}{image_name}"
+    try:
+        sha256, _, _ = media_cache.check(client, image_url)
+    except requests.exceptions.RequestException:
+        sha256 = None
+
+    if sha256 and media_cache.media_id(sha256) is not None:
+        return sha256, None
+
+    print(f"Downloading image from {image_url}...")
+    image_data, etag, last_modified = download_image(image_url)
+    sha256 = hashlib.sha256(image_data).hexdigest()
+    media_cache.record_source(image_url, etag, last_modified, sha256)
+    return sha256, image_data
+
+
+def attach_image(product_id, draft_id, image_name, sha256, image_data=None):
+    """
+    Attach an image to a product, reusing an earlier upload of the same file.
+
+    Known files are re-linked instead of uploaded.
+    """
+    media_id = media_cache.media_id(sha256)
+    if media_id is not None:
+        try:
+            link_image(product_id, media_id)
+            media_cache.record_link(sha256, IMAGE_REF, draft_id, IMAGE_FIELD)
+            print(f"Re-linked cached image {image_name} (media {media_id})")
+            return
+        except requests.exceptions.RequestException as e:
+            # The cached media may have been deleted from Strapi
+            print(f"Re-linking {image_name} failed, uploading again: {e}")
+
+    if image_data is None:
+        image_url = f"{IMAGE_BASE_URL}{image_name}"
+        print(f"Downloading image from {image_url}...")
+        image_data, _, _ = download_image(image_url)
+
+    upload_response = upload_image(image_data, draft_id, image_name)
+    media_cache.record_media(sha256, upload_response[0]["id"], len(image_data))
+    media_cache.record_link(sha256, IMAGE_REF, draft_id, IMAGE_FIELD)
+    return upload_response
+
+
+# Pipeline stages. Each takes the product row dict, adds what it found
+# and passes it on; returning None ends the row early.
+
+def resolve_stage(product):
+    product["category_ids"] = get_all_category_in_hierarchy_document_id(
+        product.get("category"))
+    return product
+
+
+def create_stage(product):
+    product_name = product.get("name")
+    model_code = product.get("model_code")
+    print(f"Processing {product_name} with model_code {model_code}...")
+
+    # create product
+    url = f"{API_URL}/products"
+    payload = {
+        "data": {
+            "Name": product_name,
+            "model_code": model_code,
+            "specs": product.get("specs"),
+            "alias": product.get("alias"),
+            "product_categories": {
+                "connect": product["category_ids"]
             }
         }
+    }
 
-        response = requests.post(url, json=payload)
-        if response.status_code not in (200, 201):
-            raise Exception(f"Failed to create product: {
-                            response.status_code}, {response.text}")
-        else:
-            print(f"Product created successfully for {
-                  product_name}. Response: {response.text}")
-            product_id = response.json().get("data", {}).get("documentId")
-
-            if not image_name:
-                print(f"No image found for {product_name}")
-                continue
-            draft_url = f"{API_URL}/products/{product_id}?status=draft"
-            response = requests.get(draft_url)
-            draft_id = response.json().get("data", {}).get("id")
-            # Step 2: Download image from URL
-            image_url = f"{IMAGE_BASE_URL}{image_name}"
-            print(f"Downloading image from {image_url}...")
-            image_data = download_image(image_url)
-
-            # Step 3: Upload imageau
-            upload_response = upload_image(image_data, draft_id, image_name)
-            print(f"Image uploaded successfully for {
-                  product_name}. Response: {upload_response}")
+    response = client.post(url, json=payload)
+    if response.status_code not in (200, 201):
+        raise Exception(f"Failed to create product: {
+                        response.status_code}, {response.text}")
+    print(f"Product created successfully for {
+          product_name}. Response: {response.text}")
+    product_id = response.json().get("data", {}).get("documentId")
+
+    if not product.get("image"):
+        print(f"No image found for {product_name}")
+        return None
+    draft_url = f"{API_URL}/products/{product_id}?status=draft"
+    response = client.get(draft_url)
+    product["product_id"] = product_id
+    product["draft_id"] = response.json().get("data", {}).get("id")
+    return product
+
+
+def prefetch_stage(product):
+    # Runs before the product exists, so a failed download must not drop
+    # the row; the upload stage tries the image again
+    if product.get("image"):
+        try:
+            product["sha256"], product["image_data"] = prefetch_image(product["image"])
+        except Exception as e:
+            print(f"Prefetching {product['image']} failed, retrying at upload: {e}")
+    return product
+
+
+def upload_stage(product):
+    if product.get("sha256") is None:
+        product["sha256"], product["image_data"] = prefetch_image(product["image"])
+    upload_response = attach_image(
+        product["product_id"], product["draft_id"], product["image"],
+        product["sha256"], product.pop("image_data"))
+    print(f"Image attached successfully for {
+          product.get('name')}. Response: {upload_response}")
+
+
+def report_error(stage, product, error):
+    print(f"{stage} failed for {product.get('name')}: {error}")
+
+
+def main(input_file, workers=None, queue_size=QUEUE_SIZE):
+    """
+    Create the products and attach their images through a staged pipeline.
+
+    Image download, category resolution, product creation and upload run
+    on their own worker threads. Downloads only need the sheet row, so
+    they come first and run ahead of the Strapi writes; the bounded
+    queues cap how many downloaded images wait for their product.
+    """
+    workers = {**STAGE_WORKERS, **(workers or {})}
+    stages = [
+        Stage("download", prefetch_stage, workers["download"], queue_size),
+        Stage("categories", resolve_stage, workers["categories"], queue_size),
+        Stage("create", create_stage, workers["create"], queue_size),
+        Stage("upload", upload_stage, workers["upload"], queue_size),
+    ]
+    summaries = Pipeline(stages, on_error=report_error).run(load_records(input_file))
+    print_summary(summaries)
 
 
 if __name__ == "__main__":
-    # Replace with the path to your JSON file
-    json_file_path = "./product-image-path.json"
-    main(json_file_path)
+    parser = argparse.ArgumentParser(
+        description="Create veneer products and attach their images.")
+    # Product sheet (CSV), or a csvjson JSON file
+    parser.add_argument("file", nargs="?", default="./product-image-path-new.csv",
+                        help="Veneer product sheet")
+    for stage, count in STAGE_WORKERS.items():
+        parser.add_argument(f"--{stage}-workers", type=int, default=count,
+                            help=f"Worker threads for the {stage} stage")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE,
+                        help="Rows buffered between two stages")
+    args = parser.parse_args()
+
+    main(args.file,
+         {stage: max(1, getattr(args, f"{stage}_workers")) for stage in STAGE_WORKERS},
+         max(1, args.queue_size))